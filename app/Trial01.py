@@ -2,13 +2,14 @@
 # Importamos las librerías necesarias.
 # - uuid: para generar identificadores únicos para los usuarios.
 # - os: para interactuar con el sistema operativo, especialmente para manejar rutas de archivos.
-# - shutil: para operaciones de alto nivel con archivos, como eliminar directorios.
-# - MOSConfig y MOS: son los componentes centrales de la librería MemOS.
+# - MOSConfig: la configuración de MemOS.
+# - ExtendedMOS: el MOS de MemOS con extensiones (p. ej. recargar un cubo en caliente).
+# - install_dedup: evita que el cubo acumule copias del mismo recuerdo.
+# - CubeSnapshotter: guarda checkpoints incrementales del cubo (vectores en binario .npy).
 import uuid
 import os
-import shutil
 from memos.configs.mem_os import MOSConfig
-from memos.mem_os.main import MOS
+from memos_ext import CubeSnapshotter, ExtendedMOS, install_dedup
 
 # --- Configuración de Rutas ---
 # Define y construye las rutas a los archivos y directorios necesarios.
@@ -30,7 +31,7 @@ DUMP_DIR = os.path.join(PROJECT_ROOT, "tmp")
 DUMP_PATH = os.path.join(DUMP_DIR, "my_mem_cube")
 
 
-def initialize_mos(config_path: str) -> MOS:
+def initialize_mos(config_path: str) -> ExtendedMOS:
     """
     Inicializa el sistema MemOS (MOS) a partir de un archivo de configuración.
     
@@ -41,7 +42,7 @@ def initialize_mos(config_path: str) -> MOS:
         config_path (str): La ruta al archivo de configuración JSON.
 
     Returns:
-        MOS: Una instancia inicializada del sistema MemOS.
+        ExtendedMOS: Una instancia inicializada del sistema MemOS.
     """
     print("1. Inicializando MemOS...")
     # Verificamos que el archivo de configuración exista antes de intentar cargarlo.
@@ -52,12 +53,12 @@ def initialize_mos(config_path: str) -> MOS:
         )
     # Creamos el objeto de configuración desde el archivo JSON y luego inicializamos MOS.
     mos_config = MOSConfig.from_json_file(config_path)
-    mos = MOS(mos_config)
+    mos = ExtendedMOS(mos_config)
     print("✅ MemOS inicializado correctamente.")
     return mos
 
 
-def setup_user_and_memory(mos: MOS, user_id: str, mem_cube_path: str):
+def setup_user_and_memory(mos: ExtendedMOS, user_id: str, mem_cube_path: str):
     """
     Crea un nuevo usuario y registra un cubo de memoria para él.
 
@@ -66,7 +67,7 @@ def setup_user_and_memory(mos: MOS, user_id: str, mem_cube_path: str):
     se almacenarán sus memorias.
 
     Args:
-        mos (MOS): La instancia del sistema MemOS.
+        mos (ExtendedMOS): La instancia del sistema MemOS.
         user_id (str): El identificador único para el nuevo usuario.
         mem_cube_path (str): La ruta al directorio del cubo de memoria a registrar.
     """
@@ -84,6 +85,10 @@ def setup_user_and_memory(mos: MOS, user_id: str, mem_cube_path: str):
     # Registramos (asociamos) el cubo de memoria con el usuario recién creado.
     mos.register_mem_cube(mem_cube_path, user_id=user_id)
     print(f"   - Cubo de memoria registrado para el usuario '{user_id}'.")
+
+    # Activamos la deduplicación: si el recuerdo ya existe (similitud coseno alta),
+    # se actualizan sus metadatos en lugar de insertar una copia nueva.
+    install_dedup(mos.mem_cubes[mem_cube_path])
     print("✅ Configuración de usuario completa.")
 
 
@@ -129,72 +134,38 @@ def main():
     print(f"   - Resultado: {found_memories}")
     print("✅ Búsqueda completada.")
 
-    # Paso 5: Guardar el estado de la memoria (dump)
-    # Persistimos el estado actual de todas las memorias en el disco para poder reanudar sesiones.
+    # Paso 5: Guardar el estado de la memoria (checkpoint incremental)
+    # Persistimos el estado actual de las memorias en el disco para poder reanudar sesiones.
     print("\n5. Guardando el estado de la memoria...")
 
-    # La función 'dump' requiere que el directorio de destino esté vacío.
-    # Si el script se ha ejecutado antes, el directorio ya existirá y contendrá archivos.
-    # Para evitar el error, lo eliminamos si existe.
-    if os.path.exists(DUMP_PATH):
-        print(f"   - El directorio de volcado '{DUMP_PATH}' ya existe. Limpiando...")
-        shutil.rmtree(DUMP_PATH)
-
-    # Creamos un directorio de volcado nuevo y vacío para la operación de guardado.
-    os.makedirs(DUMP_PATH)
-
-    # Pasamos el user_id para que sepa qué memoria de usuario guardar.
-    mos.dump(DUMP_PATH, user_id=user_id)
+    # En lugar de borrar el directorio y volcarlo todo de nuevo, hacemos un checkpoint
+    # incremental: la primera vez se escribe una base completa y, a partir de ahí,
+    # solo un segmento con las memorias nuevas, actualizadas o borradas.
+    # Si el directorio contiene un volcado antiguo, se adopta como base.
+    snapshotter = CubeSnapshotter(mos.mem_cubes[MEM_CUBE_PATH], DUMP_PATH)
+    changes = snapshotter.checkpoint()
+    print(f"   - Cambios guardados: {changes['upserted']} memorias escritas, {changes['deleted']} borradas.")
     print(f"✅ Estado de la memoria guardado en: {DUMP_PATH}")
 
-    # --- Fin de la Sesión 1 ---
-    # Antes de iniciar una nueva sesión, debemos liberar la instancia anterior.
-    # Esto suelta el bloqueo sobre la base de datos local (Qdrant), permitiendo
-    # que la nueva sesión pueda acceder a ella.
-    print("\n--- Terminando la primera sesión ---")
-    print("   - Liberando la instancia de MOS para soltar el bloqueo de la base de datos...")
-    del mos
-
-    # Paso 6: Cargar el estado de la memoria en una nueva sesión
-    print("\n6. Cargando el estado de la memoria en una nueva sesión...")
-    new_mos_session = initialize_mos(CONFIG_PATH)
-
-    # IMPORTANTE: El 'dump' guarda el *contenido* de la memoria, pero no la configuración
-    # del usuario o qué cubos de memoria tiene. Por eso, debemos registrar al usuario
-    # y su cubo de memoria en la nueva sesión antes de poder cargar los datos.
-    print("   - Re-registrando el usuario y su cubo de memoria...")
-    setup_user_and_memory(new_mos_session, user_id, MEM_CUBE_PATH)
-
-    # Ahora, cargamos los datos del dump en el cubo de memoria recién registrado.
-    print(f"   - Cargando contenido de la memoria desde '{DUMP_PATH}'...")
+    # Paso 6: Restaurar el estado de la memoria en la misma sesión
+    # Antes había que destruir el MOS (`del mos`) para soltar el bloqueo de la base de
+    # datos local (Qdrant) y volver a inicializarlo todo: configuración, modelos,
+    # usuario y cubo. Con `reload_cube` el cubo se vacía y se recarga desde el
+    # snapshot (base + segmentos) conservando los modelos y el cliente de Qdrant.
+    print("\n6. Restaurando el estado de la memoria desde el snapshot...")
     try:
-        # Primero, obtenemos el cubo de memoria que acabamos de registrar para el usuario.
-        accessible_cubes = new_mos_session.user_manager.get_accessible_cubes(user_id)
-        if not accessible_cubes:
-            print("❌ Error: No se encontró un cubo de memoria accesible para el usuario después de registrarlo.")
-            return
-
-        mem_cube_id = accessible_cubes[0].cube_id
-        mem_cube = new_mos_session.mem_cubes[mem_cube_id]
-        
-        # Luego, llamamos al método `load` directamente en el objeto MemCube.
-        # Esto es simétrico a cómo funciona `dump`.
-        mem_cube.load(DUMP_PATH)
-        print("✅ Estado de la memoria cargado.")
-    except AttributeError:
-        print("❌ Error: El método `load` no se encuentra en el objeto MemCube. La API de la librería puede haber cambiado.")
-        return
+        mos.reload_cube(MEM_CUBE_PATH, DUMP_PATH, user_id=user_id)
+        print(f"✅ Estado de la memoria cargado desde '{DUMP_PATH}'.")
     except Exception as e:
         print(f"❌ Ocurrió un error inesperado al cargar la memoria: {e}")
         return
 
-
     # Paso 7: Verificar que la memoria se cargó correctamente
-    # Realizamos la misma búsqueda en la nueva sesión para confirmar que los datos están ahí.
+    # Realizamos la misma búsqueda tras la recarga para confirmar que los datos están ahí.
     print("\n7. Verificando la memoria cargada...")
-    result_after_load = new_mos_session.search(query=query, user_id=user_id)
+    result_after_load = mos.search(query=query, user_id=user_id)
     verified_memories = result_after_load.get("text_mem", "No se encontraron memorias.")
-    print(f"   - Buscando la misma memoria en la nueva sesión...")
+    print(f"   - Buscando la misma memoria tras la recarga...")
     print(f"   - Resultado: {verified_memories}")
 
     if verified_memories:
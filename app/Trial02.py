@@ -1,9 +1,15 @@
 # --- Importaciones ---
 import uuid
 import os
-import shutil
+import re
 from memos.configs.mem_os import MOSConfig
-from memos.mem_os.main import MOS
+from memos_ext import (
+    LOW_VALUE_PATTERNS,
+    ExtendedMOS,
+    install_dedup,
+    install_embedding_cache,
+    install_queue_logging,
+)
 
 # --- Configuración de Rutas ---
 # Usamos la misma estructura de rutas que en el Trial01 para mantener la consistencia.
@@ -14,9 +20,26 @@ except NameError:
 
 CONFIG_PATH = os.path.join(PROJECT_ROOT, "examples/data/config/simple_memos_config.json")
 MEM_CUBE_PATH = os.path.join(PROJECT_ROOT, "examples/data/mem_cube_2")
-
-
-def initialize_mos(config_path: str) -> MOS:
+# Caché en disco de embeddings: los textos ya vectorizados no vuelven a Ollama.
+EMBEDDING_CACHE_PATH = os.path.join(PROJECT_ROOT, ".memos", "embedding_cache.sqlite")
+# Archivo en disco de las memorias antiguas o de relleno que salen de la colección activa.
+ARCHIVE_PATH = os.path.join(PROJECT_ROOT, ".memos", "archive", "mem_cube_2")
+# Tamaño máximo de la colección activa del cubo (lo más antiguo pasa al archivo).
+MAX_HOT_MEMORIES = 5000
+
+# Respuestas fijas del asistente en `chat_loop`.
+REPLY_RELATED = "Recuerdo que hablamos de algo relacionado. Mencionaste: '{memory}'. ¿Es correcto?"
+REPLY_UNREADABLE = "He encontrado un recuerdo relevante, pero no he podido procesar su contenido. Lo tendré en cuenta."
+REPLY_NOTED = "Entendido. He tomado nota de eso."
+# Esas respuestas solo repiten una memoria que ya existe: el ciclo de vida las
+# archiva como memorias de poco valor (`{memory}` admite cualquier texto).
+CANNED_REPLY_PATTERNS = tuple(
+    re.escape(reply).replace(re.escape("{memory}"), ".*")
+    for reply in (REPLY_RELATED, REPLY_UNREADABLE, REPLY_NOTED)
+)
+
+
+def initialize_mos(config_path: str) -> ExtendedMOS:
     """Inicializa el sistema MemOS desde un archivo de configuración."""
     print("🤖 Inicializando MemOS para el chat...")
     if not os.path.exists(config_path):
@@ -25,12 +48,17 @@ def initialize_mos(config_path: str) -> MOS:
             "Asegúrate de haber descargado los ejemplos con 'memos download_examples'."
         )
     mos_config = MOSConfig.from_json_file(config_path)
-    mos = MOS(mos_config)
+    # Los logs de MemOS se escriben en `memos.log` desde un hilo aparte: el bucle
+    # de chat solo encola cada registro.
+    install_queue_logging()
+    # `write_behind=True`: `mos.add` guarda la conversación en segundo plano y el
+    # siguiente `input()` aparece sin esperar a la extracción, el embedding y Qdrant.
+    mos = ExtendedMOS(mos_config, write_behind=True)
     print("✅ ¡Listo para chatear!")
     return mos
 
 
-def setup_user(mos: MOS, user_id: str, mem_cube_path: str):
+def setup_user(mos: ExtendedMOS, user_id: str, mem_cube_path: str):
     """
     Prepara al usuario para la sesión de chat.
     
@@ -39,10 +67,25 @@ def setup_user(mos: MOS, user_id: str, mem_cube_path: str):
     print(f"👤 Preparando al usuario '{user_id}'...")
     mos.create_user(user_id=user_id)
     mos.register_mem_cube(mem_cube_path, user_id=user_id)
+    # Cada turno repite hechos ya conocidos: fusionamos los casi-duplicados
+    # para que el cubo crezca con hechos distintos y no con turnos.
+    install_dedup(mos.mem_cubes[mem_cube_path])
+    # El texto del usuario se vectoriza en `search` y otra vez en `add`: con la
+    # caché, la segunda vez (y las respuestas repetidas del asistente) no llaman a Ollama.
+    install_embedding_cache(mos.mem_cubes[mem_cube_path], disk_path=EMBEDDING_CACHE_PATH)
+    # Cada turno guarda también la respuesta fija del asistente: en segundo plano,
+    # esas memorias y las antiguas ya resumidas pasan a un archivo en disco que la
+    # búsqueda no recorre, y la colección activa no pasa de MAX_HOT_MEMORIES.
+    mos.start_lifecycle(
+        mem_cube_path,
+        ARCHIVE_PATH,
+        max_hot=MAX_HOT_MEMORIES,
+        low_value_patterns=(*LOW_VALUE_PATTERNS, *CANNED_REPLY_PATTERNS),
+    )
     print("✅ Usuario listo.")
 
 
-def chat_loop(mos: MOS, user_id: str):
+def chat_loop(mos: ExtendedMOS, user_id: str):
     """
     Inicia un bucle de chat interactivo con el usuario.
     
@@ -57,21 +100,29 @@ def chat_loop(mos: MOS, user_id: str):
     while True:
         user_input = input("Tú > ")
         if user_input.lower() in ["salir", "exit"]:
+            # Antes de salir esperamos a que terminen las escrituras pendientes.
+            mos.close()
             print("🤖 ¡Hasta luego! La conversación ha sido guardada en la memoria.")
+            embedder = mos.mem_cubes[MEM_CUBE_PATH].text_mem.embedder
+            if hasattr(embedder, "stats"):
+                print(f"📊 Caché de embeddings: {embedder.stats()}")
             break
 
         # Paso 1: Buscar en la memoria antes de generar una respuesta.
         # Esto permite al asistente usar contexto de conversaciones pasadas.
         print("🧠  Buscando en la memoria...")
-        search_results = mos.search(query=user_input, user_id=user_id)
+        # `wait_for_writes=True`: si el turno anterior aún se está guardando,
+        # esperamos a que termine para que la búsqueda lo tenga en cuenta.
+        search_results = mos.search(query=user_input, user_id=user_id, wait_for_writes=True)
         found_memories = search_results.get("text_mem")
 
         # Paso 2: Generar una respuesta simple basada en si se encontraron memorias.
         assistant_response = ""
         if found_memories:
-            # El recuerdo encontrado es un diccionario. Gracias al DEBUG, ahora conocemos su estructura.
-            print(f"DEBUG: Estructura del resultado: {found_memories[0]}")
-            
+            # La estructura completa del resultado ya no se imprime: `memos.log` guarda
+            # una línea por búsqueda (ids, puntuaciones y tiempos) y, con nivel DEBUG,
+            # el contenido de cada memoria.
+
             # CORRECCIÓN FINAL: Navegamos la estructura de datos correcta.
             # 1. Obtenemos el primer diccionario de resultados.
             search_result = found_memories[0]
@@ -84,20 +135,21 @@ def chat_loop(mos: MOS, user_id: str):
                 # 4. Accedemos a su atributo '.memory' para obtener el texto.
                 memory_text = most_relevant_memory.memory
 
-                assistant_response = f"Recuerdo que hablamos de algo relacionado. Mencionaste: '{memory_text}'. ¿Es correcto?"
+                assistant_response = REPLY_RELATED.format(memory=memory_text)
                 print(f"Asistente > {assistant_response}")
             else:
                 # Si el resultado no contenía una lista de 'memories', lo notificamos.
-                assistant_response = "He encontrado un recuerdo relevante, pero no he podido procesar su contenido. Lo tendré en cuenta."
+                assistant_response = REPLY_UNREADABLE
                 print(f"Asistente > {assistant_response}")
         else:
             # Si no hay memoria, damos una respuesta genérica.
-            assistant_response = "Entendido. He tomado nota de eso."
+            assistant_response = REPLY_NOTED
             print(f"Asistente > {assistant_response}")
 
         # Paso 3: Añadir la nueva interacción a la memoria.
         # MemOS procesará esta conversación y decidirá qué es importante guardar.
-        print("📝 Guardando conversación en la memoria...")
+        # Con write-behind esto ocurre en segundo plano mientras el usuario escribe.
+        print("📝 Guardando conversación en la memoria (en segundo plano)...")
         
         # Construimos el formato de mensajes que `mos.add` espera.
         messages_to_add = [
@@ -0,0 +1,468 @@
+# --- Benchmark de recuperación: add → search → dump → load ---
+# Los scripts de `app/` (lesson1, Trial01, Trial02) son interactivos y no miden
+# tiempos, así que no sabemos si una actualización de MemOS o un cambio del
+# `config.json` hace más rápidos o más lentos los caminos críticos.
+#
+# Este script genera conversaciones sintéticas (1k, 100k y 1M memorias por
+# defecto) y mide, para cada tamaño:
+#   - `add`: memorias/s con `text_mem.add` turno a turno (como `mos.add`) y con
+#     `bulk_add` (ingesta masiva).
+#   - `search`: latencia p50/p99 de `text_mem.search` y recall@k frente a una
+#     búsqueda exacta (producto escalar en NumPy sobre todos los vectores).
+#   - dump/load: tiempo y tamaño en disco de `dump_mem_cube` / `load_mem_cube`.
+# El embedder y el LLM son stubs deterministas y locales: no hace falta Ollama
+# ni claves de API y dos ejecuciones con la misma semilla generan los mismos datos.
+# Los resultados se escriben en JSON para comparar ejecuciones.
+#
+# Uso (desde la carpeta `app/`):
+#   python benchmark_retrieval.py --sizes 1k,100k --backend numpy
+#   python benchmark_retrieval.py --sizes 1M --dim 384 --qdrant-url http://localhost:6333
+# Con 1M memorias de 768 dimensiones la matriz de referencia ocupa ~3 GB de RAM.
+
+# --- Importaciones ---
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import tempfile
+import time
+import uuid
+import zlib
+
+from collections.abc import Generator
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+
+from pydantic import Field
+
+from memos.configs.embedder import BaseEmbedderConfig, EmbedderConfigFactory
+from memos.configs.llm import BaseLLMConfig, LLMConfigFactory
+from memos.configs.mem_cube import GeneralMemCubeConfig
+from memos.embedders.base import BaseEmbedder
+from memos.embedders.factory import EmbedderFactory
+from memos.llms.base import BaseLLM
+from memos.llms.factory import LLMFactory
+from memos.mem_cube.general import GeneralMemCube
+from memos.memories.textual.item import TextualMemoryItem, TextualMemoryMetadata
+from memos.types import MessageList
+
+from memos_ext import bulk_add, dump_mem_cube, install_numpy_vecdb, install_qdrant_tuning, load_mem_cube
+
+# --- Configuración por defecto ---
+try:
+    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+except NameError:
+    PROJECT_ROOT = os.path.abspath(os.path.join(os.getcwd()))
+
+DEFAULT_OUTPUT_PATH = os.path.join(PROJECT_ROOT, "tmp", "benchmark_results.json")
+DEFAULT_SIZES = "1k,100k,1M"
+STUB_BACKEND = "benchmark_stub"
+USER_ID = "benchmark_user"
+
+# Vocabulario de las conversaciones sintéticas.
+ACTIONS = ["Me encanta", "Odio", "Estoy aprendiendo", "Practico", "Quiero probar", "Recuerdo"]
+TOPICS = [
+    "el fútbol", "la cocina italiana", "los viajes en tren", "la música clásica", "programar en Python",
+    "la jardinería", "el cine de terror", "la novela negra", "la escalada", "la fotografía",
+    "el ajedrez", "la natación", "el jazz", "la cerveza artesanal", "los videojuegos",
+    "la astronomía", "el yoga", "la cerámica", "el ciclismo", "los idiomas",
+]
+MOMENTS = ["los lunes", "los miércoles", "los viernes", "los sábados", "los domingos", "en verano", "en invierno"]
+PEOPLE = ["Ana", "Luis", "Marta", "Jorge", "Lucía", "Pablo", "Elena", "Diego", "Sara", "mi hermano"]
+PLACES = ["Madrid", "Sevilla", "Bilbao", "Valencia", "casa", "la oficina", "el parque", "la playa", "la montaña", "Lisboa"]
+REPLIES = [
+    "¡Qué bien! Lo tendré en cuenta.",
+    "Interesante, cuéntame más cuando quieras.",
+    "Entendido, lo recordaré.",
+    "¡Genial! Parece un buen plan.",
+]
+
+
+# --- Stubs deterministas (embedder y LLM) ---
+
+class StubEmbedderConfig(BaseEmbedderConfig):
+    """Configuración del embedder de prueba."""
+
+    seed: int = Field(default=0, description="Semilla de los vectores de cada palabra")
+
+
+class StubEmbedder(BaseEmbedder):
+    """
+    Embedder determinista sin red: suma de vectores aleatorios por palabra.
+
+    Cada palabra tiene un vector fijo (semilla = crc32 de la palabra + `seed`), así que
+    textos que comparten palabras quedan cerca en coseno, como con un modelo real. Los
+    números se descomponen en dígitos por posición para que textos casi iguales no
+    produzcan vectores idénticos (y empates en el top-k).
+    """
+
+    DIGIT_WEIGHT = 0.25
+
+    def __init__(self, config: StubEmbedderConfig):
+        self.config = config
+        self.dims = config.embedding_dims or 768
+        self._vocabulary: dict[str, np.ndarray] = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._vocabulary.get(token)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(token.encode("utf-8")) ^ self.config.seed)
+            vector = rng.standard_normal(self.dims).astype(np.float32)
+            self._vocabulary[token] = vector
+        return vector
+
+    def embed_matrix(self, texts: list[str]) -> np.ndarray:
+        """Igual que `embed`, pero devuelve una matriz float32 normalizada."""
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                if token.isdigit():
+                    for position, digit in enumerate(token):
+                        matrix[row] += self.DIGIT_WEIGHT * self._token_vector(f"#{position}:{digit}")
+                else:
+                    matrix[row] += self._token_vector(token)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_matrix(texts).tolist()
+
+
+class StubLLMConfig(BaseLLMConfig):
+    """Configuración del LLM de prueba."""
+
+
+class StubLLM(BaseLLM):
+    """
+    LLM determinista sin red.
+
+    `generate` devuelve, en el formato JSON que espera `GeneralTextMemory.extract`, una
+    memoria por cada mensaje del usuario; `generate_stream` emite la misma respuesta
+    palabra a palabra.
+    """
+
+    def __init__(self, config: StubLLMConfig):
+        self.config = config
+
+    def generate(self, messages: MessageList, **kwargs) -> str:
+        memories = [
+            {"memory": message["content"], "metadata": {"type": "fact", "source": "conversation"}}
+            for message in messages
+            if message.get("role") == "user"
+        ]
+        return json.dumps(memories, ensure_ascii=False)
+
+    def generate_stream(self, messages: MessageList, **kwargs) -> Generator[str, None, None]:
+        for word in self.generate(messages, **kwargs).split(" "):
+            yield word + " "
+
+
+def install_stub_backends() -> None:
+    """Registra el embedder y el LLM de prueba como backend "benchmark_stub"."""
+    EmbedderConfigFactory.backend_to_class[STUB_BACKEND] = StubEmbedderConfig
+    EmbedderFactory.backend_to_class[STUB_BACKEND] = StubEmbedder
+    LLMConfigFactory.backend_to_class[STUB_BACKEND] = StubLLMConfig
+    LLMFactory.backend_to_class[STUB_BACKEND] = StubLLM
+
+
+# --- Datos sintéticos ---
+
+def parse_size(value: str) -> int:
+    """`"1000"`, `"100k"` o `"1M"` -> número de memorias."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def generate_conversations(num_memories: int, seed: int) -> list[list[TextualMemoryItem]]:
+    """
+    Genera turnos usuario/asistente (dos memorias por turno, como guarda `mos.add`).
+
+    Returns:
+        list: Un elemento por turno, con las memorias de ese turno.
+    """
+    rng = random.Random(seed)
+    turns = []
+    for index in range((num_memories + 1) // 2):
+        session_id = f"session_{index // 50}"
+        user_text = (
+            f"{rng.choice(ACTIONS)} {rng.choice(TOPICS)} {rng.choice(MOMENTS)} con "
+            f"{rng.choice(PEOPLE)} en {rng.choice(PLACES)} (nota {index:07d})"
+        )
+        texts = [user_text, f"{rng.choice(REPLIES)} (nota {index:07d})"]
+        turns.append(
+            [
+                TextualMemoryItem(
+                    id=str(uuid.UUID(int=rng.getrandbits(128))),
+                    memory=text,
+                    metadata=TextualMemoryMetadata(
+                        user_id=USER_ID, session_id=session_id, source="conversation"
+                    ),
+                )
+                for text in texts
+            ]
+        )
+    # El último turno puede sobrar media memoria para llegar al tamaño exacto.
+    if num_memories % 2:
+        turns[-1] = turns[-1][:1]
+    return turns
+
+
+def generate_queries(memories: list[TextualMemoryItem], num_queries: int, seed: int) -> list[str]:
+    """Consultas a partir de memorias guardadas: una parte de sus palabras, sin la nota."""
+    rng = random.Random(seed + 1)
+    user_memories = memories[::2]
+    queries = []
+    for memory in rng.sample(user_memories, min(num_queries, len(user_memories))):
+        words = memory.memory.split(" (nota")[0].split()
+        kept = sorted(rng.sample(range(len(words)), max(1, len(words) * 2 // 3)))
+        queries.append(" ".join(words[i] for i in kept))
+    return queries
+
+
+# --- Cubo de memoria ---
+
+def build_cube(args, collection_name: str, workdir: str) -> GeneralMemCube:
+    """Crea un cubo con memoria textual general sobre el backend elegido y los stubs."""
+    vector_db_config = {
+        "collection_name": collection_name,
+        "vector_dimension": args.dim,
+        "distance_metric": "cosine",
+    }
+    if args.backend == "qdrant":
+        if args.qdrant_url:
+            vector_db_config["url"] = args.qdrant_url
+        else:
+            vector_db_config["path"] = os.path.join(workdir, "qdrant")
+
+    config = GeneralMemCubeConfig(
+        user_id=USER_ID,
+        cube_id=collection_name,
+        text_mem={
+            "backend": "general_text",
+            "config": {
+                "extractor_llm": {"backend": STUB_BACKEND, "config": {"model_name_or_path": "stub"}},
+                "embedder": {
+                    "backend": STUB_BACKEND,
+                    "config": {"model_name_or_path": "stub", "embedding_dims": args.dim, "seed": args.seed},
+                },
+                "vector_db": {"backend": args.backend, "config": vector_db_config},
+            },
+        },
+    )
+    return GeneralMemCube(config)
+
+
+def close_cube(mem_cube: GeneralMemCube) -> None:
+    """Borra la colección y suelta el cliente de Qdrant (si el backend lo tiene)."""
+    vector_db = mem_cube.text_mem.vector_db
+    vector_db.delete_collection(vector_db.config.collection_name)
+    getattr(vector_db, "close", lambda: None)()
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _latency_stats(latencies: list[float]) -> dict:
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+
+# --- Medidas ---
+
+def measure_add(mem_cube: GeneralMemCube, turns: list[list[TextualMemoryItem]], args) -> dict:
+    """Carga todas las memorias: los primeros turnos uno a uno y el resto con `bulk_add`."""
+    text_mem = mem_cube.text_mem
+    turn_count = 0
+    start = time.perf_counter()
+    for turn in turns:
+        if turn_count >= args.add_sample:
+            break
+        text_mem.add(turn)
+        turn_count += len(turn)
+    turn_seconds = time.perf_counter() - start
+
+    remaining = [item for turn in turns for item in turn][turn_count:]
+    start = time.perf_counter()
+    bulk_count = bulk_add(text_mem, remaining, upsert_workers=1)
+    bulk_seconds = time.perf_counter() - start
+
+    return {
+        "turn_memories": turn_count,
+        "turn_seconds": turn_seconds,
+        "turn_memories_per_s": turn_count / turn_seconds if turn_seconds else None,
+        "bulk_memories": bulk_count,
+        "bulk_seconds": bulk_seconds,
+        "bulk_memories_per_s": bulk_count / bulk_seconds if bulk_seconds else None,
+    }
+
+
+def exact_top_k(
+    embedder: StubEmbedder, memories: list[TextualMemoryItem], queries: list[str], k: int
+) -> list[set[str]]:
+    """Top-k exacto por coseno (la referencia del recall), por bloques de memorias."""
+    query_matrix = embedder.embed_matrix(queries)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    block_size = 50_000
+    for start in range(0, len(memories), block_size):
+        block = embedder.embed_matrix([m.memory for m in memories[start : start + block_size]])
+        scores = np.concatenate([best_scores, query_matrix @ block.T], axis=1)
+        rows = np.concatenate(
+            [best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))],
+            axis=1,
+        )
+        keep = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows = np.take_along_axis(rows, keep, axis=1)
+    return [{memories[row].id for row in rows} for rows in best_rows]
+
+
+def measure_search(
+    mem_cube: GeneralMemCube, memories: list[TextualMemoryItem], queries: list[str], k: int
+) -> dict:
+    """Latencia de `text_mem.search` (embedding incluido) y recall@k frente al top-k exacto."""
+    text_mem = mem_cube.text_mem
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found = text_mem.search(query, top_k=k)
+        latencies.append(time.perf_counter() - start)
+        results.append({item.id for item in found})
+
+    expected = exact_top_k(text_mem.embedder, memories, queries, k)
+    recalls = [len(got & want) / len(want) for got, want in zip(results, expected, strict=True) if want]
+    return {"queries": len(queries), "k": k, **_latency_stats(latencies), f"recall_at_{k}": float(np.mean(recalls))}
+
+
+def measure_dump_load(mem_cube: GeneralMemCube, args, workdir: str, size: int) -> dict:
+    """Tiempo y tamaño de `dump_mem_cube` y tiempo de `load_mem_cube` en un cubo vacío."""
+    dump_dir = os.path.join(workdir, f"dump_{size}")
+    start = time.perf_counter()
+    dump_mem_cube(mem_cube, dump_dir)
+    dump_seconds = time.perf_counter() - start
+
+    # Qdrant local solo admite un cliente por ruta: el cubo de carga usa otra carpeta.
+    load_workdir = os.path.join(workdir, f"load_{size}")
+    loaded_cube = build_cube(args, f"benchmark_load_{size}", load_workdir)
+    start = time.perf_counter()
+    load_mem_cube(loaded_cube, dump_dir)
+    load_seconds = time.perf_counter() - start
+    loaded = loaded_cube.text_mem.vector_db.count()
+    close_cube(loaded_cube)
+
+    return {
+        "dump_seconds": dump_seconds,
+        "dump_bytes": _dir_size(dump_dir),
+        "load_seconds": load_seconds,
+        "loaded_memories": loaded,
+    }
+
+
+def run_size(size: int, args, workdir: str) -> dict:
+    """Ejecuta el ciclo completo add → search → dump → load para un tamaño."""
+    print(f"📦 {size} memorias: generando conversaciones...")
+    turns = generate_conversations(size, args.seed)
+    memories = [item for turn in turns for item in turn]
+    queries = generate_queries(memories, args.queries, args.seed)
+
+    mem_cube = build_cube(args, f"benchmark_{size}", os.path.join(workdir, f"cube_{size}"))
+    try:
+        print("   ➕ add...")
+        add = measure_add(mem_cube, turns, args)
+        print("   🔍 search...")
+        search = measure_search(mem_cube, memories, queries, args.k)
+        print("   💾 dump/load...")
+        storage = measure_dump_load(mem_cube, args, workdir, size)
+    finally:
+        close_cube(mem_cube)
+
+    result = {"memories": size, "add": add, "search": search, "dump_load": storage}
+    print(
+        f"   ✅ add {add['turn_memories_per_s'] or 0:.0f} mem/s (turno), "
+        f"{add['bulk_memories_per_s'] or 0:.0f} mem/s (bulk) | "
+        f"search p50 {search['p50_ms']:.2f} ms, p99 {search['p99_ms']:.2f} ms, "
+        f"recall@{args.k} {search[f'recall_at_{args.k}']:.3f} | "
+        f"dump {storage['dump_seconds']:.2f} s ({storage['dump_bytes'] / 1e6:.1f} MB), "
+        f"load {storage['load_seconds']:.2f} s"
+    )
+    return result
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark offline de add/search/dump/load de MemOS.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamaños separados por comas (p. ej. 1k,100k,1M)")
+    parser.add_argument("--backend", choices=["qdrant", "numpy"], default="qdrant", help="Backend vectorial")
+    parser.add_argument("--qdrant-url", default=None, help="Servidor Qdrant (por defecto, Qdrant local en disco)")
+    parser.add_argument("--dim", type=int, default=768, help="Dimensión de los embeddings")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por tamaño")
+    parser.add_argument("--k", type=int, default=10, help="top_k de cada búsqueda")
+    parser.add_argument("--add-sample", type=int, default=2000, help="Memorias añadidas turno a turno")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos y del embedder")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="Fichero JSON de resultados")
+    parser.add_argument("--keep", action="store_true", help="No borrar la carpeta de trabajo al terminar")
+    return parser.parse_args()
+
+
+def main():
+    """Ejecuta el benchmark para cada tamaño y guarda los resultados en JSON."""
+    args = parse_args()
+    install_stub_backends()
+    install_qdrant_tuning()
+    install_numpy_vecdb()
+
+    workdir = tempfile.mkdtemp(prefix="memos_benchmark_")
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "memos": _package_version("MemoryOS"),
+            "qdrant_client": _package_version("qdrant-client"),
+            "numpy": np.__version__,
+            "backend": args.backend,
+            "qdrant_url": args.qdrant_url,
+            "dim": args.dim,
+            "k": args.k,
+            "queries": args.queries,
+            "add_sample": args.add_sample,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    try:
+        for size in (parse_size(value) for value in args.sizes.split(",")):
+            report["results"].append(run_size(size, args, workdir))
+    finally:
+        if args.keep:
+            print(f"📁 Carpeta de trabajo conservada en {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📝 Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
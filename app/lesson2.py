@@ -1,7 +1,8 @@
 import os
 import uuid
 from dotenv import load_dotenv
-from memos import MOS, MOSConfig
+from memos import MOSConfig
+from memos_ext import ExtendedMOS
 
 # --- Setup ---
 # Carga la clave de API de Deepseek desde el archivo .env
@@ -61,7 +62,7 @@ def chat_session():
     mos_config = MOSConfig(**config_dict)
 
     print("2. Inicializando el Sistema Operativo de Memoria (MOS)...")
-    mos = MOS(mos_config)
+    mos = ExtendedMOS(mos_config)
 
     # --- Gestión de Usuario y Memoria ---
     print(f"3. Cargando o creando al usuario: {USER_ID}")
@@ -84,9 +85,11 @@ def chat_session():
                 print("Agent: ¡Hasta luego! Ha sido un placer conversar contigo.")
                 break
 
-            response = mos.chat(user_input, user_id=USER_ID, session_id=session_id)
-            
-            print(f"Agent: {response}")
+            # La respuesta se imprime token a token; la memoria se guarda al terminar.
+            print("Agent: ", end="", flush=True)
+            for token in mos.chat_stream(user_input, user_id=USER_ID):
+                print(token, end="", flush=True)
+            print()
 
         except (KeyboardInterrupt, EOFError):
             print("\nAgent: Sesión terminada. ¡Adiós!")
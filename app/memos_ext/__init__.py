@@ -0,0 +1,79 @@
+# --- memos_ext: extensiones de rendimiento sobre MemOS ---
+# Utilidades que se apoyan en los objetos públicos de MemOS (MOS, MemCube,
+# text_mem, vector_db, embedder) para mejorar el coste de los flujos que usan
+# los scripts de esta carpeta (Trial01, Trial02, lesson2).
+from memos_ext.async_mos import AsyncMOS
+from memos_ext.bulk import bulk_add
+from memos_ext.dedup import DEFAULT_THRESHOLD, add_with_dedup, install_dedup, write_with_dedup
+from memos_ext.embedding_cache import CachedEmbedder, install_embedding_cache
+from memos_ext.kv_store import SafeKVCacheMemory, install_safe_kv_cache, migrate_kv_pickle
+from memos_ext.lazy_cube import LazyMemCube
+from memos_ext.lifecycle import LOW_VALUE_PATTERNS, MemoryArchive, MemoryLifecycleManager
+from memos_ext.logs import LazyFormat, install_queue_logging, stop_queue_logging
+from memos_ext.mos import ExtendedMOS
+from memos_ext.numpy_vecdb import NumpyVecDB, NumpyVecDBConfig, install_numpy_vecdb
+from memos_ext.qdrant_tuning import TunedQdrantVecDB, TunedQdrantVecDBConfig, install_qdrant_tuning
+from memos_ext.shared_qdrant import SharedQdrantVecDB, install_shared_qdrant
+from memos_ext.snapshots import CubeSnapshotter, compact_snapshot
+from memos_ext.storage import (
+    dump_mem_cube,
+    dump_text_memory,
+    load_mem_cube,
+    load_text_memory,
+    read_binary_memories,
+)
+from memos_ext.telemetry import (
+    HistogramRegistry,
+    OpenTelemetryHook,
+    SpanHook,
+    add_span_hook,
+    install_telemetry,
+    remove_span_hook,
+    span,
+)
+from memos_ext.write_behind import WriteBehindQueue
+
+__all__ = [
+    "AsyncMOS",
+    "CachedEmbedder",
+    "CubeSnapshotter",
+    "DEFAULT_THRESHOLD",
+    "ExtendedMOS",
+    "HistogramRegistry",
+    "LazyFormat",
+    "LOW_VALUE_PATTERNS",
+    "LazyMemCube",
+    "MemoryArchive",
+    "MemoryLifecycleManager",
+    "NumpyVecDB",
+    "NumpyVecDBConfig",
+    "OpenTelemetryHook",
+    "SafeKVCacheMemory",
+    "SharedQdrantVecDB",
+    "SpanHook",
+    "TunedQdrantVecDB",
+    "TunedQdrantVecDBConfig",
+    "WriteBehindQueue",
+    "add_span_hook",
+    "add_with_dedup",
+    "bulk_add",
+    "compact_snapshot",
+    "dump_mem_cube",
+    "dump_text_memory",
+    "install_dedup",
+    "install_embedding_cache",
+    "install_numpy_vecdb",
+    "install_queue_logging",
+    "install_qdrant_tuning",
+    "install_safe_kv_cache",
+    "install_shared_qdrant",
+    "install_telemetry",
+    "load_mem_cube",
+    "load_text_memory",
+    "migrate_kv_pickle",
+    "read_binary_memories",
+    "remove_span_hook",
+    "span",
+    "stop_queue_logging",
+    "write_with_dedup",
+]
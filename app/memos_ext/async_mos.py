@@ -0,0 +1,439 @@
+# --- AsyncMOS: fachada asyncio sobre ExtendedMOS ---
+# Cuando el bucle de Trial02 se sirve detrás de un servidor web, `mos.search`,
+# `mos.add` y `mos.chat` bloquean el hilo mientras esperan al embedder de Ollama,
+# a la API de Deepseek y a Qdrant: cada usuario concurrente ocupa un hilo.
+#
+# `AsyncMOS` reutiliza el estado de un `ExtendedMOS` (usuarios, cubos, historial)
+# pero hace las llamadas HTTP con un único `httpx.AsyncClient` compartido (pool de
+# conexiones keep-alive) hacia el embedder y el LLM de chat. Solo las operaciones
+# cortas sobre Qdrant pasan por `asyncio.to_thread`, y las escrituras de cada
+# usuario se serializan con un `asyncio.Lock` propio.
+import asyncio
+import json
+import time
+
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+
+from memos.embedders.ollama import OllamaEmbedder
+from memos.llms.utils import remove_thinking_tags
+from memos.log import get_logger
+from memos.memories.textual.item import TextualMemoryItem
+from memos.types import MessageList, MOSSearchResult
+
+from memos_ext.embedding_cache import CachedEmbedder
+from memos_ext.logs import log_search_summary
+from memos_ext.mos import (
+    OPENAI_COMPATIBLE_BACKENDS,
+    ExtendedMOS,
+    ThinkTagFilter,
+    embedder_key,
+    merge_top_k,
+)
+from memos_ext.telemetry import record, span
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_TIMEOUT = 60.0
+
+
+class AsyncOllamaEmbedder:
+    """Cliente asíncrono para `POST /api/embed` de Ollama."""
+
+    def __init__(self, config, http: httpx.AsyncClient):
+        self.config = config
+        self.http = http
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        response = await self.http.post(
+            f"{self.config.api_base.rstrip('/')}/api/embed",
+            json={"model": self.config.model_name_or_path, "input": texts},
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+
+class AsyncOpenAIChat:
+    """Cliente asíncrono para `POST /chat/completions` (OpenAI, Deepseek, Qwen)."""
+
+    def __init__(self, config, http: httpx.AsyncClient):
+        self.config = config
+        self.http = http
+
+    def _request(self, messages: MessageList, stream: bool = False) -> dict:
+        body = {
+            "model": self.config.model_name_or_path,
+            "messages": messages,
+            "temperature": self.config.temperature,
+            "max_tokens": self.config.max_tokens,
+            "top_p": self.config.top_p,
+            "stream": stream,
+        }
+        if getattr(self.config, "extra_body", None):
+            body.update(self.config.extra_body)
+        return {
+            "url": f"{self.config.api_base.rstrip('/')}/chat/completions",
+            "headers": {"Authorization": f"Bearer {self.config.api_key}"},
+            "json": body,
+        }
+
+    async def generate(self, messages: MessageList) -> str:
+        response = await self.http.post(**self._request(messages))
+        response.raise_for_status()
+        content = response.json()["choices"][0]["message"]["content"]
+        if self.config.remove_think_prefix:
+            return remove_thinking_tags(content)
+        return content
+
+    async def generate_stream(self, messages: MessageList) -> AsyncIterator[str]:
+        """
+        Respuesta en streaming (eventos SSE de `/chat/completions` con `stream: true`).
+
+        Trata el razonamiento como `memos_ext.mos.stream_chat_completion`: con
+        `remove_think_prefix` no se devuelve ni el `reasoning_content` ni el bloque
+        `<think>` inicial; sin él, el `reasoning_content` va entre etiquetas `<think>`.
+        """
+        if not self.config.remove_think_prefix:
+            async for chunk in self._stream(messages):
+                yield chunk
+            return
+        think_filter = ThinkTagFilter()
+        async for chunk in self._stream(messages):
+            text = think_filter.feed(chunk)
+            if text:
+                yield text
+        text = think_filter.finish()
+        if text:
+            yield text
+
+    async def _stream(self, messages: MessageList) -> AsyncIterator[str]:
+        keep_reasoning = not self.config.remove_think_prefix
+        reasoning = False
+        async with self.http.stream("POST", **self._request(messages, stream=True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta") or {}
+                if delta.get("reasoning_content"):
+                    if keep_reasoning:
+                        if not reasoning:
+                            yield ThinkTagFilter.OPEN
+                        yield delta["reasoning_content"]
+                    reasoning = True
+                elif delta.get("content"):
+                    if reasoning and keep_reasoning:
+                        yield ThinkTagFilter.CLOSE
+                    reasoning = False
+                    yield delta["content"]
+        if reasoning and keep_reasoning:
+            yield ThinkTagFilter.CLOSE
+
+    async def warm_up(self) -> None:
+        """Abre una conexión keep-alive con la API (`GET /models`); los fallos se ignoran."""
+        try:
+            await self.http.get(
+                f"{self.config.api_base.rstrip('/')}/models",
+                headers={"Authorization": f"Bearer {self.config.api_key}"},
+            )
+        except httpx.HTTPError as e:
+            logger.debug(f"Chat connection warm-up failed: {e}")
+
+
+class AsyncMOS:
+    """
+    Versión `async` de search/add/chat/dump que comparte estado con un `ExtendedMOS`.
+
+    Ejemplo:
+        ```python
+        amos = AsyncMOS(ExtendedMOS(mos_config))
+        result = await amos.search("¿Qué le gusta al usuario?", user_id="chat_user_01")
+        await amos.aclose()
+        ```
+    """
+
+    def __init__(
+        self,
+        mos: ExtendedMOS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        Args:
+            mos (ExtendedMOS): MOS ya configurado, con usuarios y cubos registrados.
+            max_connections (int): Tamaño del pool de conexiones HTTP compartido.
+            timeout (float): Timeout (segundos) de cada petición HTTP.
+        """
+        self.mos = mos
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            timeout=timeout,
+        )
+        self._user_locks: dict[str, asyncio.Lock] = {}
+        self._background: set[asyncio.Task] = set()
+
+        chat_model = mos.config.chat_model
+        self._chat = (
+            AsyncOpenAIChat(chat_model.config, self.http)
+            if chat_model.backend in OPENAI_COMPATIBLE_BACKENDS
+            else None
+        )
+
+    def _user_lock(self, user_id: str) -> asyncio.Lock:
+        return self._user_locks.setdefault(user_id, asyncio.Lock())
+
+    def _target_user(self, user_id: str | None) -> str:
+        return user_id if user_id is not None else self.mos.user_id
+
+    async def _embed(self, mem_cube_id: str, texts: list[str]) -> list[list[float]]:
+        """Embeddings con el embedder del cubo: HTTP asíncrono para Ollama, hilo para el resto."""
+        embedder = self.mos.mem_cubes[mem_cube_id].text_mem.embedder
+        inner = embedder.embedder if isinstance(embedder, CachedEmbedder) else embedder
+
+        if isinstance(inner, OllamaEmbedder):
+            client = AsyncOllamaEmbedder(inner.config, self.http)
+
+            async def fetch(batch: list[str]) -> list[list[float]]:
+                with span("embed", cube_id=mem_cube_id):
+                    return await client.embed(batch)
+        else:
+            # Modelos locales (sentence-transformers) u otros backends: en un hilo.
+            async def fetch(batch: list[str]) -> list[list[float]]:
+                return await asyncio.to_thread(inner.embed, batch)
+
+        if isinstance(embedder, CachedEmbedder):
+            return await embedder.aembed(texts, fetch)
+        return await fetch(texts)
+
+    async def search(
+        self,
+        query: str,
+        user_id: str | None = None,
+        install_cube_ids: list[str] | None = None,
+        top_k: int | None = None,
+        timeout: float | None = None,
+        filter: dict[str, Any] | None = None,
+    ) -> MOSSearchResult:
+        """Equivalente asíncrono de `ExtendedMOS.search` (cubos en paralelo, top-k global y filtro)."""
+        target_user_id = self._target_user(user_id)
+        with span("search", user_id=target_user_id):
+            return await self._search(query, target_user_id, install_cube_ids, top_k, timeout, filter)
+
+    async def _search(
+        self,
+        query: str,
+        target_user_id: str,
+        install_cube_ids: list[str] | None,
+        top_k: int | None,
+        timeout: float | None,
+        filter: dict[str, Any] | None,
+    ) -> MOSSearchResult:
+        started = time.perf_counter()
+        await asyncio.to_thread(self.mos._validate_user_exists, target_user_id)
+        cube_ids = await asyncio.to_thread(
+            self.mos._searchable_cube_ids, target_user_id, install_cube_ids
+        )
+        top_k = top_k if top_k else self.mos.config.top_k
+
+        result: MOSSearchResult = {"text_mem": [], "act_mem": [], "para_mem": []}
+        if not cube_ids:
+            return result
+
+        # Un embedding de la consulta por embedder distinto, compartido entre cubos.
+        query_vectors: dict[str, asyncio.Task] = {}
+        tasks: dict[asyncio.Task, str] = {}
+        for cube_id in cube_ids:
+            key = embedder_key(self.mos.mem_cubes[cube_id].text_mem)
+            if key is None:
+                coroutine = asyncio.to_thread(
+                    self.mos._search_cube_by_text, cube_id, query, top_k, filter
+                )
+            else:
+                if key not in query_vectors:
+                    query_vectors[key] = asyncio.ensure_future(self._embed(cube_id, [query]))
+                coroutine = self._search_cube(cube_id, query_vectors[key], top_k, filter)
+            tasks[asyncio.ensure_future(coroutine)] = cube_id
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(
+                f"Search timed out after {timeout}s on cubes "
+                f"{sorted(tasks[task] for task in pending)}; returning partial results"
+            )
+        hits_by_cube = {}
+        for task in done:
+            if task.exception() is not None:
+                logger.error(f"Search failed on cube {tasks[task]}: {task.exception()}")
+            else:
+                hits_by_cube[tasks[task]] = task.result()
+        hits_by_cube = {c: hits_by_cube[c] for c in cube_ids if c in hits_by_cube}
+        with span("search.merge"):
+            result["text_mem"] = merge_top_k(hits_by_cube, top_k)
+        # El embedding y las búsquedas se solapan: solo se registra el tiempo total.
+        log_search_summary(
+            logger,
+            target_user_id,
+            hits_by_cube,
+            len(cube_ids),
+            top_k,
+            {"total": time.perf_counter() - started},
+            kept=result["text_mem"],
+        )
+        return result
+
+    async def _search_cube(
+        self, cube_id: str, query_vector: asyncio.Task, top_k: int, filter: dict[str, Any] | None
+    ):
+        (vector,) = await query_vector
+        return await asyncio.to_thread(self.mos._search_cube_scored, cube_id, vector, top_k, filter)
+
+    async def add(
+        self,
+        messages: MessageList,
+        user_id: str | None = None,
+        mem_cube_id: str | None = None,
+        session_id: str | None = None,
+    ) -> None:
+        """
+        Equivalente asíncrono de `MOS.add(messages=...)`.
+
+        Las memorias se guardan como del usuario indicado y de `session_id` o, por
+        defecto, de la sesión de su historial de chat.
+        """
+        target_user_id = self._target_user(user_id)
+        with span("add", user_id=target_user_id):
+            await self._add(messages, target_user_id, user_id, mem_cube_id, session_id)
+
+    async def _add(
+        self,
+        messages: MessageList,
+        target_user_id: str,
+        user_id: str | None,
+        mem_cube_id: str | None,
+        session_id: str | None,
+    ) -> None:
+        async with self._user_lock(target_user_id):
+            mem_cube_id = await asyncio.to_thread(
+                self.mos._resolve_cube_id, user_id, mem_cube_id
+            )
+            mem_cube = self.mos.mem_cubes[mem_cube_id]
+            if not (self.mos.config.enable_textual_memory and mem_cube.text_mem):
+                return
+            if mem_cube.config.text_mem.backend == "tree_text":
+                # tree_text usa el lector de memoria (LLM local): se delega en `add`.
+                await asyncio.to_thread(
+                    self.mos.add, messages=messages, mem_cube_id=mem_cube_id, user_id=user_id
+                )
+                return
+
+            items = self.mos._conversation_items(messages, target_user_id, session_id)
+            embeddings = await self._embed(mem_cube_id, [item.memory for item in items])
+            await asyncio.to_thread(self.mos._write_items, mem_cube_id, items, embeddings)
+
+    async def chat(
+        self, query: str, user_id: str | None = None, base_prompt: str | None = None
+    ) -> str:
+        """
+        Equivalente asíncrono de `MOS.chat` (sin memoria de activación ni planificador).
+
+        Recupera memorias, construye el prompt de sistema como `MOSCore` y llama al LLM
+        de chat por HTTP asíncrono si es compatible con OpenAI; si no, en un hilo.
+        """
+        target_user_id = self._target_user(user_id)
+        with span("chat", user_id=target_user_id):
+            return await self._chat_turn(query, target_user_id, base_prompt)
+
+    async def _chat_turn(self, query: str, target_user_id: str, base_prompt: str | None) -> str:
+        search_result = await self.search(query, user_id=target_user_id)
+        memories: list[TextualMemoryItem] = [
+            memory for entry in search_result["text_mem"] for memory in entry["memories"]
+        ]
+        current_messages = self.mos._chat_messages(query, target_user_id, memories, base_prompt)
+
+        if self._chat is not None:
+            with span("llm.chat"):
+                response = await self._chat.generate(current_messages)
+        else:
+            response = await asyncio.to_thread(self.mos.chat_llm.generate, current_messages)
+
+        await self._append_history(target_user_id, query, response)
+        return response
+
+    async def chat_stream(
+        self,
+        query: str,
+        user_id: str | None = None,
+        base_prompt: str | None = None,
+        persist: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Equivalente asíncrono de `ExtendedMOS.chat_stream`.
+
+        La conexión con el LLM de chat se abre mientras se buscan las memorias; los
+        tokens se devuelven según llegan y, al terminar el stream, el turno se añade al
+        historial y (con `persist`) a la memoria. Si el consumidor lo abandona antes
+        del final, no se guarda nada.
+        """
+        started = time.perf_counter()
+        target_user_id = self._target_user(user_id)
+        if self._chat is not None:
+            # No se espera al warm-up (ver `ExtendedMOS.chat_stream`).
+            warm_up = asyncio.ensure_future(self._chat.warm_up())
+            self._background.add(warm_up)
+            warm_up.add_done_callback(self._background.discard)
+
+        memories: list[TextualMemoryItem] = []
+        if self.mos.config.enable_textual_memory and self.mos.mem_cubes:
+            search_result = await self.search(query, user_id=target_user_id)
+            memories = [memory for entry in search_result["text_mem"] for memory in entry["memories"]]
+        current_messages = self.mos._chat_messages(query, target_user_id, memories, base_prompt)
+
+        parts: list[str] = []
+        if self._chat is not None:
+            async for token in self._chat.generate_stream(current_messages):
+                if not parts:
+                    record("chat.first_token", time.perf_counter() - started, user_id=target_user_id)
+                parts.append(token)
+                yield token
+        else:
+            parts.append(await asyncio.to_thread(self.mos.chat_llm.generate, current_messages))
+            yield parts[0]
+        record("chat", time.perf_counter() - started, user_id=target_user_id)
+
+        response = "".join(parts)
+        await self._append_history(target_user_id, query, response)
+        if persist and self.mos.config.enable_textual_memory and self.mos.mem_cubes:
+            await self.add(
+                messages=[{"role": "user", "content": query}, {"role": "assistant", "content": response}],
+                user_id=target_user_id,
+            )
+
+    async def _append_history(self, target_user_id: str, query: str, response: str) -> None:
+        async with self._user_lock(target_user_id):
+            chat_history = self.mos.chat_history_manager[target_user_id]
+            chat_history.chat_history.append({"role": "user", "content": query})
+            chat_history.chat_history.append({"role": "assistant", "content": response})
+
+    async def dump(
+        self, dump_dir: str, user_id: str | None = None, mem_cube_id: str | None = None
+    ) -> None:
+        """Equivalente asíncrono de `MOS.dump`, serializado con las escrituras del usuario."""
+        async with self._user_lock(self._target_user(user_id)):
+            await asyncio.to_thread(
+                self.mos.dump, dump_dir, user_id=user_id, mem_cube_id=mem_cube_id
+            )
+
+    async def aclose(self) -> None:
+        """Cierra el pool de conexiones HTTP."""
+        await self.http.aclose()
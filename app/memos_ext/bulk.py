@@ -0,0 +1,107 @@
+# --- Ingesta masiva: embeddings por lotes y escrituras agrupadas ---
+# `mos.add(messages=[...])` vectoriza y escribe cada conversación por separado.
+# Al importar miles de conversaciones históricas eso se traduce en miles de
+# llamadas HTTP de un solo texto a `/api/embed` y miles de escrituras de un punto
+# en Qdrant, y el coste lo domina la sobrecarga por petición.
+#
+# `bulk_add` agrupa los textos en lotes para el embedder (Ollama y
+# sentence-transformers aceptan listas), calcula varios lotes en paralelo y
+# escribe los puntos en Qdrant en bloques grandes.
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from memos.log import get_logger
+from memos.memories.textual.item import TextualMemoryItem
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.dedup import write_with_dedup
+
+logger = get_logger(__name__)
+
+DEFAULT_EMBED_BATCH_SIZE = 64
+DEFAULT_UPSERT_BATCH_SIZE = 256
+DEFAULT_EMBED_WORKERS = 4
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def bulk_add(
+    text_mem,
+    items: list[TextualMemoryItem],
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    upsert_batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+    embed_workers: int = DEFAULT_EMBED_WORKERS,
+    upsert_workers: int = 1,
+    lock=None,
+) -> int:
+    """
+    Vectoriza y escribe muchas memorias con el mínimo de peticiones.
+
+    Si el cubo tiene la deduplicación activada (`install_dedup`), cada lote pasa por
+    `write_with_dedup` reutilizando los embeddings ya calculados.
+
+    Args:
+        text_mem: La memoria textual del cubo (`mem_cube.text_mem`).
+        items (list): Memorias a añadir.
+        embed_batch_size (int): Textos por cada llamada al embedder.
+        upsert_batch_size (int): Puntos por cada escritura en la base vectorial.
+        embed_workers (int): Lotes de embeddings calculados en paralelo.
+        upsert_workers (int): Escrituras en paralelo. Con Qdrant en modo local
+            (`path`, sin servidor) conviene dejarlo en 1: el cliente local no admite
+            escrituras concurrentes.
+        lock: Candado que se toma solo alrededor de cada escritura en la base
+            vectorial (el del cubo en `ExtendedMOS`); los embeddings se calculan sin él.
+
+    Returns:
+        int: Número de memorias procesadas.
+    """
+    if not items:
+        return 0
+
+    dedup_threshold = getattr(text_mem, "_dedup_threshold", None)
+    batches = _chunks(items, embed_batch_size)
+    lock = lock if lock is not None else nullcontext()
+
+    def upsert(points: list[VecDBItem]) -> None:
+        with lock:
+            text_mem.vector_db.add(points)
+
+    with (
+        ThreadPoolExecutor(max_workers=embed_workers) as embed_pool,
+        ThreadPoolExecutor(max_workers=upsert_workers) as upsert_pool,
+    ):
+        # `map` conserva el orden: cada lote de embeddings corresponde a su lote de memorias.
+        embedded = embed_pool.map(
+            lambda batch: text_mem.embedder.embed([item.memory for item in batch]), batches
+        )
+
+        pending_writes = []
+        buffer: list[VecDBItem] = []
+        for batch, embeddings in zip(batches, embedded, strict=True):
+            if dedup_threshold is not None:
+                # La deduplicación consulta la colección: se hace en orden, lote a lote.
+                with lock:
+                    write_with_dedup(text_mem, batch, embeddings, threshold=dedup_threshold)
+                continue
+
+            buffer.extend(
+                VecDBItem(id=item.id, vector=vector, payload=item.model_dump())
+                for item, vector in zip(batch, embeddings, strict=True)
+            )
+            while len(buffer) >= upsert_batch_size:
+                chunk, buffer = buffer[:upsert_batch_size], buffer[upsert_batch_size:]
+                pending_writes.append(upsert_pool.submit(upsert, chunk))
+
+        if buffer:
+            pending_writes.append(upsert_pool.submit(upsert, buffer))
+        for future in pending_writes:
+            # Propaga cualquier error de escritura.
+            future.result()
+
+    logger.info(
+        f"Bulk add: {len(items)} memories in {len(batches)} embed batches "
+        f"(batch={embed_batch_size}, upsert={upsert_batch_size})"
+    )
+    return len(items)
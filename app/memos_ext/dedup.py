@@ -0,0 +1,166 @@
+# --- Deduplicación de memorias en el camino de `mos.add` ---
+# MemOS guarda cada mensaje de la conversación como una memoria nueva, aunque
+# ya exista otra con el mismo contenido. Tras varias ejecuciones de Trial01 el
+# cubo acaba con cinco copias de "Me encanta jugar al fútbol." y cada búsqueda
+# devuelve la misma idea repetida.
+#
+# Este módulo intercepta `text_mem.add` de un cubo: calcula el embedding de cada
+# memoria nueva (una sola llamada al embedder, igual que hace MemOS), busca en la
+# base vectorial el vecino más cercano y, si la similitud coseno supera el umbral,
+# actualiza la memoria existente en lugar de insertar un punto nuevo. Se queda el
+# texto más reciente: "Mi coche es azul" sustituye a "Mi coche es rojo" aunque los
+# dos textos estén por encima del umbral.
+import math
+from datetime import datetime
+from typing import Any
+
+from memos.log import get_logger
+from memos.memories.textual.item import TextualMemoryItem
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.telemetry import traced
+
+logger = get_logger(__name__)
+
+# Umbral por defecto: por encima de este valor de similitud coseno dos memorias
+# se consideran el mismo hecho. Un texto idéntico da ~1.0 con nomic-embed-text.
+DEFAULT_THRESHOLD = 0.95
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    """Similitud coseno entre dos vectores (sin dependencias externas)."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def _refresh_payload(payload: dict[str, Any], item: TextualMemoryItem) -> dict[str, Any]:
+    """
+    Devuelve una copia del payload existente con el texto y los metadatos de la nueva aparición.
+
+    Se conserva el id original; el texto pasa a ser el más reciente, se actualizan
+    `updated_at` y `session_id`, y se lleva la cuenta de cuántas veces se ha visto el hecho.
+    """
+    refreshed = dict(payload)
+    refreshed["memory"] = item.memory
+    metadata = dict(refreshed.get("metadata") or {})
+    metadata["updated_at"] = item.metadata.updated_at or datetime.now().isoformat()
+    if item.metadata.session_id:
+        metadata["session_id"] = item.metadata.session_id
+    metadata["seen_count"] = int(metadata.get("seen_count") or 1) + 1
+    refreshed["metadata"] = metadata
+    return refreshed
+
+
+def add_with_dedup(
+    text_mem,
+    memories: list[TextualMemoryItem | dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> dict[str, int]:
+    """
+    Añade memorias a un `GeneralTextMemory` fusionando los casi-duplicados.
+
+    Args:
+        text_mem: La memoria textual del cubo (`mem_cube.text_mem`).
+        memories (list): Memorias a añadir, como `TextualMemoryItem` o diccionarios.
+        threshold (float): Similitud coseno mínima para considerar un duplicado.
+
+    Returns:
+        dict: Contadores `{"inserted": n, "merged": m}` de la operación.
+    """
+    items = [TextualMemoryItem(**m) if isinstance(m, dict) else m for m in memories]
+    if not items:
+        return {"inserted": 0, "merged": 0}
+
+    # Un único viaje al embedder para todo el lote; estos vectores se reutilizan
+    # tanto para buscar duplicados como para insertar los puntos nuevos.
+    embeddings = text_mem.embedder.embed([item.memory for item in items])
+    return write_with_dedup(text_mem, items, embeddings, threshold=threshold)
+
+
+def write_with_dedup(
+    text_mem,
+    items: list[TextualMemoryItem],
+    embeddings: list[list[float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> dict[str, int]:
+    """
+    Escribe memorias cuyos embeddings ya están calculados, fusionando los casi-duplicados.
+
+    Args:
+        text_mem: La memoria textual del cubo (`mem_cube.text_mem`).
+        items (list): Las memorias a escribir.
+        embeddings (list): Un vector por memoria, en el mismo orden.
+        threshold (float): Similitud coseno mínima para considerar un duplicado.
+
+    Returns:
+        dict: Contadores `{"inserted": n, "merged": m}` de la operación.
+    """
+    new_points: list[VecDBItem] = []
+    merged = 0
+    for item, vector in zip(items, embeddings, strict=True):
+        # 1. Duplicados dentro del propio lote (p. ej. el usuario repite la frase).
+        position = next(
+            (i for i, point in enumerate(new_points) if _cosine(vector, point.vector) >= threshold),
+            None,
+        )
+        if position is not None:
+            earlier = new_points[position]
+            new_points[position] = VecDBItem(
+                id=earlier.id, vector=vector, payload=_refresh_payload(earlier.payload, item)
+            )
+            merged += 1
+            continue
+
+        # 2. Duplicados ya almacenados: basta con el vecino más cercano.
+        hits = text_mem.vector_db.search(vector, 1)
+        if hits and hits[0].score is not None and hits[0].score >= threshold:
+            existing = hits[0]
+            payload = _refresh_payload(existing.payload, item)
+            if (existing.payload or {}).get("memory") == item.memory:
+                # Mismo texto: actualización solo de payload (Qdrant no reescribe el vector).
+                update = VecDBItem(id=existing.id, payload=payload)
+            else:
+                # Texto nuevo: el vector tiene que corresponder al texto guardado.
+                update = VecDBItem(id=existing.id, vector=vector, payload=payload)
+            text_mem.vector_db.update(existing.id, update)
+            merged += 1
+            continue
+
+        new_points.append(VecDBItem(id=item.id, vector=vector, payload=item.model_dump()))
+
+    if new_points:
+        text_mem.vector_db.add(new_points)
+
+    logger.info(f"Dedup add: {len(new_points)} inserted, {merged} merged (threshold={threshold})")
+    return {"inserted": len(new_points), "merged": merged}
+
+
+def install_dedup(mem_cube, threshold: float = DEFAULT_THRESHOLD) -> None:
+    """
+    Sustituye `text_mem.add` de un cubo por la versión con deduplicación.
+
+    A partir de aquí, cualquier `mos.add(...)` dirigido a este cubo pasa por
+    `add_with_dedup`. Llamarla varias veces sobre el mismo cubo no tiene efecto. Si
+    `add` ya estaba instrumentado (`install_telemetry`), la versión nueva se mide con
+    la misma etapa y etiquetas.
+
+    Args:
+        mem_cube: Un `GeneralMemCube` ya registrado en el MOS.
+        threshold (float): Similitud coseno mínima para fusionar memorias.
+    """
+    text_mem = mem_cube.text_mem
+    if text_mem is None or getattr(text_mem, "_dedup_threshold", None) is not None:
+        return
+
+    def add(memories):
+        add_with_dedup(text_mem, memories, threshold=threshold)
+
+    previous = text_mem.add
+    if getattr(previous, "__traced__", False):
+        add = traced(previous.__trace_name__, **previous.__trace_tags__)(add)
+    text_mem.add = add
+    text_mem._dedup_threshold = threshold
@@ -0,0 +1,188 @@
+# --- Caché de embeddings delante del embedder del cubo ---
+# En cada turno de Trial02 el texto del usuario se envía dos veces a
+# `POST /api/embed` de Ollama: una para `mos.search` y otra para `mos.add`.
+# Además, respuestas fijas del asistente como "Entendido. He tomado nota de eso."
+# se vuelven a vectorizar en cada turno.
+#
+# `CachedEmbedder` envuelve cualquier embedder de MemOS (tiene `embed(texts)`) con:
+#   - Un nivel en memoria con tamaño máximo y expulsión LRU.
+#   - Un nivel opcional en disco (SQLite) que sobrevive entre ejecuciones.
+# La clave es un hash del modelo + texto, así que cambiar de modelo invalida la caché.
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from memos.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class CachedEmbedder:
+    """
+    Embedder con caché LRU (y opcionalmente en disco) delante de otro embedder.
+
+    Expone la misma interfaz que los embedders de MemOS (`config`, `embed`), por lo
+    que puede sustituir a `mem_cube.text_mem.embedder` sin más cambios.
+    """
+
+    def __init__(self, embedder, max_entries: int = DEFAULT_MAX_ENTRIES, disk_path: str | None = None):
+        """
+        Args:
+            embedder: El embedder real (p. ej. `OllamaEmbedder`).
+            max_entries (int): Número máximo de vectores en el nivel en memoria.
+            disk_path (str, optional): Ruta de un fichero SQLite para el nivel en disco.
+        """
+        self.embedder = embedder
+        self.config = embedder.config
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = getattr(embedder.config, "model_name_or_path", None) or ""
+
+        self._disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._disk.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self._model}\0{text}".encode()).hexdigest()
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        """Guarda un vector en el nivel en memoria, expulsando el menos usado si hace falta."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> list[float] | None:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return vector
+        if self._disk is not None:
+            row = self._disk.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                vector = array("f", row[0]).tolist()
+                self._remember(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+        return None
+
+    def _partition(self, texts: list[str]) -> tuple[list, dict[str, list[int]]]:
+        """Resuelve los aciertos y agrupa los fallos por clave (sin repetir textos)."""
+        results: list[list[float] | None] = [None] * len(texts)
+        pending: dict[str, list[int]] = {}
+        with self._lock:
+            for position, text in enumerate(texts):
+                key = self._key(text)
+                if key in pending:
+                    # Repetido dentro del mismo lote: se calcula una sola vez.
+                    pending[key].append(position)
+                    continue
+                vector = self._lookup(key)
+                if vector is None:
+                    pending[key] = [position]
+                else:
+                    results[position] = vector
+            self.misses += len(pending)
+        return results, pending
+
+    def _fill(self, results: list, pending: dict[str, list[int]], vectors: list) -> list[list[float]]:
+        """Guarda en la caché los vectores calculados y completa `results`."""
+        with self._lock:
+            for key, vector in zip(pending, vectors, strict=True):
+                vector = list(vector)
+                self._remember(key, vector)
+                for position in pending[key]:
+                    results[position] = vector
+            if self._disk is not None:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", results[pending[key][0]]).tobytes()) for key in pending],
+                )
+                self._disk.commit()
+        return results
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Devuelve los embeddings de `texts`, llamando al embedder real solo para los fallos.
+
+        Los textos que faltan (sin repetir) se envían en una única llamada por lote.
+        """
+        results, pending = self._partition(texts)
+        if not pending:
+            return results
+        vectors = self.embedder.embed([texts[positions[0]] for positions in pending.values()])
+        return self._fill(results, pending, vectors)
+
+    async def aembed(self, texts: list[str], fetch) -> list[list[float]]:
+        """
+        Variante asíncrona de `embed`: los fallos se piden con `await fetch(textos)`.
+
+        Permite compartir la misma caché entre el camino síncrono y `AsyncMOS`.
+        """
+        results, pending = self._partition(texts)
+        if not pending:
+            return results
+        vectors = await fetch([texts[positions[0]] for positions in pending.values()])
+        return self._fill(results, pending, vectors)
+
+    def stats(self) -> dict[str, int | float]:
+        """Contadores de aciertos y fallos de la caché."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        """Cierra el nivel en disco, si existe."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+def install_embedding_cache(
+    mem_cube,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    disk_path: str | None = None,
+) -> CachedEmbedder | None:
+    """
+    Coloca un `CachedEmbedder` delante del embedder de la memoria textual del cubo.
+
+    Llamarla de nuevo sobre el mismo cubo devuelve la caché ya instalada.
+
+    Args:
+        mem_cube: Un `GeneralMemCube` ya registrado en el MOS.
+        max_entries (int): Tamaño máximo del nivel en memoria.
+        disk_path (str, optional): Fichero SQLite para el nivel en disco.
+
+    Returns:
+        CachedEmbedder: La caché instalada (o None si el cubo no tiene memoria textual).
+    """
+    text_mem = mem_cube.text_mem
+    if text_mem is None:
+        return None
+    if isinstance(text_mem.embedder, CachedEmbedder):
+        return text_mem.embedder
+
+    text_mem.embedder = CachedEmbedder(text_mem.embedder, max_entries=max_entries, disk_path=disk_path)
+    logger.info(f"Embedding cache installed (max_entries={max_entries}, disk={disk_path})")
+    return text_mem.embedder
@@ -0,0 +1,113 @@
+# --- Filtros por metadatos para la búsqueda ---
+# Cada memoria guarda en su payload `metadata.user_id`, `session_id`, `status`,
+# `source` y `updated_at`, pero `mos.search` solo ordenaba por similitud: para
+# quedarse con una sesión o con lo reciente había que pedir más resultados y
+# filtrar en Python.
+#
+# Un filtro es un diccionario; las claves de metadatos pueden escribirse sin el
+# prefijo `metadata.`:
+#   {"session_id": "abc"}                       igualdad
+#   {"source": ["conversation", "file"]}        cualquiera de la lista
+#   {"updated_at": {"gte": "2025-07-01T00:00"}} rango (gt, gte, lt, lte)
+# `to_qdrant_filter` lo traduce a un `Filter` de Qdrant (se aplica dentro de la
+# búsqueda) y `matches` lo evalúa sobre un payload (backend NumPy).
+from datetime import datetime
+from typing import Any
+
+# Campos de metadatos con índice de payload (y su tipo en Qdrant).
+METADATA_INDEXES = {
+    "metadata.user_id": "keyword",
+    "metadata.session_id": "keyword",
+    "metadata.status": "keyword",
+    "metadata.source": "keyword",
+    "metadata.updated_at": "datetime",
+}
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+# Campos de primer nivel del payload de `TextualMemoryItem`.
+_TOP_LEVEL_FIELDS = ("id", "memory", "metadata")
+
+
+def normalize_filter(filter: dict[str, Any] | None) -> dict[str, Any]:
+    """Añade el prefijo `metadata.` a las claves que no son campos de primer nivel."""
+    if not filter:
+        return {}
+    return {
+        key if key.split(".")[0] in _TOP_LEVEL_FIELDS else f"metadata.{key}": value
+        for key, value in filter.items()
+    }
+
+
+def _is_range(value: Any) -> bool:
+    return isinstance(value, dict) and value and set(value) <= set(RANGE_OPERATORS)
+
+
+def to_qdrant_filter(filter: dict[str, Any] | None):
+    """Traduce un filtro a `qdrant_client.http.models.Filter` (None si está vacío)."""
+    from qdrant_client.http import models
+
+    conditions = []
+    for key, value in normalize_filter(filter).items():
+        if _is_range(value):
+            bounds = {op: value.get(op) for op in RANGE_OPERATORS}
+            if any(isinstance(bound, str | datetime) for bound in bounds.values()):
+                condition = models.FieldCondition(key=key, range=models.DatetimeRange(**bounds))
+            else:
+                condition = models.FieldCondition(key=key, range=models.Range(**bounds))
+        elif isinstance(value, list | tuple | set):
+            condition = models.FieldCondition(key=key, match=models.MatchAny(any=list(value)))
+        else:
+            condition = models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        conditions.append(condition)
+    return models.Filter(must=conditions) if conditions else None
+
+
+def _payload_value(payload: dict, key: str) -> Any:
+    """Valor de `key` en el payload; admite claves anidadas como `metadata.user_id`."""
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _comparable(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _in_range(value: Any, bounds: dict[str, Any]) -> bool:
+    if value is None:
+        return False
+    value = _comparable(value)
+    try:
+        return all(
+            (op != "gt" or value > _comparable(bound))
+            and (op != "gte" or value >= _comparable(bound))
+            and (op != "lt" or value < _comparable(bound))
+            and (op != "lte" or value <= _comparable(bound))
+            for op, bound in bounds.items()
+        )
+    except TypeError:
+        return False
+
+
+def matches(payload: dict, filter: dict[str, Any] | None) -> bool:
+    """True si el payload cumple todas las condiciones del filtro."""
+    for key, expected in normalize_filter(filter).items():
+        value = _payload_value(payload, key)
+        if _is_range(expected):
+            if not _in_range(value, expected):
+                return False
+        elif isinstance(expected, list | tuple | set):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
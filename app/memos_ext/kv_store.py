@@ -0,0 +1,245 @@
+# --- Formato safetensors para la memoria de activación (KV-cache) ---
+# `KVCacheMemory` guarda todo en `activation_memory.pickle`: para cargarlo hay que
+# deserializar cada tensor a través del unpickler (lento con KV-caches grandes) y
+# cargar un pickle de un almacenamiento compartido permite ejecutar código arbitrario.
+#
+# Aquí la memoria se guarda en `activation_memory.safetensors`:
+#   - Un tensor por capa y por entrada: `"{id}/{capa}/k"` y `"{id}/{capa}/v"`.
+#     La cabecera de safetensors guarda el offset de cada uno.
+#   - Los metadatos de cada entrada (metadata, records, nº de capas) en JSON,
+#     dentro de los metadatos de la cabecera.
+# El fichero se abre con mmap y cada entrada se lee solo cuando se usa (o solo las
+# capas que se pidan). Los pickles antiguos se siguen pudiendo cargar y convertir.
+#
+# Uso desde la terminal para convertir un volcado (desde la carpeta `app/`):
+#   python -m memos_ext.kv_store migrate ../tmp/my_mem_cube
+import json
+import os
+import sys
+
+from collections.abc import Iterator, MutableMapping
+
+from memos.log import get_logger
+from memos.memories.activation.item import KVCacheItem, KVCacheRecords
+from memos.memories.activation.kv import KVCacheMemory
+from memos.memories.factory import MemoryFactory
+
+logger = get_logger(__name__)
+
+SAFETENSORS_SUFFIX = ".safetensors"
+HEADER_KEY = "memos_kv_cache"
+
+
+def safetensors_path(dir: str, memory_filename: str) -> str:
+    """`activation_memory.pickle` -> `activation_memory.safetensors` en el mismo directorio."""
+    return os.path.join(dir, os.path.splitext(memory_filename)[0] + SAFETENSORS_SUFFIX)
+
+
+def _tensor_name(item_id: str, layer: int, kind: str) -> str:
+    return f"{item_id}/{layer}/{kind}"
+
+
+def write_kv_file(path: str, items: list[KVCacheItem]) -> None:
+    """
+    Escribe las entradas de KV-cache en un fichero safetensors (de forma atómica).
+
+    Args:
+        path (str): Ruta del fichero `.safetensors`.
+        items (list[KVCacheItem]): Entradas a guardar.
+    """
+    from safetensors.torch import save_file
+
+    tensors = {}
+    index = {}
+    for item in items:
+        cache = item.memory
+        num_layers = len(cache.key_cache)
+        for layer in range(num_layers):
+            tensors[_tensor_name(item.id, layer, "k")] = cache.key_cache[layer].detach().cpu().contiguous()
+            tensors[_tensor_name(item.id, layer, "v")] = cache.value_cache[layer].detach().cpu().contiguous()
+        index[item.id] = {
+            "layers": num_layers,
+            "metadata": item.metadata,
+            "records": item.records.model_dump(mode="json"),
+        }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    save_file(tensors, tmp_path, metadata={HEADER_KEY: json.dumps(index, default=str)})
+    # Reemplazo atómico: quien tenga el fichero anterior mapeado sigue leyendo el suyo.
+    os.replace(tmp_path, path)
+
+
+class KVCacheFile:
+    """Lectura perezosa (mmap) de un fichero de KV-cache en formato safetensors."""
+
+    def __init__(self, path: str):
+        from safetensors import safe_open
+
+        self.path = path
+        self._file = safe_open(path, framework="pt", device="cpu")
+        self.index: dict[str, dict] = json.loads(self._file.metadata()[HEADER_KEY])
+
+    def item_ids(self) -> list[str]:
+        return list(self.index)
+
+    def num_layers(self, item_id: str) -> int:
+        return self.index[item_id]["layers"]
+
+    def load_layers(self, item_id: str, layers: list[int] | None = None) -> dict[int, tuple]:
+        """
+        Lee solo las capas indicadas de una entrada.
+
+        Returns:
+            dict[int, tuple]: `{capa: (key, value)}`.
+        """
+        if layers is None:
+            layers = range(self.num_layers(item_id))
+        return {
+            layer: (
+                self._file.get_tensor(_tensor_name(item_id, layer, "k")),
+                self._file.get_tensor(_tensor_name(item_id, layer, "v")),
+            )
+            for layer in layers
+        }
+
+    def load_item(self, item_id: str) -> KVCacheItem:
+        """Reconstruye una entrada completa como `KVCacheItem` con su `DynamicCache`."""
+        from transformers import DynamicCache
+
+        cache = DynamicCache()
+        for layer, (key, value) in sorted(self.load_layers(item_id).items()):
+            cache.update(key, value, layer)
+        entry = self.index[item_id]
+        return KVCacheItem(
+            id=item_id,
+            memory=cache,
+            metadata=entry["metadata"],
+            records=KVCacheRecords(**entry["records"]),
+        )
+
+
+class LazyKVCacheItems(MutableMapping):
+    """
+    Diccionario `{id: KVCacheItem}` que lee cada entrada del fichero al accederla.
+
+    Sustituye a `KVCacheMemory.kv_cache_memories`: los métodos de `KVCacheMemory`
+    (`get`, `add`, `delete`, `get_all`...) funcionan igual sobre él.
+    """
+
+    def __init__(self, source: KVCacheFile):
+        self.source = source
+        self._loaded: dict[str, KVCacheItem] = {}
+        self._on_disk: set[str] = set(source.item_ids())
+
+    def __getitem__(self, item_id: str) -> KVCacheItem:
+        if item_id not in self._loaded:
+            if item_id not in self._on_disk:
+                raise KeyError(item_id)
+            self._loaded[item_id] = self.source.load_item(item_id)
+            self._on_disk.discard(item_id)
+        return self._loaded[item_id]
+
+    def __setitem__(self, item_id: str, item: KVCacheItem) -> None:
+        self._on_disk.discard(item_id)
+        self._loaded[item_id] = item
+
+    def __delitem__(self, item_id: str) -> None:
+        if item_id in self._loaded:
+            del self._loaded[item_id]
+        elif item_id in self._on_disk:
+            self._on_disk.discard(item_id)
+        else:
+            raise KeyError(item_id)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._loaded)
+        yield from list(self._on_disk)
+
+    def __len__(self) -> int:
+        return len(self._loaded) + len(self._on_disk)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._loaded or item_id in self._on_disk
+
+    @property
+    def loaded_ids(self) -> list[str]:
+        """Entradas ya leídas del fichero (o añadidas en memoria)."""
+        return list(self._loaded)
+
+
+class SafeKVCacheMemory(KVCacheMemory):
+    """`KVCacheMemory` que guarda y carga en safetensors en lugar de pickle."""
+
+    def load(self, dir: str) -> None:
+        """
+        Abre `activation_memory.safetensors` con mmap; las entradas se leen al usarse.
+
+        Si solo existe el pickle antiguo, se carga como en `KVCacheMemory` (migración).
+        """
+        path = safetensors_path(dir, self.config.memory_filename)
+        if not os.path.exists(path):
+            if os.path.exists(os.path.join(dir, self.config.memory_filename)):
+                logger.warning(
+                    f"Loading legacy pickle KV cache from {dir}; "
+                    "run `python -m memos_ext.kv_store migrate` to convert it."
+                )
+            super().load(dir)
+            return
+        self.kv_cache_memories = LazyKVCacheItems(KVCacheFile(path))
+        logger.info(f"Opened KV cache {path} ({len(self.kv_cache_memories)} entries)")
+
+    def dump(self, dir: str) -> None:
+        """Guarda todas las entradas en `activation_memory.safetensors`."""
+        write_kv_file(safetensors_path(dir, self.config.memory_filename), self.get_all())
+
+    def load_layers(self, item_id: str, layers: list[int]) -> dict[int, tuple]:
+        """
+        Lee solo algunas capas de una entrada sin reconstruir su `DynamicCache` completo.
+
+        Returns:
+            dict[int, tuple]: `{capa: (key, value)}`.
+        """
+        memories = self.kv_cache_memories
+        if isinstance(memories, LazyKVCacheItems) and item_id not in memories.loaded_ids:
+            return memories.source.load_layers(item_id, layers)
+        cache = memories[item_id].memory
+        return {layer: (cache.key_cache[layer], cache.value_cache[layer]) for layer in layers}
+
+
+def install_safe_kv_cache() -> None:
+    """
+    Hace que las memorias `kv_cache` creadas a partir de ahora usen `SafeKVCacheMemory`.
+
+    Sustituye la entrada "kv_cache" de `MemoryFactory`; llamarla varias veces no tiene
+    efecto adicional.
+    """
+    MemoryFactory.backend_to_class["kv_cache"] = SafeKVCacheMemory
+
+
+def migrate_kv_pickle(dir: str, memory_filename: str = "activation_memory.pickle") -> int:
+    """
+    Convierte un `activation_memory.pickle` en `activation_memory.safetensors`.
+
+    El pickle se conserva; la carga usará el fichero nuevo a partir de ahora.
+    Solo debe ejecutarse sobre pickles de confianza.
+
+    Returns:
+        int: Número de entradas convertidas.
+    """
+    import pickle
+
+    with open(os.path.join(dir, memory_filename), "rb") as f:
+        data = pickle.load(f)
+    memories = data.get("kv_cache_memories", {}) if isinstance(data, dict) else data
+    items = list(memories.values()) if isinstance(memories, dict) else list(memories)
+    write_kv_file(safetensors_path(dir, memory_filename), items)
+    return len(items)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "migrate":
+        print("Uso: python -m memos_ext.kv_store migrate <directorio_del_volcado>")
+        sys.exit(1)
+    converted = migrate_kv_pickle(sys.argv[2])
+    print(f"✅ {converted} entradas convertidas a safetensors en {sys.argv[2]}")
@@ -0,0 +1,181 @@
+# --- Carga perezosa de los tipos de memoria de un MemCube ---
+# `GeneralMemCube(config)` construye las tres memorias al registrar el cubo: la de
+# activación (`activation_memory.pickle`) y la paramétrica (adaptador LoRA) crean
+# además su propio LLM extractor (`Qwen/Qwen3-1.7B`), aunque la carga de trabajo
+# (p. ej. un API que solo busca) no use más que `text_mem`.
+#
+# `LazyMemCube` aplaza la construcción de cada memoria, y la lectura de su volcado,
+# hasta el primer acceso a `cube.text_mem` / `cube.act_mem` / `cube.para_mem`.
+# Con `memory_types` se puede además limitar qué tipos existen en el cubo.
+import os
+import threading
+
+from collections.abc import Callable
+from typing import Literal
+
+from memos.configs.mem_cube import GeneralMemCubeConfig
+from memos.configs.utils import get_json_file_model_schema
+from memos.exceptions import ConfigurationError
+from memos.log import get_logger
+from memos.mem_cube.general import GeneralMemCube
+from memos.mem_cube.utils import merge_config_with_default
+from memos.memories.factory import MemoryFactory
+
+logger = get_logger(__name__)
+
+MemoryType = Literal["text_mem", "act_mem", "para_mem"]
+MEMORY_TYPES: tuple[MemoryType, ...] = ("text_mem", "act_mem", "para_mem")
+
+
+def _load_memory(memory_type: MemoryType, memory, dir: str) -> None:
+    """Carga un volcado; la memoria textual acepta el formato binario de `storage.py`."""
+    if memory_type == "text_mem":
+        # Importación local: `storage` importa este módulo.
+        from memos_ext.storage import load_text_memory
+
+        load_text_memory(memory, dir)
+    else:
+        memory.load(dir)
+
+
+class LazyMemCube(GeneralMemCube):
+    """`GeneralMemCube` cuyas memorias se construyen y cargan en el primer acceso."""
+
+    def __init__(
+        self, config: GeneralMemCubeConfig, memory_types: list[MemoryType] | None = None
+    ):
+        """
+        Args:
+            config (GeneralMemCubeConfig): Configuración del cubo.
+            memory_types (list[str], optional): Tipos de memoria habilitados. Los demás
+                se tratan como no configurados. Por defecto, todos los del config.
+        """
+        self.config = config
+        self._text_mem = None
+        self._act_mem = None
+        self._para_mem = None
+        self._materialize_lock = threading.RLock()
+        self._materialize_callbacks: dict[str, list[Callable]] = {}
+
+        enabled = MEMORY_TYPES if memory_types is None else memory_types
+        # Tipos pendientes de construir y, si procede, directorio del que cargarlos.
+        self._pending: dict[str, str | None] = {
+            memory_type: None
+            for memory_type in MEMORY_TYPES
+            if memory_type in enabled and getattr(config, memory_type).backend != "uninitialized"
+        }
+
+    @property
+    def loaded_types(self) -> list[str]:
+        """Tipos de memoria ya construidos en este proceso."""
+        return [t for t in MEMORY_TYPES if getattr(self, f"_{t}") is not None]
+
+    def is_pending(self, memory_type: MemoryType) -> bool:
+        """True si la memoria está habilitada pero aún no se ha construido."""
+        return memory_type in self._pending
+
+    def pending_dir(self, memory_type: MemoryType) -> str | None:
+        """Directorio del que se cargará la memoria al construirla (None si no hay)."""
+        return self._pending.get(memory_type)
+
+    def _materialize(self, memory_type: MemoryType) -> None:
+        """Construye (y carga, si hay un volcado pendiente) la memoria indicada."""
+        if memory_type not in self._pending:
+            return
+        with self._materialize_lock:
+            if memory_type not in self._pending:
+                return
+            memory = getattr(self, f"_{memory_type}")
+            if memory is not None:
+                # Asignada a mano con el setter antes del primer acceso.
+                del self._pending[memory_type]
+            else:
+                memory = MemoryFactory.from_config(getattr(self.config, memory_type))
+                dir = self._pending[memory_type]
+                if dir is not None:
+                    _load_memory(memory_type, memory, dir)
+                setattr(self, f"_{memory_type}", memory)
+                del self._pending[memory_type]
+                logger.info(f"Materialized {memory_type} ({type(memory).__name__}) from {dir}")
+            for callback in self._materialize_callbacks.pop(memory_type, []):
+                callback(memory)
+
+    def on_materialize(self, memory_type: MemoryType, callback: Callable) -> None:
+        """
+        Llama a `callback(memoria)` cuando se construya la memoria indicada.
+
+        Si ya está construida, se llama ahora; si el tipo no está habilitado, nunca.
+        """
+        with self._materialize_lock:
+            if memory_type in self._pending:
+                self._materialize_callbacks.setdefault(memory_type, []).append(callback)
+                return
+        memory = getattr(self, f"_{memory_type}")
+        if memory is not None:
+            callback(memory)
+
+    def defer_load(self, dir: str, memory_types: list[MemoryType] | None = None) -> None:
+        """
+        Programa la carga de `dir` sin validar el esquema.
+
+        Las memorias ya construidas se cargan ahora; las demás, en su primer acceso
+        (un `defer_load` posterior sustituye al directorio pendiente).
+        """
+        for memory_type in memory_types or MEMORY_TYPES:
+            with self._materialize_lock:
+                if memory_type in self._pending:
+                    self._pending[memory_type] = dir
+                    continue
+            memory = getattr(self, f"_{memory_type}")
+            if memory is not None:
+                _load_memory(memory_type, memory, dir)
+
+    def load(self, dir: str, memory_types: list[MemoryType] | None = None) -> None:
+        """Igual que `GeneralMemCube.load`, pero perezoso para las memorias aún no usadas."""
+        loaded_schema = get_json_file_model_schema(os.path.join(dir, self.config.config_filename))
+        if loaded_schema != self.config.model_schema:
+            raise ConfigurationError(
+                f"Configuration schema mismatch. Expected {self.config.model_schema}, "
+                f"but found {loaded_schema}."
+            )
+        self.defer_load(dir, memory_types)
+        logger.info(f"MemCube load scheduled from {dir} (types: {memory_types or list(MEMORY_TYPES)})")
+
+    @staticmethod
+    def init_from_dir(
+        dir: str,
+        memory_types: list[MemoryType] | None = None,
+        default_config: GeneralMemCubeConfig | None = None,
+    ) -> "LazyMemCube":
+        """
+        Equivalente perezoso de `GeneralMemCube.init_from_dir`.
+
+        Args:
+            dir (str): Directorio del cubo (con `config.json`).
+            memory_types (list[str], optional): Tipos de memoria habilitados (y cargados).
+            default_config (GeneralMemCubeConfig, optional): Configuración por defecto a fusionar.
+        """
+        config = GeneralMemCubeConfig.from_json_file(os.path.join(dir, "config.json"))
+        if default_config is not None:
+            config = merge_config_with_default(config, default_config)
+        mem_cube = LazyMemCube(config, memory_types=memory_types)
+        mem_cube.load(dir, memory_types)
+        return mem_cube
+
+    # Las propiedades materializan la memoria antes de delegar en las de `GeneralMemCube`
+    # (que conservan sus setters con comprobación de tipo).
+
+    @GeneralMemCube.text_mem.getter
+    def text_mem(self):
+        self._materialize("text_mem")
+        return GeneralMemCube.text_mem.fget(self)
+
+    @GeneralMemCube.act_mem.getter
+    def act_mem(self):
+        self._materialize("act_mem")
+        return GeneralMemCube.act_mem.fget(self)
+
+    @GeneralMemCube.para_mem.getter
+    def para_mem(self):
+        self._materialize("para_mem")
+        return GeneralMemCube.para_mem.fget(self)
@@ -0,0 +1,532 @@
+# --- Ciclo de vida de las memorias: resumen y archivo de lo antiguo ---
+# Cada memoria lleva `status` ("activated") y `updated_at`, pero nada las degrada:
+# cada turno de `Trial02.chat_loop` añade dos memorias (incluidas respuestas de
+# relleno como "Entendido. He tomado nota de eso.") y la colección activa, que es
+# la que se busca y la que ocupa RAM en Qdrant, crece sin límite.
+#
+# `MemoryLifecycleManager` recorre periódicamente la colección de un cubo y, con un
+# presupuesto de tiempo y de llamadas al LLM por pasada:
+#   1. Archiva las memorias de poco valor (acuses de recibo y los textos que indique
+#      `low_value_patterns`, p. ej. las respuestas fijas de Trial02) y las que ya
+#      tienen `status` "archived" o "deleted".
+#   2. Agrupa las memorias antiguas (`stale_after`) que se parecen entre sí y pide al
+#      `extractor_llm` del cubo un resumen de cada grupo: el resumen entra en la
+#      colección activa y los originales pasan al archivo.
+#   3. Si la colección supera `max_hot` memorias, archiva las más antiguas.
+# El archivo (`MemoryArchive`) es un directorio de segmentos `.vectors.npy` +
+# `.payloads.jsonl` (mismo formato que `storage.py`) que no se carga en la base
+# vectorial: la búsqueda normal no lo ve y `search_archive` lo consulta bajo demanda.
+#
+# La pasada lee la colección y decide sin el candado del cubo; antes de archivar,
+# ya con él, vuelve a leer cada memoria y deja fuera las que han cambiado
+# (`updated_at` distinto, p. ej. refrescadas por la deduplicación en ese intervalo).
+import json
+import os
+import re
+import threading
+import time
+
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+
+from memos.log import get_logger
+from memos.memories.textual.item import TextualMemoryItem, TextualMemoryMetadata
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.filters import matches
+from memos_ext.snapshots import _read_json, _write_json_atomic, scan_payloads
+from memos_ext.storage import read_binary_memories, write_binary_memories
+from memos_ext.telemetry import span
+
+logger = get_logger(__name__)
+
+ARCHIVE_MANIFEST_FILENAME = "archive_manifest.json"
+
+# Segmentos del archivo a partir de los cuales se pliegan en uno solo.
+MAX_ARCHIVE_SEGMENTS = 32
+
+DEFAULT_STALE_AFTER = timedelta(days=30)
+DEFAULT_LOW_VALUE_AFTER = timedelta(hours=1)
+DEFAULT_CLUSTER_THRESHOLD = 0.8
+DEFAULT_MAX_CLUSTER_SIZE = 8
+DEFAULT_BUDGET_SECONDS = 10.0
+DEFAULT_MAX_LLM_CALLS = 8
+DEFAULT_MAX_CANDIDATES = 2000
+DEFAULT_INTERVAL = 15 * 60.0
+
+# Acuses de recibo sin información propia (minúsculas, sin espacios en los extremos).
+# Las respuestas fijas de cada aplicación se añaden con `low_value_patterns`.
+LOW_VALUE_PATTERNS = (
+    r"(entendido|de acuerdo|vale|ok(ay)?|perfecto|genial|claro|gracias)[.!]*"
+    r"( he tomado nota( de (eso|ello))?[.!]*)?",
+    r"he tomado nota( de (eso|ello))?[.!]*",
+    r"(got it|noted|understood|sure|thanks?|thank you)[.!]*",
+)
+
+# Memorias más cortas que esto se consideran de poco valor ("ok", "sí").
+MIN_MEMORY_CHARS = 4
+
+SUMMARY_PROMPT = """You are compacting the long-term memory of an assistant.
+The following memories about the same user are related. Merge them into ONE short memory
+that keeps every distinct fact (names, dates, preferences, numbers) and drops repetition.
+Write it in the same language as the memories. Reply with the merged memory only.
+
+Memories:
+{memories}"""
+
+
+def _updated_at(payload: dict) -> datetime:
+    """`metadata.updated_at` como datetime local sin zona; sin fecha cuenta como muy antigua."""
+    value = (payload.get("metadata") or {}).get("updated_at")
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.min
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _version(payload: dict | None) -> Any:
+    """`metadata.updated_at` tal cual: si cambia entre la lectura y el archivo, la memoria se deja."""
+    return ((payload or {}).get("metadata") or {}).get("updated_at")
+
+
+def _status(payload: dict) -> str | None:
+    return (payload.get("metadata") or {}).get("status")
+
+
+class MemoryArchive:
+    """
+    Nivel frío de memorias de un cubo, en disco y fuera de la base vectorial.
+
+    `archive_manifest.json` guarda la lista ordenada de segmentos; cada `append`
+    escribe un segmento nuevo y el manifiesto se actualiza al final, de modo que un
+    segmento a medio escribir se ignora.
+    """
+
+    def __init__(self, dir: str, dtype: str = "float32"):
+        """
+        Args:
+            dir (str): Directorio del archivo (se crea si no existe).
+            dtype (str): `"float32"` o `"float16"` para los vectores archivados.
+        """
+        self.dir = dir
+        self.dtype = dtype
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.dir, ARCHIVE_MANIFEST_FILENAME)
+
+    def _manifest(self) -> dict:
+        return _read_json(self.manifest_path, default={"segments": [], "next": 1, "count": 0})
+
+    def _paths(self, name: str) -> tuple[str, str]:
+        prefix = os.path.join(self.dir, name)
+        return prefix + ".vectors.npy", prefix + ".payloads.jsonl"
+
+    def __len__(self) -> int:
+        return self._manifest()["count"]
+
+    def append(self, items: list[VecDBItem]) -> None:
+        """Añade memorias (con vector y payload) en un segmento nuevo."""
+        if not items:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        manifest = self._manifest()
+        name = f"{manifest['next']:06d}"
+        write_binary_memories(*self._paths(name), items, dtype=self.dtype)
+        manifest["segments"].append(name)
+        manifest["next"] += 1
+        manifest["count"] += len(items)
+        _write_json_atomic(self.manifest_path, manifest)
+        if len(manifest["segments"]) > MAX_ARCHIVE_SEGMENTS:
+            self.compact()
+
+    def segments(self):
+        """Recorre los segmentos: `(matriz N x D en mmap, lista de {"id", "payload"})`."""
+        for name in self._manifest()["segments"]:
+            yield read_binary_memories(*self._paths(name))
+
+    def search(
+        self, query_vector: list[float], top_k: int, filter: dict[str, Any] | None = None
+    ) -> list[tuple[float, TextualMemoryItem]]:
+        """
+        Búsqueda exacta por similitud coseno sobre todo el archivo (lectura en mmap).
+
+        Args:
+            query_vector (list): Vector de la consulta.
+            top_k (int): Número de resultados.
+            filter (dict, optional): Filtro por metadatos (ver `memos_ext.filters`).
+
+        Returns:
+            list: `(puntuación, memoria)` ordenados de mayor a menor puntuación.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        best: list[tuple[float, dict]] = []
+        for vectors, records in self.segments():
+            rows = [row for row, record in enumerate(records) if matches(record["payload"], filter)]
+            if not rows:
+                continue
+            block = np.asarray(vectors[rows], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1)
+            norms[norms == 0] = 1.0
+            scores = (block @ query) / norms
+            for position in np.argsort(-scores)[:top_k]:
+                best.append((float(scores[position]), records[rows[position]]["payload"]))
+            best = sorted(best, key=lambda hit: hit[0], reverse=True)[:top_k]
+        return [(score, TextualMemoryItem(**payload)) for score, payload in best]
+
+    def compact(self) -> int:
+        """Pliega todos los segmentos en uno. Devuelve el número de segmentos plegados."""
+        manifest = self._manifest()
+        names = manifest["segments"]
+        if len(names) <= 1:
+            return 0
+        sources = [read_binary_memories(*self._paths(name)) for name in names]
+        total = sum(len(records) for _, records in sources)
+        dimension = max((v.shape[1] for v, _ in sources if v.ndim == 2 and v.shape[0]), default=0)
+
+        name = f"{manifest['next']:06d}"
+        vectors_path, payloads_path = self._paths(name)
+        output = np.lib.format.open_memmap(
+            vectors_path + ".tmp", mode="w+", dtype=self.dtype, shape=(total, dimension)
+        )
+        row = 0
+        with open(payloads_path + ".tmp", "w", encoding="utf-8") as f:
+            for vectors, records in sources:
+                output[row : row + len(records)] = vectors
+                row += len(records)
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write("\n")
+        output.flush()
+        del output, sources
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(payloads_path + ".tmp", payloads_path)
+
+        _write_json_atomic(
+            self.manifest_path, {"segments": [name], "next": manifest["next"] + 1, "count": total}
+        )
+        for old in names:
+            for path in self._paths(old):
+                os.remove(path)
+        logger.info(f"Compacted {len(names)} archive segments into {vectors_path}")
+        return len(names)
+
+
+class MemoryLifecycleManager:
+    """
+    Resume y archiva las memorias antiguas o de poco valor de un cubo.
+
+    Se puede ejecutar a mano (`run_once`) o en un hilo en segundo plano (`start`).
+    Ejemplo:
+        ```python
+        manager = MemoryLifecycleManager(mem_cube, "../.memos/archive/mem_cube_2", max_hot=5000)
+        manager.start(interval=900)
+        ...
+        manager.stop()
+        ```
+    """
+
+    def __init__(
+        self,
+        mem_cube,
+        archive_dir: str,
+        stale_after: timedelta = DEFAULT_STALE_AFTER,
+        low_value_after: timedelta = DEFAULT_LOW_VALUE_AFTER,
+        max_hot: int | None = None,
+        cluster_threshold: float = DEFAULT_CLUSTER_THRESHOLD,
+        max_cluster_size: int = DEFAULT_MAX_CLUSTER_SIZE,
+        budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+        max_llm_calls: int = DEFAULT_MAX_LLM_CALLS,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        low_value_patterns: tuple[str, ...] = LOW_VALUE_PATTERNS,
+        lock=None,
+        cube_id: str | None = None,
+    ):
+        """
+        Args:
+            mem_cube: Un `GeneralMemCube` con memoria textual `general_text`.
+            archive_dir (str): Directorio del archivo en disco (`MemoryArchive`).
+            stale_after (timedelta): Antigüedad (`updated_at`) a partir de la cual una
+                memoria se puede resumir.
+            low_value_after (timedelta): Antigüedad mínima para archivar una memoria de
+                poco valor (deja que la conversación en curso la siga viendo).
+            max_hot (int, optional): Tamaño máximo de la colección activa; lo que sobre
+                (lo más antiguo) se archiva. Sin límite por defecto.
+            cluster_threshold (float): Similitud coseno mínima entre memorias de un grupo.
+            max_cluster_size (int): Memorias como máximo en cada resumen.
+            budget_seconds (float): Tiempo máximo de cada pasada; los grupos que no se
+                resuman quedan para la siguiente.
+            max_llm_calls (int): Resúmenes como máximo en cada pasada.
+            max_candidates (int): Memorias como máximo que se descargan (con vector) en
+                cada paso de una pasada.
+            low_value_patterns (tuple): Expresiones regulares (coincidencia completa, sin
+                distinguir mayúsculas) de los textos de poco valor. Por defecto,
+                `LOW_VALUE_PATTERNS`; para añadir otras, `(*LOW_VALUE_PATTERNS, ...)`.
+            lock: Candado que serializa los accesos a la base vectorial del cubo (el de
+                `ExtendedMOS`). Las llamadas al LLM se hacen sin él.
+            cube_id (str, optional): Id del cubo, para los logs y la telemetría.
+        """
+        self.mem_cube = mem_cube
+        self.archive = MemoryArchive(archive_dir)
+        self.stale_after = stale_after
+        self.low_value_after = low_value_after
+        self.max_hot = max_hot
+        self.cluster_threshold = cluster_threshold
+        self.max_cluster_size = max_cluster_size
+        self.budget_seconds = budget_seconds
+        self.max_llm_calls = max_llm_calls
+        self.max_candidates = max_candidates
+        self._low_value = [re.compile(p, re.IGNORECASE | re.DOTALL) for p in low_value_patterns]
+        self._lock = lock if lock is not None else nullcontext()
+        self.cube_id = cube_id
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- Planificación ---
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = DEFAULT_INTERVAL) -> None:
+        """Ejecuta `run_once` cada `interval` segundos en un hilo en segundo plano."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval,), name="memos-lifecycle", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Detiene el hilo (la pasada en curso, si la hay, termina antes)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                # Un fallo (p. ej. Qdrant no disponible) no debe parar las pasadas siguientes.
+                logger.error(f"Memory lifecycle pass failed on cube {self.cube_id}: {e}")
+
+    # --- Pasada ---
+
+    def is_low_value(self, text: str) -> bool:
+        """True si el texto no aporta información propia (ver `low_value_patterns`)."""
+        text = (text or "").strip()
+        return len(text) < MIN_MEMORY_CHARS or any(p.fullmatch(text) for p in self._low_value)
+
+    def run_once(self) -> dict[str, int]:
+        """
+        Hace una pasada de mantenimiento sobre la colección activa del cubo.
+
+        Returns:
+            dict: Contadores `{"scanned", "archived", "summarized", "summaries"}`:
+                memorias revisadas, archivadas (en total), archivadas por estar resumidas
+                y resúmenes nuevos.
+        """
+        deadline = time.monotonic() + self.budget_seconds
+        stats = {"scanned": 0, "archived": 0, "summarized": 0, "summaries": 0}
+        vector_db = self.mem_cube.text_mem.vector_db
+        with span("lifecycle", cube_id=self.cube_id):
+            with self._lock:
+                payloads = scan_payloads(vector_db, ["memory", "metadata"])
+            stats["scanned"] = len(payloads)
+            now = datetime.now()
+            # De más antigua a más reciente: es el orden en que se resume y se archiva.
+            by_age = sorted(payloads, key=lambda memory_id: _updated_at(payloads[memory_id]))
+
+            # 1. Memorias inactivas o de poco valor.
+            low_value = [
+                memory_id
+                for memory_id in by_age
+                if _status(payloads[memory_id]) in ("archived", "deleted")
+                or (
+                    now - _updated_at(payloads[memory_id]) >= self.low_value_after
+                    and self.is_low_value(payloads[memory_id].get("memory", ""))
+                )
+            ][: self.max_candidates]
+            # Solo cuenta lo archivado de verdad: las que cambiaron desde la lectura
+            # siguen en la colección activa (y en el tope de `max_hot`).
+            moved = set(self._archive_ids(low_value, payloads, "low_value"))
+            stats["archived"] += len(moved)
+
+            # 2. Grupos de memorias antiguas y parecidas -> un resumen por grupo.
+            stale = [
+                memory_id
+                for memory_id in by_age
+                if memory_id not in moved
+                and now - _updated_at(payloads[memory_id]) >= self.stale_after
+            ][: self.max_candidates]
+            extractor_llm = getattr(self.mem_cube.text_mem, "extractor_llm", None)
+            if stale and extractor_llm is not None and self.max_llm_calls > 0:
+                with self._lock:
+                    items = vector_db.get_by_ids(stale)
+                llm_calls = 0
+                for cluster in self._clusters(items):
+                    if time.monotonic() >= deadline or llm_calls >= self.max_llm_calls:
+                        break
+                    llm_calls += 1
+                    summary = self._summarize(extractor_llm, cluster)
+                    if summary is None:
+                        continue
+                    (vector,) = self.mem_cube.text_mem.embedder.embed([summary.memory])
+                    point = VecDBItem(id=summary.id, vector=vector, payload=summary.model_dump())
+                    with self._lock:
+                        scanned = {str(item.id): item.payload for item in cluster}
+                        current = self._unchanged(list(scanned), scanned)
+                        if len(current) < len(cluster):
+                            # Alguna memoria cambió mientras se resumía: el grupo se
+                            # deja para la siguiente pasada.
+                            continue
+                        vector_db.add([point])
+                        self._archive(current, "summarized", summary_id=summary.id)
+                    stats["summaries"] += 1
+                    stats["summarized"] += len(cluster)
+                    moved.update(str(item.id) for item in cluster)
+                stats["archived"] += stats["summarized"]
+
+            # 3. Tope de tamaño de la colección activa: se archiva lo más antiguo.
+            if self.max_hot is not None and time.monotonic() < deadline:
+                overflow = len(payloads) - len(moved) + stats["summaries"] - self.max_hot
+                if overflow > 0:
+                    oldest = [memory_id for memory_id in by_age if memory_id not in moved]
+                    oldest = oldest[: min(overflow, self.max_candidates)]
+                    stats["archived"] += len(self._archive_ids(oldest, payloads, "overflow"))
+
+        logger.info(
+            f"lifecycle cube={self.cube_id} scanned={stats['scanned']} archived={stats['archived']} "
+            f"summaries={stats['summaries']} (from {stats['summarized']}) archive={len(self.archive)}"
+        )
+        return stats
+
+    def _clusters(self, items: list[VecDBItem]) -> list[list[VecDBItem]]:
+        """
+        Agrupa memorias del mismo usuario cuya similitud coseno supera el umbral.
+
+        Recorrido voraz en el orden recibido (de más antigua a más reciente): cada
+        memoria sin grupo abre uno con las parecidas que tampoco lo tienen. Solo se
+        devuelven grupos de dos o más, los más grandes primero.
+        """
+        by_user: dict[str | None, list[VecDBItem]] = {}
+        for item in items:
+            user_id = ((item.payload or {}).get("metadata") or {}).get("user_id")
+            by_user.setdefault(user_id, []).append(item)
+
+        clusters = []
+        for group in by_user.values():
+            matrix = np.asarray([item.vector for item in group], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+            free = np.ones(len(group), dtype=bool)
+            for row in range(len(group)):
+                if not free[row]:
+                    continue
+                members = np.flatnonzero(free & (matrix @ matrix[row] >= self.cluster_threshold))
+                members = members[: self.max_cluster_size]
+                free[members] = False
+                free[row] = False
+                if len(members) >= 2:
+                    clusters.append([group[member] for member in members])
+        return sorted(clusters, key=len, reverse=True)
+
+    def _summarize(self, extractor_llm, cluster: list[VecDBItem]) -> TextualMemoryItem | None:
+        """Pide al LLM una memoria que reúna las del grupo (None si falla o responde vacío)."""
+        texts = "\n".join(f"- {item.payload.get('memory', '')}" for item in cluster)
+        try:
+            with span("lifecycle.summarize", cube_id=self.cube_id):
+                response = extractor_llm.generate(
+                    [{"role": "user", "content": SUMMARY_PROMPT.format(memories=texts)}]
+                )
+        except Exception as e:
+            logger.warning(f"Failed to summarize {len(cluster)} memories: {e}")
+            return None
+        text = (response or "").strip()
+        if not text:
+            return None
+        metadata = (cluster[0].payload or {}).get("metadata") or {}
+        return TextualMemoryItem(
+            memory=text,
+            metadata=TextualMemoryMetadata(
+                user_id=metadata.get("user_id"),
+                source=metadata.get("source"),
+                tags=["summary"],
+                summary_of=[str(item.id) for item in cluster],
+            ),
+        )
+
+    def _unchanged(self, ids: list[str], scanned: dict[str, dict]) -> list[VecDBItem]:
+        """
+        Vuelve a leer las memorias y devuelve las que siguen como en `scanned`.
+
+        Se llama con el candado del cubo: lo que devuelve se puede archivar sin que
+        otra escritura se cuele entre la comprobación y el borrado.
+        """
+        current = self.mem_cube.text_mem.vector_db.get_by_ids(ids)
+        kept = [
+            item for item in current if _version(item.payload) == _version(scanned.get(str(item.id)))
+        ]
+        if len(kept) < len(ids):
+            logger.debug(
+                f"lifecycle cube={self.cube_id}: {len(ids) - len(kept)} memories changed or "
+                "disappeared since the scan; left in place"
+            )
+        return kept
+
+    def _archive_ids(self, ids: list[str], scanned: dict[str, dict], reason: str) -> list[str]:
+        """Archiva las memorias que no han cambiado desde la lectura; devuelve sus ids."""
+        if not ids:
+            return []
+        with self._lock:
+            items = self._unchanged(ids, scanned)
+            self._archive(items, reason)
+        return [str(item.id) for item in items]
+
+    def _archive(self, items: list[VecDBItem], reason: str, summary_id: str | None = None) -> None:
+        """
+        Escribe las memorias en el archivo y después las borra de la colección activa.
+
+        En ese orden: si el proceso se interrumpe entre los dos pasos, una memoria
+        puede quedar en los dos niveles, pero nunca se pierde.
+        """
+        archived_at = datetime.now().isoformat()
+        archived = []
+        for item in items:
+            payload = dict(item.payload or {})
+            metadata = dict(payload.get("metadata") or {})
+            metadata.update(status="archived", archived_at=archived_at, archive_reason=reason)
+            if summary_id is not None:
+                metadata["summary_id"] = summary_id
+            payload["metadata"] = metadata
+            archived.append(VecDBItem(id=item.id, vector=item.vector, payload=payload))
+        self.archive.append(archived)
+        self.mem_cube.text_mem.vector_db.delete([str(item.id) for item in items])
+
+    def search_archive(
+        self, query: str, top_k: int = 5, filter: dict[str, Any] | None = None
+    ) -> list[TextualMemoryItem]:
+        """
+        Busca en el archivo (la búsqueda normal solo ve la colección activa).
+
+        Args:
+            query (str): Texto de la consulta; se vectoriza con el embedder del cubo.
+            top_k (int): Número de resultados.
+            filter (dict, optional): Filtro por metadatos (ver `memos_ext.filters`).
+
+        Returns:
+            list: Memorias archivadas, de más a menos parecida.
+        """
+        (vector,) = self.mem_cube.text_mem.embedder.embed([query])
+        return [memory for _, memory in self.archive.search(vector, top_k, filter)]
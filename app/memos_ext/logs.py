@@ -0,0 +1,197 @@
+# --- Logging barato en el camino de búsqueda ---
+# Cada `mos.search` de MemOS escribía en `memos.log`, con nivel INFO, el texto y los
+# metadatos completos de cada memoria encontrada (los bloques "🧠 [Memory] Searched
+# memories from ..."). Con carga, formatear esas cadenas y escribirlas en el fichero
+# es una parte medible de cada petición, y el log crece con el tamaño del resultado.
+#
+# Aquí:
+#   - `log_search_summary` escribe una sola línea INFO por búsqueda (ids cortos,
+#     puntuaciones y tiempos) y deja el contenido de las memorias para DEBUG, con
+#     formateo perezoso (`LazyFormat`): si DEBUG está desactivado no se construye.
+#   - `install_queue_logging` pone un `QueueHandler` delante de los handlers de
+#     MemOS (fichero rotativo y consola): el hilo que registra solo encola el
+#     registro y la escritura en disco la hace un hilo aparte (`QueueListener`).
+import atexit
+import logging
+import logging.config
+import queue
+
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
+
+DEFAULT_LOG_QUEUE_SIZE = 10_000
+
+# Caracteres de cada id en la línea de resumen (los uuid completos no aportan).
+SHORT_ID_LENGTH = 8
+
+
+class LazyFormat:
+    """Cadena que se construye solo si el registro llega a formatearse (`str(obj)`)."""
+
+    __slots__ = ("_fn",)
+
+    def __init__(self, fn: Callable[[], str]):
+        self._fn = fn
+
+    def __str__(self) -> str:
+        return self._fn()
+
+
+def short_id(memory_id: str) -> str:
+    return str(memory_id)[:SHORT_ID_LENGTH]
+
+
+def format_memories_compact(memories: list) -> str:
+    """`n memories [id1, id2, ...]`: lo que se registra en INFO en lugar del contenido."""
+    if not memories:
+        return "No memories."
+    ids = ", ".join(short_id(memory.id) for memory in memories)
+    return f"{len(memories)} memories [{ids}] (content logged at DEBUG)"
+
+
+def log_search_summary(
+    logger: logging.Logger,
+    user_id: str,
+    hits_by_cube: dict[str, list[tuple[float | None, Any]]],
+    cube_count: int,
+    top_k: int,
+    timings: dict[str, float],
+    kept: list[dict] | None = None,
+) -> None:
+    """
+    Registra una búsqueda: una línea INFO compacta y, en DEBUG, el contenido.
+
+    Args:
+        logger: Logger donde escribir.
+        user_id (str): Usuario de la búsqueda.
+        hits_by_cube (dict): `{cube_id: [(puntuación, memoria), ...]}` de cada cubo.
+        cube_count (int): Cubos consultados (incluidos los que fallaron o no respondieron).
+        top_k (int): top_k de la búsqueda.
+        timings (dict): Segundos por etapa, p. ej. `{"embed": ..., "vector": ..., "total": ...}`.
+        kept (list, optional): Resultado final (`MOSSearchResult["text_mem"]`); solo se
+            resumen las memorias que contiene.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    kept_ids = (
+        {id(memory) for entry in kept for memory in entry["memories"]} if kept is not None else None
+    )
+    hits = [
+        (score, cube_id, memory)
+        for cube_id, cube_hits in hits_by_cube.items()
+        for score, memory in cube_hits
+        if kept_ids is None or id(memory) in kept_ids
+    ]
+    results = ", ".join(
+        f"{short_id(memory.id)}@{cube_id}" + (f":{score:.3f}" if score is not None else "")
+        for score, cube_id, memory in hits
+    )
+    times = " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+    logger.info(
+        f"search user={user_id} cubes={len(hits_by_cube)}/{cube_count} top_k={top_k} "
+        f"hits={len(hits)} {times} results=[{results}]",
+        stacklevel=2,
+    )
+    logger.debug(
+        "Search results for user %s:\n%s",
+        user_id,
+        LazyFormat(
+            lambda: "\n".join(
+                f"{position + 1}. [{cube_id}] {memory}"
+                for position, (_, cube_id, memory) in enumerate(hits)
+            )
+        ),
+        stacklevel=2,
+    )
+
+
+class DroppingQueueHandler(QueueHandler):
+    """`QueueHandler` con cola acotada: si está llena, descarta el registro y lo cuenta."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Nunca bloqueamos (ni fallamos) una petición por culpa del log.
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+_queue_handler: DroppingQueueHandler | None = None
+_original_handlers: tuple[dict, list] | None = None
+
+
+def _build_handler(spec: dict, config: dict) -> logging.Handler:
+    """Crea un handler del `LOGGING_CONFIG` de MemOS (los dos que define: consola y fichero)."""
+    if spec["class"] == "logging.handlers.RotatingFileHandler":
+        handler = RotatingFileHandler(
+            spec["filename"],
+            maxBytes=spec.get("maxBytes", 0),
+            backupCount=spec.get("backupCount", 0),
+            encoding="utf-8",
+        )
+    else:
+        handler = logging.StreamHandler(spec.get("stream"))
+    handler.setLevel(spec.get("level", logging.NOTSET))
+    handler.setFormatter(logging.Formatter(config["formatters"][spec["formatter"]]["format"]))
+    for filter_name in spec.get("filters", []):
+        handler.addFilter(logging.Filter(config["filters"][filter_name].get("name", "")))
+    return handler
+
+
+def install_queue_logging(max_queue: int = DEFAULT_LOG_QUEUE_SIZE) -> DroppingQueueHandler:
+    """
+    Envía los logs de MemOS a través de una cola: la escritura en disco ocurre en otro hilo.
+
+    `memos.log.get_logger` vuelve a aplicar `LOGGING_CONFIG` en cada llamada, así que
+    se modifica esa configuración (y no solo los handlers actuales) para que la cola
+    siga instalada. Llamarla varias veces devuelve el mismo handler.
+
+    Args:
+        max_queue (int): Registros pendientes como máximo; los que no quepan se descartan
+            (`handler.dropped`).
+
+    Returns:
+        DroppingQueueHandler: El handler instalado en el logger raíz.
+    """
+    global _listener, _queue_handler, _original_handlers
+    if _queue_handler is not None:
+        return _queue_handler
+
+    from memos import log as memos_log
+
+    config = memos_log.LOGGING_CONFIG
+    _original_handlers = (config["handlers"], config["root"]["handlers"])
+    targets = [_build_handler(spec, config) for spec in config["handlers"].values()]
+
+    log_queue: queue.Queue = queue.Queue(maxsize=max_queue)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, *targets, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+
+    config["handlers"] = {"queue": {"()": lambda: _queue_handler}}
+    config["root"]["handlers"] = ["queue"]
+    logging.config.dictConfig(config)
+    return _queue_handler
+
+
+def stop_queue_logging() -> None:
+    """Escribe lo pendiente en la cola y vuelve a la configuración de logging de MemOS."""
+    global _listener, _queue_handler, _original_handlers
+    if _listener is None:
+        return
+    from memos import log as memos_log
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    config = memos_log.LOGGING_CONFIG
+    config["handlers"], config["root"]["handlers"] = _original_handlers
+    logging.config.dictConfig(config)
+    _listener = _queue_handler = _original_handlers = None
@@ -0,0 +1,869 @@
+# --- ExtendedMOS: el MOS de MemOS con las extensiones de esta carpeta ---
+# Es una subclase directa de `memos.mem_os.main.MOS`, así que se puede usar en
+# cualquier sitio donde los scripts usaban `MOS` sin cambiar nada más.
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Generator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from memos.configs.mem_cube import GeneralMemCubeConfig
+from memos.configs.mem_os import MOSConfig
+from memos.log import get_logger
+from memos.mem_cube.general import GeneralMemCube
+from memos.mem_os.main import MOS
+from memos.memories.textual.item import TextualMemoryItem, TextualMemoryMetadata
+from memos.types import MessageList, MOSSearchResult
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.bulk import (
+    DEFAULT_EMBED_BATCH_SIZE,
+    DEFAULT_EMBED_WORKERS,
+    DEFAULT_UPSERT_BATCH_SIZE,
+    bulk_add,
+)
+from memos_ext.dedup import write_with_dedup
+from memos_ext.filters import matches, normalize_filter
+from memos_ext.kv_store import install_safe_kv_cache
+from memos_ext.lazy_cube import MEMORY_TYPES, LazyMemCube, MemoryType
+from memos_ext.lifecycle import DEFAULT_INTERVAL, MemoryLifecycleManager
+from memos_ext.logs import format_memories_compact, log_search_summary
+from memos_ext.numpy_vecdb import install_numpy_vecdb
+from memos_ext.qdrant_tuning import install_qdrant_tuning
+from memos_ext.snapshots import CubeSnapshotter
+from memos_ext.storage import dump_mem_cube, load_mem_cube
+from memos_ext.telemetry import install_telemetry, record, span, traced
+from memos_ext.write_behind import DEFAULT_QUEUE_SIZE, WriteBehindQueue
+
+logger = get_logger(__name__)
+
+DEFAULT_SEARCH_WORKERS = 8
+
+# Backends de chat que exponen la API `/chat/completions` de OpenAI (cliente `openai`).
+OPENAI_COMPATIBLE_BACKENDS = ("openai", "deepseek", "qwen")
+
+# Resultado de buscar en un cubo: (puntuación, memoria). La puntuación es None en los
+# cubos que no exponen una base vectorial (p. ej. tree_text).
+ScoredMemories = list[tuple[float | None, TextualMemoryItem]]
+
+
+class ThinkTagFilter:
+    """
+    Quita de un stream el bloque `<think>...</think>` inicial, como `remove_thinking_tags`.
+
+    Los fragmentos llegan cortados en cualquier punto (también dentro de una etiqueta):
+    `feed` devuelve lo que ya se puede emitir y retiene lo que aún podría ser parte del
+    razonamiento; `finish` devuelve lo retenido al terminar el stream.
+    """
+
+    OPEN = "<think>"
+    CLOSE = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._state = "start"  # start -> thinking -> after -> text
+
+    def feed(self, chunk: str) -> str:
+        if self._state == "text":
+            return chunk
+        self._buffer += chunk
+        if self._state == "start":
+            stripped = self._buffer.lstrip()
+            if self.OPEN.startswith(stripped):
+                return ""
+            if not stripped.startswith(self.OPEN):
+                self._state = "text"
+                text, self._buffer = self._buffer, ""
+                return text
+            self._state = "thinking"
+            self._buffer = stripped[len(self.OPEN) :]
+        if self._state == "thinking":
+            end = self._buffer.find(self.CLOSE)
+            if end < 0:
+                # Solo se guarda la cola que podría ser el principio de `</think>`.
+                self._buffer = self._buffer[-(len(self.CLOSE) - 1) :]
+                return ""
+            self._buffer = self._buffer[end + len(self.CLOSE) :]
+            self._state = "after"
+        # Tras el razonamiento se descartan los saltos de línea hasta el primer texto.
+        text, self._buffer = self._buffer.lstrip(), ""
+        if text:
+            self._state = "text"
+        return text
+
+    def finish(self) -> str:
+        text = self._buffer if self._state == "start" else ""
+        self._buffer = ""
+        return text
+
+
+def stream_chat_completion(client, config, messages: MessageList) -> Generator[str, None, None]:
+    """
+    `chat.completions.create(stream=True)` con el cliente `openai` del LLM de chat.
+
+    El `reasoning_content` (Deepseek, Qwen) se descarta con `remove_think_prefix`; si
+    no, se devuelve entre `<think>` y `</think>`, como `OpenAILLM.generate_stream`.
+    """
+    response = client.chat.completions.create(
+        model=config.model_name_or_path,
+        messages=messages,
+        stream=True,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        top_p=config.top_p,
+        extra_body=getattr(config, "extra_body", None),
+    )
+    keep_reasoning = not config.remove_think_prefix
+    reasoning = False
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        reasoning_content = getattr(delta, "reasoning_content", None)
+        if reasoning_content:
+            if keep_reasoning:
+                if not reasoning:
+                    yield ThinkTagFilter.OPEN
+                yield reasoning_content
+            reasoning = True
+        elif delta.content:
+            if reasoning and keep_reasoning:
+                yield ThinkTagFilter.CLOSE
+            reasoning = False
+            yield delta.content
+    if reasoning and keep_reasoning:
+        yield ThinkTagFilter.CLOSE
+
+
+def embedder_key(text_mem) -> str | None:
+    """Identifica el embedder de una memoria con base vectorial (None si no la tiene)."""
+    if getattr(text_mem, "vector_db", None) is None:
+        return None
+    return text_mem.config.embedder.model_dump_json()
+
+
+def merge_top_k(hits_by_cube: dict[str, ScoredMemories], top_k: int) -> list[dict]:
+    """
+    Se queda con las `top_k` memorias de mejor puntuación entre todos los cubos.
+
+    Las memorias sin puntuación se conservan todas. El resultado mantiene el formato de
+    `MOSSearchResult["text_mem"]`: una entrada `{"cube_id", "memories"}` por cubo.
+    """
+    scored = [
+        (score, cube_id, position)
+        for cube_id, hits in hits_by_cube.items()
+        for position, (score, _) in enumerate(hits)
+        if score is not None
+    ]
+    scored.sort(key=lambda entry: entry[0], reverse=True)
+    keep = {(cube_id, position) for _, cube_id, position in scored[:top_k]}
+    return [
+        {
+            "cube_id": cube_id,
+            "memories": [
+                item
+                for position, (score, item) in enumerate(hits)
+                if score is None or (cube_id, position) in keep
+            ],
+        }
+        for cube_id, hits in hits_by_cube.items()
+    ]
+
+
+class ExtendedMOS(MOS):
+    """MOS con operaciones adicionales orientadas a rendimiento."""
+
+    def __init__(
+        self,
+        config: MOSConfig | None = None,
+        write_behind: bool = False,
+        write_queue_size: int = DEFAULT_QUEUE_SIZE,
+        search_workers: int = DEFAULT_SEARCH_WORKERS,
+    ):
+        """
+        Args:
+            config (MOSConfig, optional): Configuración del MOS (igual que en `MOS`).
+            write_behind (bool): Si es True, `add` se ejecuta por defecto en segundo plano.
+            write_queue_size (int): Escrituras pendientes máximas antes de bloquear `add`.
+            search_workers (int): Cubos consultados en paralelo como máximo en `search`.
+        """
+        # Un candado por cubo: serializa las escrituras en segundo plano con las
+        # lecturas, porque el cliente local de Qdrant no admite accesos concurrentes.
+        self._cube_locks: dict[str, threading.RLock] = {}
+        self._cube_locks_guard = threading.Lock()
+        self.write_behind = write_behind
+        self._write_queue_size = write_queue_size
+        self._write_queue: WriteBehindQueue | None = None
+        self._search_workers = search_workers
+        self._search_pool: ThreadPoolExecutor | None = None
+        self._lifecycle: dict[str, MemoryLifecycleManager] = {}
+        # Los cubos con Qdrant local comparten un único cliente por ruta (entre cubos
+        # y entre instancias de MOS), así no hace falta destruir el MOS para recargar.
+        # El `vector_db` del cubo acepta además cuantización, HNSW y `on_disk`.
+        install_qdrant_tuning()
+        # Backend "numpy" (en memoria, sin ficheros) para cubos pequeños.
+        install_numpy_vecdb()
+        # La memoria de activación se guarda en safetensors (mmap) en lugar de pickle.
+        install_safe_kv_cache()
+        super().__init__(config)
+        # Etapas de LLM de `chat` y de la extracción de tree_text (ver `memos_ext.telemetry`).
+        self.chat_llm.generate = traced("llm.chat")(self.chat_llm.generate)
+        self.mem_reader.get_memory = traced("llm.extract")(self.mem_reader.get_memory)
+
+    def _cube_lock(self, mem_cube_id: str) -> threading.RLock:
+        # Si el cubo usa el cliente local compartido, el candado es el de ese cliente:
+        # así se serializan también los accesos desde otras instancias de MOS.
+        mem_cube = self.mem_cubes.get(mem_cube_id)
+        if mem_cube is not None and mem_cube.text_mem is not None:
+            shared_lock = getattr(mem_cube.text_mem.vector_db, "lock", None)
+            if shared_lock is not None:
+                return shared_lock
+        with self._cube_locks_guard:
+            return self._cube_locks.setdefault(mem_cube_id, threading.RLock())
+
+    @property
+    def write_queue(self) -> WriteBehindQueue:
+        """Cola de escritura diferida, creada la primera vez que se usa."""
+        if self._write_queue is None:
+            self._write_queue = WriteBehindQueue(maxsize=self._write_queue_size)
+        return self._write_queue
+
+    def add(
+        self,
+        messages: MessageList | None = None,
+        memory_content: str | None = None,
+        doc_path: str | None = None,
+        mem_cube_id: str | None = None,
+        user_id: str | None = None,
+        async_mode: bool | None = None,
+    ) -> Future | None:
+        """
+        Igual que `MOS.add`, con la opción de ejecutarlo en segundo plano.
+
+        Args:
+            async_mode (bool, optional): Si es True, la extracción, el embedding y la
+                escritura se hacen en el hilo de write-behind y se devuelve un `Future`
+                que se completa cuando la memoria está guardada. Por defecto se usa el
+                valor de `write_behind` con el que se creó el MOS.
+            (resto): Los mismos argumentos que `MOS.add`.
+
+        Returns:
+            Future | None: El "ack" de la escritura en modo asíncrono; None en modo síncrono.
+        """
+        # Resolvemos el cubo ya, en el hilo del llamador, para que los errores de
+        # usuario/cubo se vean inmediatamente y no en el hilo de fondo.
+        mem_cube_id = self._resolve_cube_id(user_id, mem_cube_id)
+        tags = {"user_id": user_id if user_id is not None else self.user_id, "cube_id": mem_cube_id}
+        submitted_at = time.perf_counter()
+
+        def write() -> None:
+            record("add.queued", time.perf_counter() - submitted_at, **tags)
+            with span("add", **tags), self._cube_lock(mem_cube_id):
+                super(ExtendedMOS, self).add(
+                    messages=messages,
+                    memory_content=memory_content,
+                    doc_path=doc_path,
+                    mem_cube_id=mem_cube_id,
+                    user_id=user_id,
+                )
+
+        if async_mode if async_mode is not None else self.write_behind:
+            # El hilo de write-behind hereda las etiquetas de los spans activos.
+            return self.write_queue.submit(contextvars.copy_context().run, write)
+        write()
+        return None
+
+    def flush_writes(self, timeout: float | None = None) -> bool:
+        """Espera a que terminen las escrituras diferidas. Devuelve False si vence el plazo."""
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush(timeout)
+
+    @property
+    def search_pool(self) -> ThreadPoolExecutor:
+        """Pool acotado para consultar varios cubos a la vez, creado la primera vez que se usa."""
+        if self._search_pool is None:
+            self._search_pool = ThreadPoolExecutor(
+                max_workers=self._search_workers, thread_name_prefix="memos-search"
+            )
+        return self._search_pool
+
+    def search(
+        self,
+        query: str,
+        user_id: str | None = None,
+        install_cube_ids: list[str] | None = None,
+        top_k: int | None = None,
+        wait_for_writes: bool = False,
+        timeout: float | None = None,
+        filter: dict[str, Any] | None = None,
+    ) -> MOSSearchResult:
+        """
+        Igual que `MOS.search`, pero consultando todos los cubos a la vez.
+
+        La consulta se vectoriza una sola vez por embedder distinto, cada cubo se busca
+        en el pool `search_pool` y de todos los resultados se conservan las `top_k`
+        memorias de mayor puntuación (agrupadas por cubo, como en `MOS.search`).
+
+        Args:
+            wait_for_writes (bool): Si es True, espera antes a que terminen las escrituras
+                diferidas, de modo que la búsqueda vea lo último que se añadió.
+            timeout (float, optional): Segundos máximos de espera por los cubos. Los que
+                no respondan a tiempo se omiten (resultado parcial) con un aviso en el log.
+            filter (dict, optional): Filtro por metadatos aplicado dentro de la base
+                vectorial, p. ej. `{"session_id": "...", "status": "activated",
+                "updated_at": {"gte": "2025-07-01T00:00:00"}}` (ver `memos_ext.filters`).
+            (resto): Los mismos argumentos que `MOS.search`.
+        """
+        if wait_for_writes:
+            self.flush_writes()
+        target_user_id = user_id if user_id is not None else self.user_id
+        with span("search", user_id=target_user_id):
+            return self._search(query, target_user_id, install_cube_ids, top_k, timeout, filter)
+
+    def _search(
+        self,
+        query: str,
+        target_user_id: str,
+        install_cube_ids: list[str] | None,
+        top_k: int | None,
+        timeout: float | None,
+        filter: dict[str, Any] | None,
+    ) -> MOSSearchResult:
+        started = time.perf_counter()
+        self._validate_user_exists(target_user_id)
+        cube_ids = self._searchable_cube_ids(target_user_id, install_cube_ids)
+        top_k = top_k if top_k else self.config.top_k
+
+        result: MOSSearchResult = {"text_mem": [], "act_mem": [], "para_mem": []}
+        if not cube_ids:
+            return result
+
+        # Un embedding de la consulta por embedder distinto (normalmente, uno solo).
+        query_vectors: dict[str, list[float]] = {}
+        tasks = {}
+        for mem_cube_id in cube_ids:
+            text_mem = self.mem_cubes[mem_cube_id].text_mem
+            key = embedder_key(text_mem)
+            if key is None:
+                tasks[mem_cube_id] = (self._search_cube_by_text, query)
+                continue
+            if key not in query_vectors:
+                with span("search.embed", cube_id=mem_cube_id):
+                    query_vectors[key] = text_mem.embedder.embed([query])[0]
+            tasks[mem_cube_id] = (self._search_cube_scored, query_vectors[key])
+        search_kwargs = {"top_k": top_k, "filter": filter}
+        embedded = time.perf_counter()
+
+        hits_by_cube: dict[str, ScoredMemories] = {}
+        if len(tasks) == 1 and timeout is None:
+            # Un solo cubo: sin saltar a otro hilo.
+            ((mem_cube_id, (search_fn, query_arg)),) = tasks.items()
+            hits_by_cube[mem_cube_id] = search_fn(mem_cube_id, query_arg, **search_kwargs)
+        else:
+            futures = {
+                self.search_pool.submit(
+                    contextvars.copy_context().run, search_fn, mem_cube_id, query_arg, **search_kwargs
+                ): mem_cube_id
+                for mem_cube_id, (search_fn, query_arg) in tasks.items()
+            }
+            done, not_done = wait(futures, timeout=timeout)
+            if not_done:
+                logger.warning(
+                    f"Search timed out after {timeout}s on cubes "
+                    f"{sorted(futures[future] for future in not_done)}; returning partial results"
+                )
+            for future in done:
+                try:
+                    hits_by_cube[futures[future]] = future.result()
+                except Exception as e:
+                    logger.error(f"Search failed on cube {futures[future]}: {e}")
+            # Conservamos el orden de los cubos del usuario.
+            hits_by_cube = {c: hits_by_cube[c] for c in cube_ids if c in hits_by_cube}
+
+        searched = time.perf_counter()
+        with span("search.merge"):
+            result["text_mem"] = merge_top_k(hits_by_cube, top_k)
+        timings = {
+            "embed": embedded - started,
+            "vector": searched - embedded,
+            "total": time.perf_counter() - started,
+        }
+        log_search_summary(
+            logger, target_user_id, hits_by_cube, len(cube_ids), top_k, timings, kept=result["text_mem"]
+        )
+        return result
+
+    def _searchable_cube_ids(
+        self, user_id: str, install_cube_ids: list[str] | None = None
+    ) -> list[str]:
+        """Cubos cargados, accesibles para el usuario y con memoria textual, como en `MOS.search`."""
+        if not self.config.enable_textual_memory:
+            return []
+        if install_cube_ids is None:
+            install_cube_ids = [cube.cube_id for cube in self.user_manager.get_user_cubes(user_id)]
+        return [
+            mem_cube_id
+            for mem_cube_id in install_cube_ids
+            if mem_cube_id in self.mem_cubes and self.mem_cubes[mem_cube_id].text_mem is not None
+        ]
+
+    def register_mem_cube(
+        self,
+        mem_cube_name_or_path: str | GeneralMemCube,
+        mem_cube_id: str | None = None,
+        user_id: str | None = None,
+        memory_types: list[MemoryType] | None = None,
+        lazy: bool = True,
+    ) -> None:
+        """
+        Igual que `MOS.register_mem_cube`, pero los cubos de un directorio local se
+        crean como `LazyMemCube`: cada memoria se construye y carga en su primer uso.
+
+        Args:
+            memory_types (list[str], optional): Tipos de memoria a habilitar en el cubo
+                (p. ej. `["text_mem"]` para un servicio que solo busca). Por defecto, todos.
+            lazy (bool): Si es False, se usa la carga completa de `GeneralMemCube`.
+            (resto): Los mismos argumentos que `MOS.register_mem_cube`.
+        """
+        if (
+            isinstance(mem_cube_name_or_path, str)
+            and os.path.exists(mem_cube_name_or_path)
+            and (mem_cube_id or mem_cube_name_or_path) not in self.mem_cubes
+        ):
+            mem_cube_id = mem_cube_id or mem_cube_name_or_path
+            if lazy:
+                mem_cube_name_or_path = LazyMemCube.init_from_dir(
+                    mem_cube_name_or_path, memory_types=memory_types
+                )
+            else:
+                mem_cube = GeneralMemCube(
+                    GeneralMemCubeConfig.from_json_file(
+                        os.path.join(mem_cube_name_or_path, "config.json")
+                    )
+                )
+                load_mem_cube(mem_cube, mem_cube_name_or_path, memory_types)
+                mem_cube_name_or_path = mem_cube
+        registered = set(self.mem_cubes)
+        super().register_mem_cube(mem_cube_name_or_path, mem_cube_id=mem_cube_id, user_id=user_id)
+        for new_cube_id in set(self.mem_cubes) - registered:
+            install_telemetry(self.mem_cubes[new_cube_id], cube_id=new_cube_id)
+
+    def reload_cube(self, mem_cube_id: str, path: str, user_id: str | None = None) -> None:
+        """
+        Sustituye en caliente el contenido de un cubo registrado por el de un volcado.
+
+        Se conservan el objeto cubo, sus modelos (embedder, LLM extractor), el cliente de
+        Qdrant y lo instalado sobre ellos (deduplicación, caché de embeddings): se vacían
+        las memorias ya construidas (la colección y la caché KV de `act_mem`) y se carga
+        el snapshot (base + segmentos, ver `CubeSnapshotter`). Las memorias de un
+        `LazyMemCube` aún sin construir se cargarán directamente del volcado nuevo.
+
+        Args:
+            mem_cube_id (str): Cubo a recargar.
+            path (str): Directorio del volcado o snapshot.
+            user_id (str, optional): Usuario con acceso al cubo. Por defecto, el del MOS.
+        """
+        mem_cube_id = self._resolve_cube_id(user_id, mem_cube_id)
+        mem_cube = self.mem_cubes[mem_cube_id]
+        self.flush_writes()
+        tags = {"user_id": user_id or self.user_id, "cube_id": mem_cube_id}
+        with span("load", **tags), self._cube_lock(mem_cube_id):
+            # `KVCacheMemory.load` no toca las entradas en memoria si el volcado no trae
+            # caché, y la memoria textual solo añade puntos: sin vaciarlas, lo anterior
+            # sobreviviría a la recarga. (La paramétrica, LoRA, no guarda estado en memoria.)
+            # Se leen los atributos privados para no construir las memorias pendientes.
+            for memory_type in MEMORY_TYPES:
+                memory = getattr(mem_cube, f"_{memory_type}", None)
+                if memory is not None and hasattr(memory, "delete_all"):
+                    memory.delete_all()
+            CubeSnapshotter(mem_cube, path).restore()
+        logger.info(f"Reloaded MemCube {mem_cube_id} from {path}")
+
+    def unregister_mem_cube(
+        self, mem_cube_id: str, user_id: str | None = None, close: bool = False
+    ) -> None:
+        """
+        Igual que `MOS.unregister_mem_cube`, esperando antes a las escrituras diferidas.
+
+        Args:
+            close (bool): Si es True, suelta también el cliente de Qdrant del cubo (el
+                bloqueo del almacén local se libera cuando nadie más lo usa).
+        """
+        self.flush_writes()
+        self.stop_lifecycle(mem_cube_id)
+        mem_cube = self.mem_cubes.get(mem_cube_id)
+        super().unregister_mem_cube(mem_cube_id, user_id=user_id)
+        with self._cube_locks_guard:
+            self._cube_locks.pop(mem_cube_id, None)
+        if close and mem_cube is not None and mem_cube.text_mem is not None:
+            release = getattr(mem_cube.text_mem.vector_db, "close", None)
+            if release is not None:
+                release()
+
+    def dump(
+        self,
+        dump_dir: str,
+        user_id: str | None = None,
+        mem_cube_id: str | None = None,
+        dtype: str = "float32",
+    ) -> None:
+        """
+        Igual que `MOS.dump`, pero con la memoria textual en binario (`storage.dump_mem_cube`)
+        y sin solaparse con escrituras en curso sobre el cubo.
+
+        Args:
+            dtype (str): `"float32"` o `"float16"` para los vectores en disco.
+            (resto): Los mismos argumentos que `MOS.dump`.
+        """
+        mem_cube_id = self._resolve_cube_id(user_id, mem_cube_id)
+        tags = {"user_id": user_id or self.user_id, "cube_id": mem_cube_id}
+        with span("dump", **tags), self._cube_lock(mem_cube_id):
+            dump_mem_cube(self.mem_cubes[mem_cube_id], dump_dir, dtype=dtype)
+        logger.info(f"MemCube {mem_cube_id} dumped to {dump_dir}")
+
+    def chat(self, query: str, user_id: str | None = None, base_prompt: str | None = None) -> str:
+        """Igual que `MOS.chat`, medido como la etapa "chat" (ver `memos_ext.telemetry`)."""
+        with span("chat", user_id=user_id if user_id is not None else self.user_id):
+            return super().chat(query, user_id=user_id, base_prompt=base_prompt)
+
+    def chat_stream(
+        self,
+        query: str,
+        user_id: str | None = None,
+        base_prompt: str | None = None,
+        persist: bool = True,
+    ) -> Generator[str, None, None]:
+        """
+        Versión en streaming de `chat`: devuelve los tokens a medida que los genera el LLM.
+
+        Mientras se buscan las memorias (`search`, todos los cubos en paralelo) y se
+        construye el prompt, otro hilo abre la conexión con la API del LLM de chat, de
+        modo que la petición en streaming suele salir por una conexión ya establecida (sin
+        esperar a que termine el warm-up). Cuando
+        el stream termina, el turno se añade al historial y, con `persist`, a la memoria
+        (`add`, en segundo plano si el MOS usa write-behind). Si el consumidor abandona
+        el stream antes del final, no se guarda nada. No usa memoria de activación.
+
+        Con `remove_think_prefix` en el LLM de chat, el razonamiento (`reasoning_content`
+        o el bloque `<think>` inicial) no se devuelve ni se guarda, igual que en `chat`.
+
+        Args:
+            query (str): Mensaje del usuario.
+            user_id (str, optional): Usuario. Por defecto, el del MOS.
+            base_prompt (str, optional): Prompt base, como en `MOS.chat`.
+            persist (bool): Si es True, guarda el turno en la memoria del usuario al terminar.
+
+        Yields:
+            str: Fragmentos de la respuesta.
+        """
+        started = time.perf_counter()
+        target_user_id = user_id if user_id is not None else self.user_id
+        # No se espera al warm-up: si aún no ha terminado cuando sale la petición, el
+        # stream abre su propia conexión, que no cuesta más que no haber calentado.
+        self.search_pool.submit(self._warm_chat_connection)
+
+        memories: list[TextualMemoryItem] = []
+        if self.config.enable_textual_memory and self.mem_cubes:
+            search_result = self.search(query, user_id=target_user_id)
+            memories = [memory for entry in search_result["text_mem"] for memory in entry["memories"]]
+        messages = self._chat_messages(query, target_user_id, memories, base_prompt)
+        parts: list[str] = []
+        for token in self._generate_stream(messages):
+            if not parts:
+                record("chat.first_token", time.perf_counter() - started, user_id=target_user_id)
+            parts.append(token)
+            yield token
+        record("chat", time.perf_counter() - started, user_id=target_user_id)
+
+        response = "".join(parts)
+        chat_history = self.chat_history_manager[target_user_id]
+        chat_history.chat_history.append({"role": "user", "content": query})
+        chat_history.chat_history.append({"role": "assistant", "content": response})
+        if persist and self.config.enable_textual_memory and self.mem_cubes:
+            self.add(
+                messages=[{"role": "user", "content": query}, {"role": "assistant", "content": response}],
+                user_id=target_user_id,
+            )
+
+    def _chat_messages(
+        self,
+        query: str,
+        user_id: str,
+        memories: list[TextualMemoryItem],
+        base_prompt: str | None = None,
+    ) -> MessageList:
+        """Mensajes para el LLM de chat (prompt de sistema con memorias + historial), como `MOSCore.chat`."""
+        if user_id not in self.chat_history_manager:
+            self._register_chat_history(user_id)
+        return [
+            {"role": "system", "content": self._build_system_prompt(memories, base_prompt=base_prompt)},
+            *self.chat_history_manager[user_id].chat_history,
+            {"role": "user", "content": query},
+        ]
+
+    def _warm_chat_connection(self) -> None:
+        """
+        Abre (o renueva) la conexión keep-alive con la API del LLM de chat.
+
+        Hace una petición ligera (`GET /models`) con el mismo cliente HTTP que usará el
+        stream. Solo para backends compatibles con OpenAI; los fallos se ignoran.
+        """
+        if self.config.chat_model.backend not in OPENAI_COMPATIBLE_BACKENDS:
+            return
+        client = getattr(self.chat_llm, "client", None)
+        if client is None:
+            return
+        try:
+            with span("chat.warm_up"):
+                client.models.list()
+        except Exception as e:
+            logger.debug(f"Chat connection warm-up failed: {e}")
+
+    def _generate_stream(self, messages: MessageList) -> Generator[str, None, None]:
+        """Tokens del LLM de chat, sin razonamiento si el LLM tiene `remove_think_prefix`."""
+        if not getattr(self.chat_llm.config, "remove_think_prefix", False):
+            yield from self._raw_stream(messages)
+            return
+        think_filter = ThinkTagFilter()
+        for chunk in self._raw_stream(messages):
+            text = think_filter.feed(chunk)
+            if text:
+                yield text
+        text = think_filter.finish()
+        if text:
+            yield text
+
+    def _raw_stream(self, messages: MessageList) -> Generator[str, None, None]:
+        """
+        Stream del LLM de chat, o la respuesta completa si el backend no hace streaming.
+
+        Con los backends compatibles con OpenAI se lee el stream del cliente: el
+        `generate_stream` de MemOS mezcla `reasoning_content` con la respuesta (sin
+        etiquetas con `remove_think_prefix`, y siempre en Deepseek).
+        """
+        client = getattr(self.chat_llm, "client", None)
+        if self.config.chat_model.backend in OPENAI_COMPATIBLE_BACKENDS and client is not None:
+            yield from stream_chat_completion(client, self.chat_llm.config, messages)
+            return
+        try:
+            stream = self.chat_llm.generate_stream(messages)
+            first = next(stream, None)
+        except NotImplementedError:
+            with span("llm.chat"):
+                yield self.chat_llm.generate(messages)
+            return
+        if first is not None:
+            yield first
+        yield from stream
+
+    def start_lifecycle(
+        self, mem_cube_id: str, archive_dir: str, interval: float = DEFAULT_INTERVAL, **options
+    ) -> MemoryLifecycleManager:
+        """
+        Programa el resumen y archivo de las memorias antiguas de un cubo (ver `memos_ext.lifecycle`).
+
+        Las pasadas comparten el candado del cubo con `add` y `search`, pero lo sueltan
+        mientras el LLM resume, así que no bloquean las búsquedas.
+
+        Args:
+            mem_cube_id (str): Cubo registrado.
+            archive_dir (str): Directorio del archivo en disco.
+            interval (float): Segundos entre pasadas.
+            **options: Parámetros de `MemoryLifecycleManager` (`max_hot`, `stale_after`,
+                `budget_seconds`, `max_llm_calls`, ...).
+
+        Returns:
+            MemoryLifecycleManager: El gestor en marcha (`run_once`, `search_archive`).
+        """
+        self.stop_lifecycle(mem_cube_id)
+        manager = MemoryLifecycleManager(
+            self.mem_cubes[mem_cube_id],
+            archive_dir,
+            lock=self._cube_lock(mem_cube_id),
+            cube_id=mem_cube_id,
+            **options,
+        )
+        manager.start(interval)
+        self._lifecycle[mem_cube_id] = manager
+        return manager
+
+    def stop_lifecycle(self, mem_cube_id: str) -> None:
+        """Detiene las pasadas de mantenimiento de un cubo, si las hay."""
+        manager = self._lifecycle.pop(mem_cube_id, None)
+        if manager is not None:
+            manager.stop()
+
+    def close(self) -> None:
+        """Detiene el mantenimiento, vacía la cola de escritura diferida y el pool de búsqueda."""
+        for mem_cube_id in list(self._lifecycle):
+            self.stop_lifecycle(mem_cube_id)
+        if self._write_queue is not None:
+            self._write_queue.close()
+            self._write_queue = None
+        if self._search_pool is not None:
+            self._search_pool.shutdown(wait=True)
+            self._search_pool = None
+
+    def _str_memories(self, memories: list[TextualMemoryItem], mode: str = "full") -> str:
+        """
+        Usado por `MOS.chat` en su log INFO de memorias: ids en INFO, contenido solo en DEBUG.
+
+        `MOSCore` formatea el texto y los metadatos de cada memoria aunque el log no se use;
+        aquí ese formateo solo ocurre con el nivel DEBUG activo.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            return super()._str_memories(memories, mode=mode)
+        return format_memories_compact(memories)
+
+    def _resolve_cube_id(self, user_id: str | None, mem_cube_id: str | None) -> str:
+        """
+        Elige el cubo destino igual que `MOSCore.add`: el indicado o el primero del usuario.
+
+        Raises:
+            ValueError: Si el usuario no tiene cubos o el cubo no está cargado.
+        """
+        target_user_id = user_id if user_id is not None else self.user_id
+        if mem_cube_id is None:
+            accessible_cubes = self.user_manager.get_user_cubes(target_user_id)
+            if not accessible_cubes:
+                raise ValueError(
+                    f"No accessible cubes found for user '{target_user_id}'. Please register a cube first."
+                )
+            mem_cube_id = accessible_cubes[0].cube_id
+        else:
+            self._validate_cube_access(target_user_id, mem_cube_id)
+
+        if mem_cube_id not in self.mem_cubes:
+            raise ValueError(f"MemCube '{mem_cube_id}' is not loaded. Please register.")
+        return mem_cube_id
+
+    def _session_id(self, user_id: str) -> str:
+        """Sesión de un usuario: la de su historial de chat o, si aún no tiene, la del MOS."""
+        chat_history = self.chat_history_manager.get(user_id)
+        return chat_history.session_id if chat_history is not None else self.session_id
+
+    def _conversation_items(
+        self, messages: MessageList, user_id: str | None = None, session_id: str | None = None
+    ) -> list[TextualMemoryItem]:
+        """
+        Convierte mensajes en memorias con los mismos metadatos que usa `MOSCore.add`.
+
+        Args:
+            messages (MessageList): Mensajes de la conversación.
+            user_id (str, optional): Propietario de las memorias. Por defecto, el del MOS.
+            session_id (str, optional): Sesión. Por defecto, la del usuario (`_session_id`).
+        """
+        user_id = user_id if user_id is not None else self.user_id
+        metadata = TextualMemoryMetadata(
+            user_id=user_id,
+            session_id=session_id or self._session_id(user_id),
+            source="conversation",
+        )
+        return [TextualMemoryItem(memory=message["content"], metadata=metadata) for message in messages]
+
+    def _write_items(
+        self, mem_cube_id: str, items: list[TextualMemoryItem], embeddings: list[list[float]]
+    ) -> None:
+        """Escribe memorias con embeddings ya calculados, respetando la deduplicación del cubo."""
+        text_mem = self.mem_cubes[mem_cube_id].text_mem
+        with self._cube_lock(mem_cube_id):
+            threshold = getattr(text_mem, "_dedup_threshold", None)
+            if threshold is not None:
+                write_with_dedup(text_mem, items, embeddings, threshold=threshold)
+            else:
+                with span("add.serialize", cube_id=mem_cube_id):
+                    points = [
+                        VecDBItem(id=item.id, vector=vector, payload=item.model_dump())
+                        for item, vector in zip(items, embeddings, strict=True)
+                    ]
+                text_mem.vector_db.add(points)
+
+    def _search_cube_scored(
+        self,
+        mem_cube_id: str,
+        query_vector: list[float],
+        top_k: int,
+        filter: dict[str, Any] | None = None,
+    ) -> ScoredMemories:
+        """Busca en un cubo con un vector de consulta ya calculado (como `text_mem.search`)."""
+        text_mem = self.mem_cubes[mem_cube_id].text_mem
+        with span("search.vector", cube_id=mem_cube_id), self._cube_lock(mem_cube_id):
+            hits = text_mem.vector_db.search(query_vector, top_k, normalize_filter(filter) or None)
+        with span("search.deserialize", cube_id=mem_cube_id):
+            hits = sorted(hits, key=lambda hit: hit.score, reverse=True)
+            return [(hit.score, TextualMemoryItem(**hit.payload)) for hit in hits]
+
+    def _search_cube_by_text(
+        self, mem_cube_id: str, query: str, top_k: int, filter: dict[str, Any] | None = None
+    ) -> ScoredMemories:
+        """Búsqueda delegada en `text_mem.search` para memorias sin base vectorial propia."""
+        with span("search.vector", cube_id=mem_cube_id), self._cube_lock(mem_cube_id):
+            memories = self.mem_cubes[mem_cube_id].text_mem.search(query, top_k=top_k)
+        # Sin base vectorial no hay filtro previo: se filtra el resultado.
+        return [(None, memory) for memory in memories if matches(memory.model_dump(), filter)]
+
+    def add_many(
+        self,
+        batches: list[MessageList],
+        user_id: str | None = None,
+        mem_cube_id: str | None = None,
+        embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+        upsert_batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+        embed_workers: int = DEFAULT_EMBED_WORKERS,
+        upsert_workers: int = 1,
+    ) -> int:
+        """
+        Versión masiva de `add(messages=...)` para importar muchas conversaciones.
+
+        Cada mensaje se convierte en una memoria con los mismos metadatos que usa
+        `MOSCore.add`, pero los embeddings se piden por lotes y las escrituras se
+        agrupan (ver `memos_ext.bulk.bulk_add`). Las memorias son del usuario indicado
+        y cada conversación lleva su propio `session_id`. El candado del cubo solo se
+        toma en las escrituras: las búsquedas y `add` no esperan a los embeddings.
+
+        Args:
+            batches (list[MessageList]): Lista de conversaciones (cada una, una lista de mensajes).
+            user_id (str, optional): Usuario propietario. Por defecto, el del MOS.
+            mem_cube_id (str, optional): Cubo destino. Por defecto, el primero del usuario.
+            embed_batch_size (int): Textos por llamada al embedder.
+            upsert_batch_size (int): Puntos por escritura en la base vectorial.
+            embed_workers (int): Lotes de embeddings en paralelo.
+            upsert_workers (int): Escrituras en paralelo (1 con Qdrant local).
+
+        Returns:
+            int: Número de memorias añadidas.
+        """
+        mem_cube_id = self._resolve_cube_id(user_id, mem_cube_id)
+        mem_cube = self.mem_cubes[mem_cube_id]
+        if not (self.config.enable_textual_memory and mem_cube.text_mem):
+            return 0
+
+        if mem_cube.config.text_mem.backend == "tree_text":
+            # El lector de memoria de tree_text tiene su propio flujo: lo delegamos en `add`.
+            for messages in batches:
+                self.add(messages=messages, mem_cube_id=mem_cube_id, user_id=user_id)
+            return len(batches)
+
+        target_user_id = user_id if user_id is not None else self.user_id
+        items = [
+            item
+            for messages in batches
+            for item in self._conversation_items(messages, target_user_id, str(uuid.uuid4()))
+        ]
+        with span("add", user_id=target_user_id, cube_id=mem_cube_id):
+            added = bulk_add(
+                mem_cube.text_mem,
+                items,
+                embed_batch_size=embed_batch_size,
+                upsert_batch_size=upsert_batch_size,
+                embed_workers=embed_workers,
+                upsert_workers=upsert_workers,
+                lock=self._cube_lock(mem_cube_id),
+            )
+        logger.info(f"Add {added} memories from {len(batches)} conversations to {mem_cube_id}")
+        return added
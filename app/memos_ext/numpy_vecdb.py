@@ -0,0 +1,320 @@
+# --- Backend vectorial en memoria con NumPy (fuerza bruta) para cubos pequeños ---
+# La mayoría de los cubos por usuario son como `mem_cube_2`: de decenas a unos miles
+# de memorias. Pasarlos por el cliente local de Qdrant (`storage.sqlite` + `.lock`
+# por proceso) cuesta más que una multiplicación de matrices.
+#
+# `NumpyVecDB` guarda los vectores en una matriz float32 contigua y responde el top-k
+# con un único producto escalar (vectores normalizados para coseno) y `argpartition`.
+# No escribe nada en disco por sí mismo: se persiste con el dump/load del cubo.
+# Con `promote_threshold`, cuando el cubo crece por encima del umbral sus puntos se
+# copian a Qdrant (`promote_to`) y a partir de ahí todas las operaciones van allí.
+# La promoción deja un fichero marcador (`promotion_marker`): al abrir el cubo solo
+# se conecta con Qdrant si el marcador existe.
+#
+# En el `config.json` del cubo:
+#   "vector_db": {"backend": "numpy", "config": {
+#       "collection_name": "...", "vector_dimension": 768, "distance_metric": "cosine",
+#       "promote_threshold": 5000, "promote_to": {"path": ".memos/qdrant"}}}
+import functools
+import json
+import os
+import threading
+
+from datetime import datetime
+
+from typing import Any
+
+import numpy as np
+
+from pydantic import Field
+
+from memos.configs.vec_db import BaseVecDBConfig, VectorDBConfigFactory
+from memos import settings
+from memos.log import get_logger
+from memos.vec_dbs.base import BaseVecDB
+from memos.vec_dbs.factory import VecDBFactory
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.filters import matches
+
+logger = get_logger(__name__)
+
+INITIAL_CAPACITY = 256
+
+
+class NumpyVecDBConfig(BaseVecDBConfig):
+    """Configuración de `NumpyVecDB`."""
+
+    promote_threshold: int | None = Field(
+        default=None, description="Número de puntos a partir del cual se migra a Qdrant"
+    )
+    promote_to: dict[str, Any] | None = Field(
+        default=None,
+        description="Configuración de Qdrant para la promoción (hereda nombre, dimensión y métrica)",
+    )
+    promotion_marker: str | None = Field(
+        default=None,
+        description="Fichero que marca la colección como promovida "
+        "(por defecto, `.memos/promoted/<collection_name>.json`)",
+    )
+
+
+def _delegate_when_promoted(method):
+    """Si el cubo ya se promovió a Qdrant, la llamada se hace sobre Qdrant."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # El estado se lee con el candado: una promoción en curso (dentro de `add`)
+        # termina antes de que otra llamada decida entre la matriz y Qdrant.
+        with self._lock:
+            promoted = self._promoted
+            if promoted is None:
+                return method(self, *args, **kwargs)
+        return getattr(promoted, method.__name__)(*args, **kwargs)
+
+    return wrapper
+
+
+class NumpyVecDB(BaseVecDB):
+    """Base vectorial en memoria (matriz float32 + búsqueda exacta)."""
+
+    def __init__(self, config: NumpyVecDBConfig):
+        self.config = config
+        self._lock = threading.RLock()
+        self._promoted: BaseVecDB | None = None
+        self._reset()
+
+        # Si una ejecución anterior ya promovió el cubo, Qdrant tiene los datos. Sin
+        # marcador no se abre Qdrant (ni se toma el `.lock` del almacén local).
+        if config.promote_to is not None and os.path.exists(self.marker_path):
+            self._promoted = self._promotion_target()
+            logger.info(f"Collection '{config.collection_name}' already promoted to Qdrant")
+
+    def _reset(self) -> None:
+        self._vectors = np.empty((0, self.config.vector_dimension or 0), dtype=np.float32)
+        self._size = 0
+        self._ids: list[str] = []
+        self._payloads: list[dict] = []
+        self._rows: dict[str, int] = {}
+
+    # --- Matriz ---
+
+    def _prepare(self, vector: list[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        if self.config.distance_metric == "cosine":
+            norm = np.linalg.norm(array)
+            if norm > 0:
+                array = array / norm
+        return array
+
+    def _ensure_capacity(self, rows: int, dimension: int) -> None:
+        if self._vectors.shape[1] != dimension:
+            if self._size:
+                raise ValueError(
+                    f"Vector dimension {dimension} does not match collection ({self._vectors.shape[1]})"
+                )
+            self._vectors = np.empty((0, dimension), dtype=np.float32)
+        if rows <= self._vectors.shape[0]:
+            return
+        capacity = max(INITIAL_CAPACITY, self._vectors.shape[0])
+        while capacity < rows:
+            capacity *= 2
+        grown = np.empty((capacity, dimension), dtype=np.float32)
+        grown[: self._size] = self._vectors[: self._size]
+        self._vectors = grown
+
+    def _item(self, row: int, score: float | None = None) -> VecDBItem:
+        return VecDBItem(
+            id=self._ids[row],
+            vector=self._vectors[row].tolist(),
+            payload=self._payloads[row],
+            score=score,
+        )
+
+    def _upsert(self, items: list[VecDBItem]) -> None:
+        if not items:
+            return
+        self._ensure_capacity(self._size + len(items), len(items[0].vector))
+        for item in items:
+            row = self._rows.get(item.id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[item.id] = row
+                self._ids.append(item.id)
+                self._payloads.append(item.payload or {})
+            else:
+                self._payloads[row] = item.payload or {}
+            self._vectors[row] = self._prepare(item.vector)
+
+    def _remove(self, memory_id: str) -> None:
+        """Borra una fila moviendo la última a su hueco (la matriz sigue contigua)."""
+        row = self._rows.pop(memory_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = self._ids[last]
+            self._payloads[row] = self._payloads[last]
+            self._rows[self._ids[row]] = row
+        self._ids.pop()
+        self._payloads.pop()
+        self._size -= 1
+
+    # --- Promoción a Qdrant ---
+
+    @property
+    def marker_path(self) -> str:
+        """Ruta del marcador de promoción."""
+        if self.config.promotion_marker:
+            return self.config.promotion_marker
+        return os.path.join(settings.MEMOS_DIR, "promoted", f"{self.config.collection_name}.json")
+
+    def _promotion_target(self) -> BaseVecDB:
+        config = {
+            "collection_name": self.config.collection_name,
+            "vector_dimension": self.config.vector_dimension,
+            "distance_metric": self.config.distance_metric,
+            **(self.config.promote_to or {}),
+        }
+        return VecDBFactory.from_config(VectorDBConfigFactory(backend="qdrant", config=config))
+
+    def _write_marker(self, points: int) -> None:
+        os.makedirs(os.path.dirname(self.marker_path) or ".", exist_ok=True)
+        tmp_path = self.marker_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "collection_name": self.config.collection_name,
+                    "promote_to": self.config.promote_to,
+                    "points": points,
+                    "promoted_at": datetime.now().isoformat(),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.marker_path)
+
+    def _maybe_promote(self) -> None:
+        threshold = self.config.promote_threshold
+        if threshold is None or self.config.promote_to is None or self._size <= threshold:
+            return
+        target = self._promotion_target()
+        batch_size = 1024
+        for start in range(0, self._size, batch_size):
+            target.add([self._item(row) for row in range(start, min(start + batch_size, self._size))])
+        # El marcador se escribe cuando Qdrant ya tiene todos los puntos.
+        self._write_marker(self._size)
+        logger.info(
+            f"Promoted collection '{self.config.collection_name}' to Qdrant ({self._size} points)"
+        )
+        self._promoted = target
+        self._reset()
+
+    @property
+    def promoted(self) -> bool:
+        """True si el cubo ya vive en Qdrant."""
+        return self._promoted is not None
+
+    # --- Interfaz de BaseVecDB ---
+
+    @_delegate_when_promoted
+    def create_collection(self) -> None:
+        """No hay nada que crear: la colección es la propia matriz."""
+
+    def list_collections(self) -> list[str]:
+        return [self.config.collection_name]
+
+    @_delegate_when_promoted
+    def delete_collection(self, name: str) -> None:
+        if name == self.config.collection_name:
+            self._reset()
+
+    def collection_exists(self, name: str) -> bool:
+        return name == self.config.collection_name
+
+    @_delegate_when_promoted
+    def search(
+        self, query_vector: list[float], top_k: int, filter: dict[str, Any] | None = None
+    ) -> list[VecDBItem]:
+        """Top-k exacto: un producto matriz-vector y `argpartition`."""
+        if self._size == 0 or top_k <= 0:
+            return []
+        rows = np.arange(self._size)
+        if filter:
+            rows = rows[[matches(self._payloads[row], filter) for row in rows]]
+            if rows.size == 0:
+                return []
+        matrix = self._vectors[rows] if filter else self._vectors[: self._size]
+        query = self._prepare(query_vector)
+
+        if self.config.distance_metric == "euclidean":
+            # Qdrant devuelve la distancia: menor es mejor.
+            scores = np.linalg.norm(matrix - query, axis=1)
+            order_key = scores
+        else:
+            scores = matrix @ query
+            order_key = -scores
+
+        k = min(top_k, rows.size)
+        best = np.argpartition(order_key, k - 1)[:k] if k < rows.size else np.arange(rows.size)
+        best = best[np.argsort(order_key[best], kind="stable")]
+        return [self._item(int(rows[i]), float(scores[i])) for i in best]
+
+    @_delegate_when_promoted
+    def get_by_id(self, id: str) -> VecDBItem | None:
+        row = self._rows.get(id)
+        return None if row is None else self._item(row)
+
+    @_delegate_when_promoted
+    def get_by_ids(self, ids: list[str]) -> list[VecDBItem]:
+        return [self._item(self._rows[i]) for i in ids if i in self._rows]
+
+    @_delegate_when_promoted
+    def get_by_filter(self, filter: dict[str, Any]) -> list[VecDBItem]:
+        return [self._item(row) for row in range(self._size) if matches(self._payloads[row], filter)]
+
+    @_delegate_when_promoted
+    def get_all(self) -> list[VecDBItem]:
+        return [self._item(row) for row in range(self._size)]
+
+    @_delegate_when_promoted
+    def count(self, filter: dict[str, Any] | None = None) -> int:
+        if not filter:
+            return self._size
+        return sum(matches(self._payloads[row], filter) for row in range(self._size))
+
+    @_delegate_when_promoted
+    def add(self, data: list[VecDBItem | dict[str, Any]]) -> None:
+        self._upsert([VecDBItem.from_dict(d) if isinstance(d, dict) else d for d in data])
+        self._maybe_promote()
+
+    @_delegate_when_promoted
+    def update(self, id: str, data: VecDBItem | dict[str, Any]) -> None:
+        if isinstance(data, dict):
+            data = VecDBItem.from_dict(data.copy())
+        row = self._rows.get(id)
+        if data.vector:
+            self._upsert([VecDBItem(id=id, vector=data.vector, payload=data.payload)])
+        elif row is not None:
+            # Actualización solo de payload: se fusiona, como `set_payload` en Qdrant.
+            self._payloads[row] = {**self._payloads[row], **(data.payload or {})}
+
+    @_delegate_when_promoted
+    def upsert(self, data: list[VecDBItem | dict[str, Any]]) -> None:
+        self.add(data)
+
+    @_delegate_when_promoted
+    def delete(self, ids: list[str]) -> None:
+        for memory_id in ids:
+            self._remove(memory_id)
+
+    @_delegate_when_promoted
+    def ensure_payload_indexes(self, fields: list[str]) -> None:
+        """Sin índices: los filtros (ver `memos_ext.filters`) recorren los payloads en memoria."""
+
+
+def install_numpy_vecdb() -> None:
+    """Registra el backend "numpy" en las factorías de configuración y de bases vectoriales."""
+    VectorDBConfigFactory.backend_to_class["numpy"] = NumpyVecDBConfig
+    VecDBFactory.backend_to_class["numpy"] = NumpyVecDB
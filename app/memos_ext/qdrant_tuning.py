@@ -0,0 +1,207 @@
+# --- Cuantización, HNSW y almacenamiento en disco para la colección de Qdrant ---
+# `QdrantVecDB` crea la colección solo con tamaño y distancia (`.memos/qdrant/meta.json`
+# muestra `hnsw_config: null`, `quantization_config: null`, `on_disk: null`): cada
+# vector de 768 floats se guarda en RAM con los parámetros del índice por defecto.
+#
+# `TunedQdrantVecDBConfig` amplía la configuración de `text_mem.vector_db` del cubo
+# (el `config.json`), de modo que se puede escribir, por ejemplo:
+#   "vector_db": {"backend": "qdrant", "config": {
+#       "collection_name": "...", "vector_dimension": 768, "distance_metric": "cosine",
+#       "quantization": "scalar", "on_disk": true, "hnsw_m": 16, "search_ef": 128}}
+# `TunedQdrantVecDB` aplica esos parámetros al crear la colección, los migra sobre
+# una colección existente (`update_collection`) y busca reevaluando (`rescore`) los
+# candidatos con los vectores originales. También crea los índices de payload de los
+# metadatos y acepta los filtros de `memos_ext.filters` (igualdad, listas y rangos).
+#
+# Nota: Qdrant en modo local (`path`) guarda estos parámetros pero busca por fuerza
+# bruta; la cuantización y el HNSW tienen efecto con un servidor Qdrant.
+from typing import Any, Literal
+
+from pydantic import Field
+
+from memos.configs.vec_db import QdrantVecDBConfig, VectorDBConfigFactory
+from memos.log import get_logger
+from memos.vec_dbs.factory import VecDBFactory
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.filters import METADATA_INDEXES, to_qdrant_filter
+from memos_ext.shared_qdrant import SharedQdrantVecDB
+
+logger = get_logger(__name__)
+
+
+class TunedQdrantVecDBConfig(QdrantVecDBConfig):
+    """`QdrantVecDBConfig` con parámetros de cuantización, HNSW y disco."""
+
+    quantization: Literal["scalar", "binary"] | None = Field(
+        default=None, description="Cuantización de los vectores: 'scalar' (int8) o 'binary'"
+    )
+    quantization_always_ram: bool = Field(
+        default=True, description="Mantener los vectores cuantizados siempre en RAM"
+    )
+    on_disk: bool | None = Field(default=None, description="Guardar los vectores originales en disco")
+    on_disk_payload: bool | None = Field(default=None, description="Guardar los payloads en disco")
+    hnsw_m: int | None = Field(default=None, description="Aristas por nodo del grafo HNSW")
+    hnsw_ef_construct: int | None = Field(default=None, description="ef al construir el índice HNSW")
+    search_ef: int | None = Field(default=None, description="ef (hnsw_ef) en cada búsqueda")
+    rescore: bool = Field(
+        default=True, description="Reevaluar con los vectores originales al buscar con cuantización"
+    )
+    oversampling: float | None = Field(
+        default=None, description="Factor de candidatos extra antes del rescore (p. ej. 2.0)"
+    )
+
+
+class TunedQdrantVecDB(SharedQdrantVecDB):
+    """`SharedQdrantVecDB` que aplica la configuración de `TunedQdrantVecDBConfig`."""
+
+    def _tuning(self, name: str, default: Any = None) -> Any:
+        # Cubos cuyo config se leyó antes de instalar el backend traen un
+        # `QdrantVecDBConfig` sin estos campos: se usan los valores por defecto.
+        return getattr(self.config, name, default)
+
+    def _hnsw_config(self):
+        from qdrant_client.http import models
+
+        m, ef_construct = self._tuning("hnsw_m"), self._tuning("hnsw_ef_construct")
+        if m is None and ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=m, ef_construct=ef_construct)
+
+    def _quantization_config(self):
+        from qdrant_client.http import models
+
+        always_ram = self._tuning("quantization_always_ram", True)
+        quantization = self._tuning("quantization")
+        if quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=always_ram
+                )
+            )
+        if quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+            )
+        return None
+
+    def _is_tuned(self) -> bool:
+        return any(
+            self._tuning(name) is not None
+            for name in ("quantization", "on_disk", "on_disk_payload", "hnsw_m", "hnsw_ef_construct")
+        )
+
+    def create_collection(self) -> None:
+        """Crea la colección con los parámetros de ajuste, o los migra si ya existe."""
+        from qdrant_client.http import models
+
+        if self.collection_exists(self.config.collection_name):
+            if self._is_tuned():
+                self.apply_tuning()
+            self.ensure_payload_indexes(list(METADATA_INDEXES))
+            return
+
+        distance_map = {
+            "cosine": models.Distance.COSINE,
+            "euclidean": models.Distance.EUCLID,
+            "dot": models.Distance.DOT,
+        }
+        self.client.create_collection(
+            collection_name=self.config.collection_name,
+            vectors_config=models.VectorParams(
+                size=self.config.vector_dimension,
+                distance=distance_map[self.config.distance_metric],
+                on_disk=self._tuning("on_disk"),
+            ),
+            hnsw_config=self._hnsw_config(),
+            quantization_config=self._quantization_config(),
+            on_disk_payload=self._tuning("on_disk_payload"),
+        )
+        self.ensure_payload_indexes(list(METADATA_INDEXES))
+        logger.info(
+            f"Collection '{self.config.collection_name}' created with {self.config.vector_dimension} "
+            f"dimensions (quantization={self._tuning('quantization')}, on_disk={self._tuning('on_disk')})"
+        )
+
+    def apply_tuning(self) -> None:
+        """
+        Migra una colección existente a los parámetros de la configuración.
+
+        Qdrant reconstruye el índice y la cuantización en segundo plano; la colección
+        sigue respondiendo mientras tanto.
+        """
+        from qdrant_client.http import models
+
+        on_disk = self._tuning("on_disk")
+        self.client.update_collection(
+            collection_name=self.config.collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=on_disk)} if on_disk is not None else None,
+            hnsw_config=self._hnsw_config(),
+            quantization_config=self._quantization_config(),
+            collection_params=(
+                models.CollectionParamsDiff(on_disk_payload=self._tuning("on_disk_payload"))
+                if self._tuning("on_disk_payload") is not None
+                else None
+            ),
+        )
+        logger.info(f"Applied tuning to existing collection '{self.config.collection_name}'")
+
+    def _dict_to_filter(self, filter_dict: dict[str, Any]) -> Any:
+        """Filtros con igualdad, listas y rangos (ver `memos_ext.filters`)."""
+        return to_qdrant_filter(filter_dict)
+
+    def ensure_payload_indexes(self, fields: list[str]) -> None:
+        """Crea (si faltan) índices de payload, con el tipo adecuado para los metadatos."""
+        if self._shared_path is not None:
+            # Qdrant local no usa índices de payload (filtra recorriendo los puntos).
+            return
+        for field in fields:
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.config.collection_name,
+                    field_name=field,
+                    field_schema=METADATA_INDEXES.get(field, "keyword"),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to create payload index on '{field}': {e}")
+
+    def _search_params(self):
+        from qdrant_client.http import models
+
+        quantization = None
+        if self._tuning("quantization") is not None:
+            quantization = models.QuantizationSearchParams(
+                rescore=self._tuning("rescore", True), oversampling=self._tuning("oversampling")
+            )
+        if quantization is None and self._tuning("search_ef") is None:
+            return None
+        return models.SearchParams(hnsw_ef=self._tuning("search_ef"), quantization=quantization)
+
+    def search(
+        self, query_vector: list[float], top_k: int, filter: dict[str, Any] | None = None
+    ) -> list[VecDBItem]:
+        """Igual que `QdrantVecDB.search`, con `hnsw_ef` y rescore según la configuración."""
+        response = self.client.search(
+            collection_name=self.config.collection_name,
+            query_vector=query_vector,
+            limit=top_k,
+            query_filter=self._dict_to_filter(filter) if filter else None,
+            search_params=self._search_params(),
+            with_vectors=True,
+            with_payload=True,
+        )
+        return [
+            VecDBItem(id=point.id, vector=point.vector, payload=point.payload, score=point.score)
+            for point in response
+        ]
+
+
+def install_qdrant_tuning() -> None:
+    """
+    Registra `TunedQdrantVecDBConfig` y `TunedQdrantVecDB` para el backend "qdrant".
+
+    Debe llamarse antes de leer el `config.json` del cubo (lo hace `ExtendedMOS` al
+    crearse). Incluye el cliente local compartido de `SharedQdrantVecDB`.
+    """
+    VectorDBConfigFactory.backend_to_class["qdrant"] = TunedQdrantVecDBConfig
+    VecDBFactory.backend_to_class["qdrant"] = TunedQdrantVecDB
@@ -0,0 +1,97 @@
+# --- Cliente local de Qdrant compartido entre cubos e instancias de MOS ---
+# En modo local (`path`, sin servidor) `QdrantClient` toma un bloqueo exclusivo
+# sobre el directorio `.memos/qdrant`: un segundo cliente sobre la misma ruta falla
+# ("already accessed by another instance") hasta que el primero se libera. Por eso
+# Trial01 tenía que hacer `del mos` y volver a inicializarlo todo para recargar.
+#
+# Aquí se mantiene un registro por proceso de clientes locales, indexado por la ruta
+# real del almacén y con contador de referencias. `SharedQdrantVecDB` es un
+# `QdrantVecDB` que pide su cliente a ese registro, de modo que varios cubos y varios
+# MOS del mismo proceso usan un único cliente, y comparten también un candado para
+# serializar los accesos (el cliente local no admite accesos concurrentes).
+import os
+import threading
+
+from memos.configs.vec_db import QdrantVecDBConfig
+from memos.log import get_logger
+from memos.vec_dbs.factory import VecDBFactory
+from memos.vec_dbs.qdrant import QdrantVecDB
+
+logger = get_logger(__name__)
+
+
+class _SharedClient:
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.RLock()
+        self.refs = 0
+
+
+_registry: dict[str, _SharedClient] = {}
+_registry_guard = threading.Lock()
+
+
+def acquire_local_client(path: str) -> _SharedClient:
+    """Devuelve el cliente local de `path`, creándolo la primera vez."""
+    from qdrant_client import QdrantClient
+
+    key = os.path.realpath(path)
+    with _registry_guard:
+        shared = _registry.get(key)
+        if shared is None:
+            shared = _registry[key] = _SharedClient(QdrantClient(path=path))
+            logger.info(f"Opened shared local Qdrant client at {key}")
+        shared.refs += 1
+        return shared
+
+
+def release_local_client(path: str) -> None:
+    """Suelta una referencia; con la última se cierra el cliente y su bloqueo de fichero."""
+    key = os.path.realpath(path)
+    with _registry_guard:
+        shared = _registry.get(key)
+        if shared is None:
+            return
+        shared.refs -= 1
+        if shared.refs <= 0:
+            del _registry[key]
+            shared.client.close()
+            logger.info(f"Closed shared local Qdrant client at {key}")
+
+
+class SharedQdrantVecDB(QdrantVecDB):
+    """`QdrantVecDB` que, en modo local, reutiliza el cliente compartido de su ruta."""
+
+    def __init__(self, config: QdrantVecDBConfig):
+        if config.host is not None or config.port is not None or config.path is None:
+            # Servidor Qdrant: cada cliente es solo una conexión HTTP, nada que compartir.
+            # Los atributos van antes de `super().__init__`, que ya crea la colección
+            # (y las subclases consultan `_shared_path` al crear los índices).
+            self.lock = threading.RLock()
+            self._shared_path = None
+            super().__init__(config)
+            return
+
+        self.config = config
+        shared = acquire_local_client(config.path)
+        self.client = shared.client
+        self.lock = shared.lock
+        self._shared_path = config.path
+        with self.lock:
+            self.create_collection()
+
+    def close(self) -> None:
+        """Suelta el cliente compartido (se cierra al soltarlo el último usuario)."""
+        if self._shared_path is not None:
+            release_local_client(self._shared_path)
+            self._shared_path = None
+
+
+def install_shared_qdrant() -> None:
+    """
+    Hace que los cubos que se creen a partir de ahora usen `SharedQdrantVecDB`.
+
+    Sustituye la entrada "qdrant" de `VecDBFactory`; los cubos ya creados no cambian.
+    Llamarla varias veces no tiene efecto adicional.
+    """
+    VecDBFactory.backend_to_class["qdrant"] = SharedQdrantVecDB
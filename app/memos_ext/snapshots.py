@@ -0,0 +1,316 @@
+# --- Volcados incrementales (snapshots) de un MemCube ---
+# En Trial01 cada guardado hacía `shutil.rmtree` + `mos.dump`, reescribiendo todas
+# las memorias, el `activation_memory.pickle` y la configuración aunque solo
+# hubiera cambiado un recuerdo.
+#
+# Un directorio de snapshot tiene:
+#   - Una base completa, con el mismo formato que `storage.dump_mem_cube`.
+#   - `snapshot_state.json`: `{id: updated_at}` de las memorias de la base.
+#   - `segments/000001.*`, `segments/000002.*`, ...: solo las memorias añadidas o
+#     actualizadas (`.vectors.npy` + `.payloads.jsonl`) y los ids borrados
+#     (`.deletes.json`) desde el checkpoint anterior.
+#   - `snapshot_manifest.json`: la lista ordenada de segmentos.
+# La carga reproduce base + segmentos y `compact_snapshot` los vuelve a plegar en la base.
+#
+# Uso desde la terminal para compactar (desde la carpeta `app/`):
+#   python -m memos_ext.snapshots compact ../tmp/my_mem_cube
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from memos.log import get_logger
+from memos_ext.storage import (
+    binary_paths,
+    dump_mem_cube,
+    load_mem_cube,
+    read_binary_memories,
+    upsert_binary_memories,
+    write_binary_memories,
+)
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = "snapshot_manifest.json"
+STATE_FILENAME = "snapshot_state.json"
+SEGMENTS_DIRNAME = "segments"
+DELETES_SUFFIX = ".deletes.json"
+
+# Tamaño de página al recorrer la colección para calcular el diff.
+SCAN_PAGE_SIZE = 1024
+
+
+def _write_json_atomic(path: str, data) -> None:
+    """Escribe un JSON de forma atómica (fichero temporal + `os.replace`)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _memory_filename(dir: str) -> str:
+    """Lee el nombre del fichero de memoria textual desde el `config.json` del volcado."""
+    config = _read_json(os.path.join(dir, "config.json"), default={})
+    text_config = (config.get("text_mem") or {}).get("config") or {}
+    return text_config.get("memory_filename", "textual_memory.json")
+
+
+def _read_base(dir: str, memory_filename: str) -> tuple[np.ndarray, list[dict]]:
+    """Lee la base del snapshot, sea binaria o el `textual_memory.json` antiguo."""
+    vectors_path, payloads_path = binary_paths(dir, memory_filename)
+    if os.path.exists(vectors_path) and os.path.exists(payloads_path):
+        return read_binary_memories(vectors_path, payloads_path)
+
+    legacy = _read_json(os.path.join(dir, memory_filename), default=[])
+    records = [{"id": m["id"], "payload": m.get("payload")} for m in legacy]
+    vectors = np.asarray([m["vector"] for m in legacy], dtype=np.float32)
+    return vectors, records
+
+
+def _version(payload: dict | None) -> str | None:
+    return ((payload or {}).get("metadata") or {}).get("updated_at")
+
+
+def scan_payloads(vector_db, fields: list[str] | None = None) -> dict[str, dict]:
+    """
+    Devuelve `{id: payload}` de todas las memorias de la base vectorial.
+
+    Con Qdrant se recorre la colección sin descargar los vectores, que es la parte
+    pesada, y solo con los campos pedidos; con otros backends se usa `get_all()`.
+
+    Args:
+        vector_db: La base vectorial del cubo (`text_mem.vector_db`).
+        fields (list, optional): Campos de primer nivel del payload (p. ej. `["metadata"]`).
+            Por defecto, el payload completo.
+    """
+    client = getattr(vector_db, "client", None)
+    if client is None or not hasattr(client, "scroll"):
+        return {str(item.id): item.payload or {} for item in vector_db.get_all()}
+
+    payloads = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=vector_db.config.collection_name,
+            limit=SCAN_PAGE_SIZE,
+            offset=offset,
+            with_payload=fields if fields is not None else True,
+            with_vectors=False,
+        )
+        for point in points:
+            payloads[str(point.id)] = point.payload or {}
+        if not points or offset is None:
+            break
+    return payloads
+
+
+def scan_versions(vector_db) -> dict[str, str | None]:
+    """Devuelve `{id: updated_at}` de todas las memorias de la base vectorial."""
+    return {
+        memory_id: _version(payload)
+        for memory_id, payload in scan_payloads(vector_db, ["metadata"]).items()
+    }
+
+
+class CubeSnapshotter:
+    """
+    Gestiona los checkpoints incrementales de un MemCube en un directorio.
+
+    Mantiene en memoria el último estado conocido (`{id: updated_at}`) para que
+    checkpoints consecutivos en la misma sesión no tengan que releer el disco.
+    """
+
+    def __init__(self, mem_cube, dir: str, dtype: str = "float32"):
+        self.mem_cube = mem_cube
+        self.dir = dir
+        self.dtype = dtype
+        self._versions: dict[str, str | None] | None = None
+
+    # --- Estado del snapshot ---
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.dir, MANIFEST_FILENAME)
+
+    def _manifest(self) -> dict:
+        return _read_json(self.manifest_path, default={"segments": []})
+
+    def _persisted_versions(self) -> dict[str, str | None]:
+        """Estado de la base + lo que aportan los segmentos, en orden."""
+        versions = dict(_read_json(os.path.join(self.dir, STATE_FILENAME), default={}))
+        for name in self._manifest()["segments"]:
+            prefix = os.path.join(self.dir, SEGMENTS_DIRNAME, name)
+            with open(prefix + ".payloads.jsonl", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        versions[record["id"]] = _version(record["payload"])
+            for memory_id in _read_json(prefix + DELETES_SUFFIX, default=[]):
+                versions.pop(memory_id, None)
+        return versions
+
+    def _adopt_legacy_dump(self) -> None:
+        """Convierte un volcado completo existente (sin manifiesto) en la base del snapshot."""
+        _, records = _read_base(self.dir, _memory_filename(self.dir))
+        _write_json_atomic(
+            os.path.join(self.dir, STATE_FILENAME),
+            {record["id"]: _version(record["payload"]) for record in records},
+        )
+        _write_json_atomic(self.manifest_path, {"segments": []})
+
+    # --- Operaciones ---
+
+    def checkpoint(self) -> dict[str, int]:
+        """
+        Guarda los cambios desde el último checkpoint.
+
+        La primera vez (directorio vacío) escribe una base completa. Después solo
+        escribe un segmento con las memorias nuevas/actualizadas y los ids borrados;
+        la memoria de activación, la paramétrica y la configuración no se reescriben.
+
+        Returns:
+            dict: Contadores `{"upserted": n, "deleted": m}` del checkpoint.
+        """
+        text_mem = self.mem_cube.text_mem
+        if not os.path.exists(self.manifest_path):
+            if os.path.exists(self.dir) and os.listdir(self.dir):
+                self._adopt_legacy_dump()
+            else:
+                os.makedirs(self.dir, exist_ok=True)
+                dump_mem_cube(self.mem_cube, self.dir, dtype=self.dtype)
+                self._versions = scan_versions(text_mem.vector_db)
+                _write_json_atomic(os.path.join(self.dir, STATE_FILENAME), self._versions)
+                _write_json_atomic(self.manifest_path, {"segments": []})
+                logger.info(f"Snapshot base written to {self.dir} ({len(self._versions)} memories)")
+                return {"upserted": len(self._versions), "deleted": 0}
+
+        if self._versions is None:
+            self._versions = self._persisted_versions()
+
+        current = scan_versions(text_mem.vector_db)
+        changed = [mid for mid, version in current.items() if self._versions.get(mid, "") != version]
+        deleted = [mid for mid in self._versions if mid not in current]
+        if not changed and not deleted:
+            return {"upserted": 0, "deleted": 0}
+
+        manifest = self._manifest()
+        name = f"{len(manifest['segments']) + 1:06d}"
+        segments_dir = os.path.join(self.dir, SEGMENTS_DIRNAME)
+        os.makedirs(segments_dir, exist_ok=True)
+        prefix = os.path.join(segments_dir, name)
+
+        # Solo se descargan los vectores de las memorias que han cambiado.
+        items = text_mem.vector_db.get_by_ids(changed) if changed else []
+        write_binary_memories(
+            prefix + ".vectors.npy", prefix + ".payloads.jsonl", items, dtype=self.dtype
+        )
+        _write_json_atomic(prefix + DELETES_SUFFIX, deleted)
+
+        # El manifiesto se actualiza al final: un segmento a medio escribir se ignora.
+        manifest["segments"].append(name)
+        _write_json_atomic(self.manifest_path, manifest)
+        self._versions = current
+        logger.info(f"Snapshot segment {name}: {len(items)} upserted, {len(deleted)} deleted")
+        return {"upserted": len(items), "deleted": len(deleted)}
+
+    def restore(self) -> None:
+        """Carga la base y reproduce los segmentos en el cubo, en orden."""
+        load_mem_cube(self.mem_cube, self.dir)
+        vector_db = self.mem_cube.text_mem.vector_db
+        for name in self._manifest()["segments"]:
+            prefix = os.path.join(self.dir, SEGMENTS_DIRNAME, name)
+            vectors, records = read_binary_memories(
+                prefix + ".vectors.npy", prefix + ".payloads.jsonl"
+            )
+            upsert_binary_memories(vector_db, vectors, records)
+            deleted = _read_json(prefix + DELETES_SUFFIX, default=[])
+            if deleted:
+                vector_db.delete(deleted)
+        self._versions = None
+
+    def compact(self) -> int:
+        """Pliega los segmentos en la base. Devuelve el número de segmentos plegados."""
+        folded = compact_snapshot(self.dir)
+        self._versions = None
+        return folded
+
+
+def compact_snapshot(dir: str) -> int:
+    """
+    Pliega los segmentos de un snapshot en su base, trabajando solo con ficheros.
+
+    La matriz nueva se escribe directamente a disco con `open_memmap`, de modo que
+    la compactación no necesita tener todos los vectores en RAM.
+
+    Args:
+        dir (str): Directorio del snapshot.
+
+    Returns:
+        int: Número de segmentos plegados.
+    """
+    manifest = _read_json(os.path.join(dir, MANIFEST_FILENAME), default={"segments": []})
+    if not manifest["segments"]:
+        return 0
+
+    memory_filename = _memory_filename(dir)
+    base_vectors, base_records = _read_base(dir, memory_filename)
+
+    # Cada id apunta a (matriz de origen, fila, payload); los segmentos posteriores ganan.
+    sources = [base_vectors]
+    rows: dict[str, tuple[int, int, dict]] = {
+        record["id"]: (0, row, record["payload"]) for row, record in enumerate(base_records)
+    }
+    for name in manifest["segments"]:
+        prefix = os.path.join(dir, SEGMENTS_DIRNAME, name)
+        vectors, records = read_binary_memories(prefix + ".vectors.npy", prefix + ".payloads.jsonl")
+        sources.append(vectors)
+        for row, record in enumerate(records):
+            rows[record["id"]] = (len(sources) - 1, row, record["payload"])
+        for memory_id in _read_json(prefix + DELETES_SUFFIX, default=[]):
+            rows.pop(memory_id, None)
+
+    vectors_path, payloads_path = binary_paths(dir, memory_filename)
+    dimension = max((v.shape[1] for v in sources if v.ndim == 2 and v.shape[0]), default=0)
+    dtype = base_vectors.dtype if base_vectors.size else sources[-1].dtype
+    output = np.lib.format.open_memmap(
+        vectors_path + ".tmp", mode="w+", dtype=dtype, shape=(len(rows), dimension)
+    )
+    with open(payloads_path + ".tmp", "w", encoding="utf-8") as f:
+        for out_row, (memory_id, (source, row, payload)) in enumerate(rows.items()):
+            output[out_row] = sources[source][row]
+            f.write(json.dumps({"id": memory_id, "payload": payload}, ensure_ascii=False))
+            f.write("\n")
+    output.flush()
+    del output
+
+    os.replace(vectors_path + ".tmp", vectors_path)
+    os.replace(payloads_path + ".tmp", payloads_path)
+    legacy_path = os.path.join(dir, memory_filename)
+    if os.path.exists(legacy_path):
+        # La base ya es binaria; el JSON antiguo quedaría obsoleto.
+        os.remove(legacy_path)
+
+    _write_json_atomic(
+        os.path.join(dir, STATE_FILENAME),
+        {memory_id: _version(payload) for memory_id, (_, _, payload) in rows.items()},
+    )
+    _write_json_atomic(os.path.join(dir, MANIFEST_FILENAME), {"segments": []})
+    shutil.rmtree(os.path.join(dir, SEGMENTS_DIRNAME), ignore_errors=True)
+    logger.info(f"Compacted {len(manifest['segments'])} segments into {vectors_path}")
+    return len(manifest["segments"])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "compact":
+        print("Uso: python -m memos_ext.snapshots compact <directorio_del_snapshot>")
+        sys.exit(1)
+    print(f"Segmentos compactados: {compact_snapshot(sys.argv[2])}")
@@ -0,0 +1,237 @@
+# --- Formato binario para volcar y cargar la memoria textual ---
+# `GeneralTextMemory.dump` escribe `textual_memory.json` con cada vector de 768
+# dimensiones como texto decimal (~27 KB por memoria) y `load` tiene que
+# convertir todo eso de nuevo a floats de Python.
+#
+# Aquí separamos los datos en dos ficheros junto al JSON original:
+#   - `<nombre>.vectors.npy`: matriz contigua float32 (o float16) de N x D,
+#     que se puede abrir con memoria mapeada (`np.load(mmap_mode="r")`).
+#   - `<nombre>.payloads.jsonl`: una línea JSON por memoria con `id` y `payload`,
+#     en el mismo orden que las filas de la matriz.
+# La carga sigue aceptando el `textual_memory.json` antiguo.
+import json
+import os
+import shutil
+
+import numpy as np
+
+from memos.configs.utils import get_json_file_model_schema
+from memos.exceptions import ConfigurationError
+from memos.log import get_logger
+from memos.vec_dbs.item import VecDBItem
+
+from memos_ext.lazy_cube import LazyMemCube
+from memos_ext.telemetry import span
+
+logger = get_logger(__name__)
+
+VECTORS_SUFFIX = ".vectors.npy"
+PAYLOADS_SUFFIX = ".payloads.jsonl"
+
+# Número de puntos que se envían a la base vectorial en cada `add` durante la carga.
+LOAD_BATCH_SIZE = 1024
+
+
+def binary_paths(dir: str, memory_filename: str) -> tuple[str, str]:
+    """
+    Calcula las rutas de los ficheros binarios a partir del nombre del JSON.
+
+    Args:
+        dir (str): Directorio del volcado.
+        memory_filename (str): Nombre del fichero JSON (`textual_memory.json`).
+
+    Returns:
+        tuple: Rutas `(vectores .npy, payloads .jsonl)`.
+    """
+    stem = os.path.splitext(memory_filename)[0]
+    return (
+        os.path.join(dir, stem + VECTORS_SUFFIX),
+        os.path.join(dir, stem + PAYLOADS_SUFFIX),
+    )
+
+
+def write_binary_memories(
+    vectors_path: str, payloads_path: str, items: list[VecDBItem], dtype: str = "float32"
+) -> None:
+    """Escribe una lista de `VecDBItem` en el par de ficheros `.npy` + `.jsonl`."""
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+    dimension = len(items[0].vector) if items else 0
+    matrix = np.empty((len(items), dimension), dtype=dtype)
+    for row, item in enumerate(items):
+        matrix[row] = item.vector
+    np.save(vectors_path, matrix)
+
+    with open(payloads_path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps({"id": item.id, "payload": item.payload}, ensure_ascii=False))
+            f.write("\n")
+
+
+def read_binary_memories(
+    vectors_path: str, payloads_path: str, mmap: bool = True
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Lee un volcado binario sin pasar por la base vectorial.
+
+    Args:
+        vectors_path (str): Ruta del fichero `.npy`.
+        payloads_path (str): Ruta del fichero `.jsonl`.
+        mmap (bool): Si es True, la matriz se abre en modo memoria mapeada y solo
+            se leen del disco las filas que realmente se usan.
+
+    Returns:
+        tuple: `(matriz N x D, lista de {"id", "payload"})`.
+    """
+    vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+    with open(payloads_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if len(records) != vectors.shape[0]:
+        raise ValueError(
+            f"Corrupted dump: {vectors.shape[0]} vectors but {len(records)} payloads "
+            f"in {payloads_path}"
+        )
+    return vectors, records
+
+
+def upsert_binary_memories(
+    vector_db, vectors: np.ndarray, records: list[dict], batch_size: int = LOAD_BATCH_SIZE
+) -> None:
+    """Escribe en la base vectorial las filas de un volcado binario, por bloques."""
+    for start in range(0, len(records), batch_size):
+        # Convertimos a float32 por bloques: solo ese trozo se lee del mapa en memoria.
+        block = np.asarray(vectors[start : start + batch_size], dtype=np.float32)
+        vector_db.add(
+            [
+                VecDBItem(id=record["id"], vector=row.tolist(), payload=record["payload"])
+                for record, row in zip(records[start : start + batch_size], block, strict=True)
+            ]
+        )
+
+
+def dump_text_memory(text_mem, dir: str, dtype: str = "float32") -> int:
+    """
+    Vuelca la memoria textual en formato binario.
+
+    Args:
+        text_mem: La memoria textual del cubo (`mem_cube.text_mem`).
+        dir (str): Directorio de destino.
+        dtype (str): `"float32"` (por defecto) o `"float16"` para reducir el tamaño a la mitad.
+
+    Returns:
+        int: Número de memorias volcadas.
+    """
+    os.makedirs(dir, exist_ok=True)
+    items = text_mem.vector_db.get_all()
+    vectors_path, payloads_path = binary_paths(dir, text_mem.config.memory_filename)
+    with span("dump.serialize"):
+        write_binary_memories(vectors_path, payloads_path, items, dtype=dtype)
+    logger.info(f"Dumped {len(items)} memories to {vectors_path} ({dtype})")
+    return len(items)
+
+
+def load_text_memory(text_mem, dir: str, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """
+    Carga la memoria textual desde un volcado binario o, si no existe, desde el JSON.
+
+    Args:
+        text_mem: La memoria textual del cubo (`mem_cube.text_mem`).
+        dir (str): Directorio del volcado.
+        batch_size (int): Puntos por cada escritura en la base vectorial.
+
+    Returns:
+        int: Número de memorias cargadas (-1 si se usó el JSON antiguo).
+    """
+    if not hasattr(text_mem, "vector_db"):
+        # tree_text (Neo4j) no tiene base vectorial propia: usa su propio formato.
+        text_mem.load(dir)
+        return -1
+    vectors_path, payloads_path = binary_paths(dir, text_mem.config.memory_filename)
+    if not (os.path.exists(vectors_path) and os.path.exists(payloads_path)):
+        # Compatibilidad: volcados antiguos con `textual_memory.json`.
+        text_mem.load(dir)
+        return -1
+
+    with span("load.deserialize"):
+        vectors, records = read_binary_memories(vectors_path, payloads_path)
+    upsert_binary_memories(text_mem.vector_db, vectors, records, batch_size=batch_size)
+    logger.info(f"Loaded {len(records)} memories from {vectors_path}")
+    return len(records)
+
+
+def dump_mem_cube(mem_cube, dir: str, dtype: str = "float32") -> None:
+    """
+    Equivalente a `GeneralMemCube.dump`, pero con la memoria textual en binario.
+
+    Args:
+        mem_cube: El `GeneralMemCube` a volcar.
+        dir (str): Directorio de destino (debe estar vacío, como en MemOS).
+        dtype (str): Tipo de los vectores en disco.
+    """
+    if os.path.exists(dir) and os.listdir(dir):
+        raise ValueError(f"Directory {dir} is not empty. Please provide an empty directory.")
+
+    mem_cube.config.to_json_file(os.path.join(dir, mem_cube.config.config_filename))
+    if mem_cube.text_mem:
+        if hasattr(mem_cube.text_mem, "vector_db"):
+            dump_text_memory(mem_cube.text_mem, dir, dtype=dtype)
+        else:
+            mem_cube.text_mem.dump(dir)
+    for memory_type in ("act_mem", "para_mem"):
+        if isinstance(mem_cube, LazyMemCube) and mem_cube.is_pending(memory_type):
+            # Sin construir la memoria (ni su LLM extractor): no ha cambiado desde
+            # que se leyó, así que basta con copiar sus ficheros.
+            _copy_pending_memory(mem_cube, memory_type, dir)
+            continue
+        memory = getattr(mem_cube, memory_type)
+        if memory:
+            memory.dump(dir)
+
+
+def _copy_pending_memory(mem_cube: LazyMemCube, memory_type: str, dir: str) -> None:
+    """Copia los ficheros de una memoria aún no construida desde el volcado del que se cargará."""
+    source = mem_cube.pending_dir(memory_type)
+    if source is None:
+        # Nunca se cargó nada: la memoria está vacía y no hay nada que volcar.
+        return
+    # El nombre del config y sus variantes (p. ej. `.safetensors` de `kv_store`).
+    stem = os.path.splitext(getattr(mem_cube.config, memory_type).config.memory_filename)[0]
+    for name in os.listdir(source):
+        if os.path.splitext(name)[0] != stem:
+            continue
+        path = os.path.join(source, name)
+        if os.path.isdir(path):
+            shutil.copytree(path, os.path.join(dir, name))
+        else:
+            shutil.copy2(path, os.path.join(dir, name))
+
+
+def load_mem_cube(mem_cube, dir: str, memory_types: list[str] | None = None) -> None:
+    """
+    Equivalente a `GeneralMemCube.load`; acepta volcados binarios y JSON.
+
+    Args:
+        mem_cube: El `GeneralMemCube` (ya registrado) donde cargar los datos.
+        dir (str): Directorio del volcado.
+        memory_types (list[str], optional): Tipos de memoria a cargar. Por defecto, todos.
+    """
+    loaded_schema = get_json_file_model_schema(os.path.join(dir, mem_cube.config.config_filename))
+    if loaded_schema != mem_cube.config.model_schema:
+        raise ConfigurationError(
+            f"Configuration schema mismatch. Expected {mem_cube.config.model_schema}, "
+            f"but found {loaded_schema}."
+        )
+
+    memory_types = memory_types or ["text_mem", "act_mem", "para_mem"]
+    if isinstance(mem_cube, LazyMemCube):
+        # Ninguna memoria se construye aquí: cada una se carga en su primer acceso
+        # (la textual, con `load_text_memory`).
+        mem_cube.defer_load(dir, memory_types)
+        return
+    if "text_mem" in memory_types and mem_cube.text_mem:
+        load_text_memory(mem_cube.text_mem, dir)
+    if "act_mem" in memory_types and mem_cube.act_mem:
+        mem_cube.act_mem.load(dir)
+    if "para_mem" in memory_types and mem_cube.para_mem:
+        mem_cube.para_mem.load(dir)
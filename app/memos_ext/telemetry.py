@@ -0,0 +1,385 @@
+# --- Tiempos por etapa (spans) de search, add, chat, dump y load ---
+# `memos.log` solo deja líneas INFO sueltas ("Qdrant search completed with 5
+# results", "Add memory ... successfully"): no dice cómo se reparte un turno de 1 s
+# de `Trial02.chat_loop` entre el embedding, la búsqueda vectorial, el LLM, la
+# serialización de payloads y la escritura.
+#
+# `span("etapa", cube_id=..., user_id=...)` mide una etapa y avisa a los hooks
+# registrados con `add_span_hook`. Los spans anidados heredan las etiquetas del
+# span que los contiene (también en los hilos de `asyncio.to_thread`). Hooks incluidos:
+#   - `HistogramRegistry`: histogramas al estilo Prometheus (`render_prometheus()`).
+#   - `OpenTelemetryHook`: spans de OpenTelemetry (requiere `opentelemetry-api`).
+# Sin hooks registrados, `span` devuelve un contexto vacío ya creado y los métodos
+# instrumentados solo comprueban una tupla vacía antes de llamar al original.
+#
+# Etapas: "search", "add", "chat", "dump", "load" (operación completa) y, dentro,
+# "search.embed", "search.vector", "search.deserialize", "search.merge",
+# "add.queued", "embed", "text_mem.add", "vector_db.search", "vector_db.write",
+# "vector_db.read", "llm.extract", "llm.chat", "add.serialize", "dump.serialize",
+# "load.deserialize".
+import contextvars
+import functools
+import threading
+import time
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Any
+
+from memos.log import get_logger
+
+logger = get_logger(__name__)
+
+# Límites (segundos) de los buckets de los histogramas, como en los clientes de Prometheus.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Hooks registrados. Se sustituye la tupla entera al añadir o quitar uno, así que
+# se puede recorrer sin candado.
+_hooks: tuple = ()
+_hooks_guard = threading.Lock()
+_NOOP = nullcontext()
+_current_tags: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar(
+    "memos_ext_span_tags", default={}
+)
+
+
+class SpanHook:
+    """
+    Receptor de spans. Las subclases sobrescriben `start` y/o `end`.
+
+    `start` se llama al entrar en la etapa y lo que devuelva se pasa a `end` como
+    `handle` (p. ej. el span de OpenTelemetry). Las excepciones de un hook se registran
+    en el log y no interrumpen la operación medida.
+    """
+
+    def start(self, name: str, tags: dict[str, Any]) -> Any:
+        return None
+
+    def end(
+        self, name: str, tags: dict[str, Any], duration: float, error: BaseException | None, handle: Any
+    ) -> None:
+        pass
+
+
+def add_span_hook(hook: SpanHook) -> SpanHook:
+    """Registra un hook; a partir de aquí las etapas se miden. Devuelve el propio hook."""
+    global _hooks
+    with _hooks_guard:
+        if hook not in _hooks:
+            _hooks = (*_hooks, hook)
+    return hook
+
+
+def remove_span_hook(hook: SpanHook) -> None:
+    """Quita un hook registrado (sin hooks, la instrumentación vuelve a no hacer nada)."""
+    global _hooks
+    with _hooks_guard:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def telemetry_enabled() -> bool:
+    """True si hay algún hook registrado."""
+    return bool(_hooks)
+
+
+class _Span:
+    __slots__ = ("name", "tags", "_hooks", "_handles", "_token", "_start")
+
+    def __init__(self, name: str, tags: dict[str, Any], hooks: tuple):
+        self.name = name
+        self.tags = tags
+        self._hooks = hooks
+
+    def __enter__(self) -> "_Span":
+        self.tags = {**_current_tags.get(), **self.tags}
+        self._token = _current_tags.set(self.tags)
+        self._handles = []
+        for hook in self._hooks:
+            try:
+                self._handles.append(hook.start(self.name, self.tags))
+            except Exception as e:
+                logger.warning(f"Span hook {type(hook).__name__} failed on start of '{self.name}': {e}")
+                self._handles.append(None)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._start
+        _current_tags.reset(self._token)
+        # Se cierran en orden inverso, como los contextos anidados de OpenTelemetry.
+        for hook, handle in reversed(list(zip(self._hooks, self._handles, strict=True))):
+            try:
+                hook.end(self.name, self.tags, duration, exc, handle)
+            except Exception as e:
+                logger.warning(f"Span hook {type(hook).__name__} failed on end of '{self.name}': {e}")
+        return False
+
+
+def span(name: str, **tags: Any):
+    """
+    Context manager que mide la etapa `name` con las etiquetas dadas.
+
+    Ejemplo:
+        ```python
+        with span("search.vector", cube_id=cube_id):
+            hits = vector_db.search(vector, top_k)
+        ```
+    """
+    hooks = _hooks
+    if not hooks:
+        return _NOOP
+    return _Span(name, tags, hooks)
+
+
+def record(name: str, duration: float, **tags: Any) -> None:
+    """
+    Notifica una etapa ya medida (p. ej. el tiempo que una escritura pasó en cola).
+
+    Los hooks la reciben en `end` con `handle=None`, sin llamada previa a `start`.
+    """
+    hooks = _hooks
+    if not hooks:
+        return
+    tags = {**_current_tags.get(), **tags}
+    for hook in hooks:
+        try:
+            hook.end(name, tags, duration, None, None)
+        except Exception as e:
+            logger.warning(f"Span hook {type(hook).__name__} failed on '{name}': {e}")
+
+
+def traced(name: str, **tags: Any):
+    """Decorador: cada llamada a la función se mide como la etapa `name`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return fn(*args, **kwargs)
+            with span(name, **tags):
+                return fn(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        wrapper.__trace_name__ = name
+        wrapper.__trace_tags__ = tags
+        return wrapper
+
+    return decorator
+
+
+def _trace_method(obj, method_name: str, name: str, **tags: Any) -> None:
+    method = getattr(obj, method_name, None)
+    if method is None or getattr(method, "__traced__", False):
+        return
+    setattr(obj, method_name, traced(name, **tags)(method))
+
+
+# Métodos de la base vectorial agrupados por tipo de acceso.
+_VECTOR_DB_STAGES = {
+    "search": "vector_db.search",
+    "add": "vector_db.write",
+    "upsert": "vector_db.write",
+    "update": "vector_db.write",
+    "delete": "vector_db.write",
+    "get_all": "vector_db.read",
+    "get_by_ids": "vector_db.read",
+    "get_by_filter": "vector_db.read",
+}
+
+
+def install_telemetry(mem_cube, cube_id: str | None = None) -> None:
+    """
+    Instrumenta la memoria textual de un cubo: embedder, base vectorial, LLM extractor y `add`.
+
+    Los métodos se sustituyen en las instancias (como `install_dedup`), así que los
+    `isinstance` y los atributos del embedder o de la base vectorial no cambian. Si el
+    embedder se sustituye después (p. ej. `install_embedding_cache`), la etapa "embed"
+    mide solo las llamadas al modelo real (los fallos de la caché). Llamarla varias
+    veces no tiene efecto adicional. `ExtendedMOS.register_mem_cube` la llama sola.
+
+    Args:
+        mem_cube: Un `GeneralMemCube` (o `LazyMemCube`, que se instrumenta al materializar).
+        cube_id (str, optional): Valor de la etiqueta `cube_id`. Por defecto, el del config.
+    """
+    cube_id = cube_id or getattr(mem_cube.config, "cube_id", None)
+
+    on_materialize = getattr(mem_cube, "on_materialize", None)
+    if on_materialize is not None:
+        # LazyMemCube: no se fuerza la construcción de la memoria textual.
+        on_materialize("text_mem", lambda text_mem: _instrument_text_mem(text_mem, cube_id))
+        return
+    if mem_cube.text_mem is not None:
+        _instrument_text_mem(mem_cube.text_mem, cube_id)
+
+
+def _instrument_text_mem(text_mem, cube_id: str | None) -> None:
+    _trace_method(text_mem, "add", "text_mem.add", cube_id=cube_id)
+    embedder = getattr(text_mem, "embedder", None)
+    if embedder is not None:
+        _trace_method(embedder, "embed", "embed", cube_id=cube_id)
+    vector_db = getattr(text_mem, "vector_db", None)
+    if vector_db is not None:
+        for method_name, stage in _VECTOR_DB_STAGES.items():
+            _trace_method(vector_db, method_name, stage, cube_id=cube_id)
+    extractor_llm = getattr(text_mem, "extractor_llm", None)
+    if extractor_llm is not None:
+        _trace_method(extractor_llm, "generate", "llm.extract", cube_id=cube_id)
+
+
+class HistogramRegistry(SpanHook):
+    """
+    Histogramas de latencia por etapa al estilo Prometheus (buckets acumulativos).
+
+    Ejemplo:
+        ```python
+        histograms = add_span_hook(HistogramRegistry())
+        ...
+        print(histograms.render_prometheus())
+        ```
+    """
+
+    def __init__(
+        self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, label_keys: tuple[str, ...] = ("cube_id",)
+    ):
+        """
+        Args:
+            buckets (tuple): Límites superiores (segundos) de los buckets.
+            label_keys (tuple): Etiquetas de los spans que forman parte de cada serie,
+                además de la etapa. `user_id` no va por defecto: con muchos usuarios
+                el número de series crecería sin límite.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.label_keys = label_keys
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def end(
+        self, name: str, tags: dict[str, Any], duration: float, error: BaseException | None, handle: Any
+    ) -> None:
+        key = (name, *(tags.get(label) for label in self.label_keys))
+        bucket = bisect_left(self.buckets, duration)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                    "errors": 0,
+                }
+            series["counts"][bucket] += 1
+            series["sum"] += duration
+            series["count"] += 1
+            series["errors"] += error is not None
+
+    def snapshot(self) -> list[dict]:
+        """Copia de las series: etapa, etiquetas, buckets acumulados, suma, recuento y errores."""
+        with self._lock:
+            items = [
+                (key, dict(series, counts=list(series["counts"]))) for key, series in self._series.items()
+            ]
+        result = []
+        for (stage, *labels), series in sorted(items, key=lambda item: tuple(map(str, item[0]))):
+            cumulative, running = [], 0
+            for count in series["counts"]:
+                running += count
+                cumulative.append(running)
+            result.append(
+                {
+                    "stage": stage,
+                    "labels": dict(zip(self.label_keys, labels, strict=True)),
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], cumulative, strict=True)),
+                    "sum": series["sum"],
+                    "count": series["count"],
+                    "errors": series["errors"],
+                }
+            )
+        return result
+
+    def quantile(self, stage: str, q: float, **labels: Any) -> float | None:
+        """Cuantil aproximado (interpolando dentro del bucket, como `histogram_quantile`)."""
+        wanted = {self.label_keys.index(k): v for k, v in labels.items() if k in self.label_keys}
+        counts = [0] * (len(self.buckets) + 1)
+        with self._lock:
+            for (name, *values), series in self._series.items():
+                if name == stage and all(values[index] == v for index, v in wanted.items()):
+                    counts = [a + b for a, b in zip(counts, series["counts"], strict=True)]
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank, running = q * total, 0
+        for index, count in enumerate(counts):
+            if running + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - running) / count
+            running += count
+        return self.buckets[-1]
+
+    def render_prometheus(self, metric: str = "memos_stage_duration_seconds") -> str:
+        """Las series en el formato de texto de Prometheus (para un endpoint `/metrics`)."""
+        lines = [f"# HELP {metric} Duration of MemOS operation stages.", f"# TYPE {metric} histogram"]
+        for series in self.snapshot():
+            labels = {"stage": series["stage"]}
+            labels.update((k, v) for k, v in series["labels"].items() if v is not None)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            for bound, count in series["buckets"].items():
+                lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum{{{label_text}}} {series['sum']}")
+            lines.append(f"{metric}_count{{{label_text}}} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Vacía todas las series."""
+        with self._lock:
+            self._series.clear()
+
+
+class OpenTelemetryHook(SpanHook):
+    """Crea un span de OpenTelemetry por etapa, anidado en el span activo."""
+
+    def __init__(self, tracer_name: str = "memos_ext"):
+        """
+        Args:
+            tracer_name (str): Nombre del tracer (el proveedor y el exportador se
+                configuran aparte, con el SDK de OpenTelemetry).
+
+        Raises:
+            ImportError: Si `opentelemetry-api` no está instalado.
+        """
+        try:
+            from opentelemetry import context, trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryHook requires opentelemetry-api: pip install opentelemetry-api"
+            ) from e
+        self._context = context
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+
+    @staticmethod
+    def _attributes(tags: dict[str, Any]) -> dict[str, Any]:
+        return {f"memos.{key}": value for key, value in tags.items() if value is not None}
+
+    def start(self, name: str, tags: dict[str, Any]) -> Any:
+        otel_span = self._tracer.start_span(name, attributes=self._attributes(tags))
+        token = self._context.attach(self._trace.set_span_in_context(otel_span))
+        return otel_span, token
+
+    def end(
+        self, name: str, tags: dict[str, Any], duration: float, error: BaseException | None, handle: Any
+    ) -> None:
+        if handle is None:
+            # Etapa ya medida (`record`): span con el inicio desplazado hacia atrás.
+            end_time = time.time_ns()
+            self._tracer.start_span(
+                name, attributes=self._attributes(tags), start_time=end_time - int(duration * 1e9)
+            ).end(end_time=end_time)
+            return
+        otel_span, token = handle
+        self._context.detach(token)
+        if error is not None:
+            otel_span.record_exception(error)
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(error)))
+        otel_span.end()
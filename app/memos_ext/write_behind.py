@@ -0,0 +1,97 @@
+# --- Escritura diferida (write-behind) para `mos.add` ---
+# En los bucles de chat el usuario espera a que `mos.add(...)` termine (extracción,
+# embedding y escritura en Qdrant) antes de ver el siguiente `input()`, aunque nada
+# de eso afecta a la respuesta que ya se ha mostrado.
+#
+# `WriteBehindQueue` ejecuta esas escrituras en un hilo en segundo plano con una
+# cola acotada: si la cola se llena, `submit` bloquea (contrapresión) en lugar de
+# acumular trabajo sin límite. Cada envío devuelve un `Future` (el "ack") y
+# `flush()` espera a que no quede nada pendiente.
+import queue
+import threading
+from concurrent.futures import Future
+
+from memos.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE_SIZE = 64
+
+# Marca de fin para el hilo de trabajo.
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Cola acotada con un hilo de trabajo que ejecuta escrituras en orden FIFO."""
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, name: str = "memos-write-behind"):
+        """
+        Args:
+            maxsize (int): Número máximo de escrituras pendientes antes de bloquear `submit`.
+            name (str): Nombre del hilo (útil en los logs y al depurar).
+        """
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    @property
+    def pending(self) -> int:
+        """Escrituras enviadas que aún no han terminado."""
+        with self._idle:
+            return self._pending
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Encola `fn(*args, **kwargs)` y devuelve un `Future` con su resultado.
+
+        Raises:
+            RuntimeError: Si la cola ya se ha cerrado.
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        future: Future = Future()
+        with self._idle:
+            self._pending += 1
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Espera a que terminen todas las escrituras pendientes.
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera.
+
+        Returns:
+            bool: True si la cola quedó vacía, False si se agotó el tiempo.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Vacía la cola y detiene el hilo de trabajo."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            future, fn, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    logger.error(f"Write-behind task failed: {e}")
+                    future.set_exception(e)
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
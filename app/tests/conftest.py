@@ -0,0 +1,148 @@
+# --- Utilidades comunes de los tests de memos_ext ---
+# Los tests se ejecutan desde `app/` (`cd app && python -m pytest tests`) y no usan
+# red: el embedder de prueba devuelve los vectores que indica cada test.
+#
+# `MEMOS_DIR` (log `memos.log`, base de usuarios, Qdrant por defecto) apunta a un
+# directorio temporal: una ejecución de los tests no escribe en el `.memos` del repo.
+import logging.config
+import os
+import sys
+import tempfile
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from memos import log as memos_log
+from memos import settings
+
+settings.MEMOS_DIR = Path(tempfile.mkdtemp(prefix="memos-tests-"))
+memos_log.LOGGING_CONFIG["handlers"]["file"]["filename"] = memos_log._setup_logfile()
+logging.config.dictConfig(memos_log.LOGGING_CONFIG)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memos_ext.numpy_vecdb import NumpyVecDB, NumpyVecDBConfig  # noqa: E402
+
+
+class FakeEmbedder:
+    """Embedder sin modelo: vector fijo por texto (o derivado del texto) y contador de llamadas."""
+
+    def __init__(self, vectors: dict[str, list[float]] | None = None, dimension: int = 4):
+        self.vectors = vectors or {}
+        self.dimension = dimension
+        self.config = SimpleNamespace(model_name_or_path="fake")
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [self.vectors.get(text) or self._vector(text) for text in texts]
+
+    def _vector(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimension
+        for position, char in enumerate(text):
+            vector[(ord(char) + position) % self.dimension] += 1.0
+        return vector
+
+
+@pytest.fixture
+def numpy_db():
+    def build(dimension: int = 4, collection_name: str = "test") -> NumpyVecDB:
+        return NumpyVecDB(
+            NumpyVecDBConfig(
+                collection_name=collection_name, vector_dimension=dimension, distance_metric="cosine"
+            )
+        )
+
+    return build
+
+
+@pytest.fixture
+def text_mem(numpy_db):
+    """`text_mem` mínimo (base vectorial NumPy + embedder de prueba) como el de un cubo."""
+
+    def build(vectors: dict[str, list[float]] | None = None, dimension: int = 4):
+        return SimpleNamespace(
+            vector_db=numpy_db(dimension),
+            embedder=FakeEmbedder(vectors, dimension),
+            add=lambda memories: None,
+        )
+
+    return build
+
+
+@pytest.fixture
+def cube_config():
+    """Configuración de un cubo `general_text` sobre NumPy con el embedder y LLM del benchmark."""
+    from benchmark_retrieval import STUB_BACKEND, install_stub_backends
+    from memos.configs.mem_cube import GeneralMemCubeConfig
+
+    from memos_ext.numpy_vecdb import install_numpy_vecdb
+
+    install_stub_backends()
+    install_numpy_vecdb()
+
+    def build(cube_id: str = "test_cube", dimension: int = 8) -> GeneralMemCubeConfig:
+        stub = {"model_name_or_path": "stub"}
+        return GeneralMemCubeConfig(
+            user_id="test_user",
+            cube_id=cube_id,
+            text_mem={
+                "backend": "general_text",
+                "config": {
+                    "extractor_llm": {"backend": STUB_BACKEND, "config": stub},
+                    "embedder": {
+                        "backend": STUB_BACKEND,
+                        "config": {**stub, "embedding_dims": dimension},
+                    },
+                    "vector_db": {
+                        "backend": "numpy",
+                        "config": {
+                            "collection_name": cube_id,
+                            "vector_dimension": dimension,
+                            "distance_metric": "cosine",
+                        },
+                    },
+                },
+            },
+        )
+
+    return build
+
+
+@pytest.fixture
+def mos(cube_config):
+    """`ExtendedMOS` con el LLM y el embedder del benchmark (sin red) y un cubo por usuario."""
+    from benchmark_retrieval import STUB_BACKEND
+    from memos.configs.mem_os import MOSConfig
+    from memos.mem_cube.general import GeneralMemCube
+
+    from memos_ext.mos import ExtendedMOS
+
+    stub = {"backend": STUB_BACKEND, "config": {"model_name_or_path": "stub"}}
+    embedder = {"backend": STUB_BACKEND, "config": {"model_name_or_path": "stub", "embedding_dims": 8}}
+    config = MOSConfig(
+        user_id="owner",
+        session_id="owner_session",
+        chat_model=stub,
+        mem_reader={
+            "backend": "simple_struct",
+            "config": {
+                "llm": stub,
+                "embedder": embedder,
+                "chunker": {"backend": "sentence", "config": {"tokenizer_or_token_counter": "character"}},
+            },
+        },
+    )
+    instance = ExtendedMOS(config)
+
+    def add_user(user_id: str) -> str:
+        instance.create_user(user_id=user_id)
+        cube_id = f"{user_id}_cube"
+        instance.register_mem_cube(GeneralMemCube(cube_config(cube_id)), mem_cube_id=cube_id, user_id=user_id)
+        return cube_id
+
+    instance.add_user = add_user
+    yield instance
+    instance.close()
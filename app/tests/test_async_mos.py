@@ -0,0 +1,28 @@
+import asyncio
+
+from memos_ext.async_mos import AsyncMOS
+
+
+def test_add_stores_memories_as_the_target_user(mos):
+    cubes = {user_id: mos.add_user(user_id) for user_id in ("ana", "luis")}
+
+    async def run() -> None:
+        amos = AsyncMOS(mos)
+        try:
+            await amos.add([{"role": "user", "content": "Me gusta el té"}], user_id="ana")
+            await amos.add(
+                [{"role": "user", "content": "Me gusta el café"}], user_id="luis", session_id="s_luis"
+            )
+        finally:
+            await amos.aclose()
+
+    asyncio.run(run())
+    stored = {
+        user_id: [item.payload for item in mos.mem_cubes[cube_id].text_mem.vector_db.get_all()]
+        for user_id, cube_id in cubes.items()
+    }
+    assert [payload["memory"] for payload in stored["ana"]] == ["Me gusta el té"]
+    assert stored["ana"][0]["metadata"]["user_id"] == "ana"
+    assert stored["ana"][0]["metadata"]["session_id"] == mos.session_id
+    assert stored["luis"][0]["metadata"]["user_id"] == "luis"
+    assert stored["luis"][0]["metadata"]["session_id"] == "s_luis"
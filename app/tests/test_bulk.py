@@ -0,0 +1,29 @@
+def test_add_many_keeps_user_and_session_per_conversation(mos):
+    cube_id = mos.add_user("ana")
+    text_mem = mos.mem_cubes[cube_id].text_mem
+    lock = mos._cube_lock(cube_id)
+    embed = text_mem.embedder.embed
+    lock_free_while_embedding = []
+
+    def embed_checking_lock(texts):
+        # Los embeddings se calculan en otros hilos: el candado del cubo debe estar libre.
+        acquired = lock.acquire(blocking=False)
+        lock_free_while_embedding.append(acquired)
+        if acquired:
+            lock.release()
+        return embed(texts)
+
+    text_mem.embedder.embed = embed_checking_lock
+    batches = [
+        [{"role": "user", "content": "Vivo en Madrid"}, {"role": "assistant", "content": "Anotado"}],
+        [{"role": "user", "content": "Trabajo en Sevilla"}],
+    ]
+    assert mos.add_many(batches, user_id="ana", embed_batch_size=1) == 3
+    assert lock_free_while_embedding and all(lock_free_while_embedding)
+
+    metadata = {
+        item.payload["memory"]: item.payload["metadata"] for item in text_mem.vector_db.get_all()
+    }
+    assert {m["user_id"] for m in metadata.values()} == {"ana"}
+    assert metadata["Vivo en Madrid"]["session_id"] == metadata["Anotado"]["session_id"]
+    assert metadata["Vivo en Madrid"]["session_id"] != metadata["Trabajo en Sevilla"]["session_id"]
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from memos_ext.async_mos import AsyncOpenAIChat
+from memos_ext.mos import ThinkTagFilter, stream_chat_completion
+
+
+def _filtered(chunks: list[str]) -> str:
+    think_filter = ThinkTagFilter()
+    return "".join(think_filter.feed(chunk) for chunk in chunks) + think_filter.finish()
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        ["<think>pienso</think>\n\nHola"],
+        ["<th", "ink>pien", "so</th", "ink>", "\n", "Ho", "la"],
+        ["  <think>", "a < b", "</think>  Hola"],
+    ],
+)
+def test_think_filter_drops_leading_reasoning(chunks):
+    assert _filtered(chunks) == "Hola"
+
+
+def test_think_filter_passes_plain_text():
+    assert _filtered(["<b>Hola</b> ", "<think>no"]) == "<b>Hola</b> <think>no"
+    assert _filtered(["<thi"]) == "<thi"
+    assert _filtered(["Hola", "<think>x</think>"]) == "Hola<think>x</think>"
+
+
+def _llm_config(remove_think_prefix: bool):
+    return SimpleNamespace(
+        model_name_or_path="chat",
+        temperature=0.0,
+        max_tokens=16,
+        top_p=1.0,
+        extra_body=None,
+        remove_think_prefix=remove_think_prefix,
+        api_base="http://llm.test/v1",
+        api_key="key",
+    )
+
+
+DELTAS = [{"reasoning_content": "pien"}, {"reasoning_content": "so"}, {"content": "Ho"}, {"content": "la"}]
+
+
+@pytest.mark.parametrize(
+    ("remove_think_prefix", "expected"),
+    [(True, "Hola"), (False, "<think>pienso</think>Hola")],
+)
+def test_stream_chat_completion_reasoning(remove_think_prefix, expected):
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        for delta in DELTAS:
+            yield SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        delta=SimpleNamespace(
+                            content=delta.get("content"),
+                            reasoning_content=delta.get("reasoning_content"),
+                        )
+                    )
+                ]
+            )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    chunks = stream_chat_completion(client, _llm_config(remove_think_prefix), [])
+    assert "".join(chunks) == expected
+
+
+def _async_chat(remove_think_prefix: bool) -> tuple[AsyncOpenAIChat, httpx.AsyncClient]:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not json.loads(request.content)["stream"]:
+            message = {"content": "<think>pienso</think>\nHola"}
+            return httpx.Response(200, json={"choices": [{"message": message}]})
+        events = [f"data: {json.dumps({'choices': [{'delta': delta}]})}" for delta in DELTAS]
+        return httpx.Response(200, text="\n\n".join([*events, "data: [DONE]"]) + "\n\n")
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncOpenAIChat(_llm_config(remove_think_prefix), http), http
+
+
+@pytest.mark.parametrize(
+    ("remove_think_prefix", "expected_stream", "expected_text"),
+    [
+        (True, "Hola", "Hola"),
+        (False, "<think>pienso</think>Hola", "<think>pienso</think>\nHola"),
+    ],
+)
+def test_async_chat_respects_remove_think_prefix(remove_think_prefix, expected_stream, expected_text):
+    async def run() -> tuple[str, str]:
+        chat, http = _async_chat(remove_think_prefix)
+        try:
+            streamed = "".join([chunk async for chunk in chat.generate_stream([])])
+            return streamed, await chat.generate([])
+        finally:
+            await http.aclose()
+
+    assert asyncio.run(run()) == (expected_stream, expected_text)
@@ -0,0 +1,109 @@
+import math
+
+from types import SimpleNamespace
+
+import pytest
+
+from memos.memories.textual.item import TextualMemoryItem
+
+from memos_ext.dedup import add_with_dedup, install_dedup
+from memos_ext.telemetry import SpanHook, add_span_hook, install_telemetry, remove_span_hook
+
+
+def _at_cosine(similarity: float) -> list[float]:
+    """Vector 2D cuya similitud coseno con [1, 0] es `similarity`."""
+    return [similarity, math.sqrt(1 - similarity**2)]
+
+
+def test_merges_above_threshold_and_inserts_below(text_mem):
+    mem = text_mem(
+        {
+            "base": [1.0, 0.0],
+            "casi igual": _at_cosine(0.96),
+            # Al otro lado de "base": tampoco se parece a "casi igual".
+            "distinto": [0.94, -math.sqrt(1 - 0.94**2)],
+        },
+        dimension=2,
+    )
+    assert add_with_dedup(mem, [TextualMemoryItem(memory="base")]) == {"inserted": 1, "merged": 0}
+
+    assert add_with_dedup(mem, [TextualMemoryItem(memory="casi igual")], threshold=0.95) == {
+        "inserted": 0,
+        "merged": 1,
+    }
+    assert add_with_dedup(mem, [TextualMemoryItem(memory="distinto")], threshold=0.95) == {
+        "inserted": 1,
+        "merged": 0,
+    }
+    # Al fusionar se queda el texto más reciente.
+    assert sorted(item.payload["memory"] for item in mem.vector_db.get_all()) == [
+        "casi igual",
+        "distinto",
+    ]
+
+
+def test_merge_refreshes_existing_payload(text_mem):
+    mem = text_mem({"hecho": [1.0, 0.0]}, dimension=2)
+    add_with_dedup(mem, [TextualMemoryItem(memory="hecho")])
+    (original,) = mem.vector_db.get_all()
+
+    repeated = TextualMemoryItem(memory="hecho", metadata={"session_id": "s2"})
+    add_with_dedup(mem, [repeated])
+
+    (merged,) = mem.vector_db.get_all()
+    assert merged.id == original.id
+    assert merged.payload["metadata"]["session_id"] == "s2"
+    assert merged.payload["metadata"]["seen_count"] == 2
+
+
+def test_merge_keeps_the_newest_text_and_its_vector(text_mem):
+    mem = text_mem(
+        {"Mi coche es rojo": [1.0, 0.0], "Mi coche es azul": _at_cosine(0.97)}, dimension=2
+    )
+    add_with_dedup(mem, [TextualMemoryItem(memory="Mi coche es rojo")])
+    (original,) = mem.vector_db.get_all()
+
+    assert add_with_dedup(mem, [TextualMemoryItem(memory="Mi coche es azul")])["merged"] == 1
+    (merged,) = mem.vector_db.get_all()
+    assert merged.id == original.id
+    assert merged.payload["memory"] == "Mi coche es azul"
+    assert merged.vector == pytest.approx(_at_cosine(0.97), abs=1e-6)
+
+    # Dentro de un lote, también gana la última versión.
+    mem = text_mem({"rojo": [1.0, 0.0], "azul": _at_cosine(0.97)}, dimension=2)
+    assert add_with_dedup(mem, [TextualMemoryItem(memory=t) for t in ("rojo", "azul")]) == {
+        "inserted": 1,
+        "merged": 1,
+    }
+    assert [item.payload["memory"] for item in mem.vector_db.get_all()] == ["azul"]
+
+
+def test_duplicates_within_one_batch_are_merged(text_mem):
+    mem = text_mem({"a": [1.0, 0.0], "b": [0.0, 1.0]}, dimension=2)
+    items = [TextualMemoryItem(memory=text) for text in ("a", "a", "b")]
+
+    assert add_with_dedup(mem, items) == {"inserted": 2, "merged": 1}
+    # Un único viaje al embedder para todo el lote.
+    assert mem.embedder.calls == [["a", "a", "b"]]
+
+
+class _Names(SpanHook):
+    def __init__(self):
+        self.names = []
+
+    def end(self, name, tags, duration, error, handle):
+        self.names.append(name)
+
+
+def test_install_dedup_keeps_telemetry_span(text_mem):
+    cube = SimpleNamespace(text_mem=text_mem(), config=SimpleNamespace(cube_id="c"))
+    install_telemetry(cube, cube_id="c")
+    install_dedup(cube)
+    hook = add_span_hook(_Names())
+    try:
+        cube.text_mem.add([TextualMemoryItem(memory="hola")])
+    finally:
+        remove_span_hook(hook)
+
+    assert "text_mem.add" in hook.names
+    assert cube.text_mem.vector_db.count() == 1
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from conftest import FakeEmbedder
+from memos_ext.embedding_cache import CachedEmbedder
+
+
+def test_repeated_texts_hit_the_cache():
+    inner = FakeEmbedder()
+    cache = CachedEmbedder(inner)
+
+    first = cache.embed(["hola", "adiós"])
+    second = cache.embed(["adiós", "hola"])
+
+    assert second == [first[1], first[0]]
+    assert inner.calls == [["hola", "adiós"]]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_duplicates_in_one_batch_are_embedded_once():
+    inner = FakeEmbedder()
+    vectors = CachedEmbedder(inner).embed(["a", "b", "a"])
+
+    assert inner.calls == [["a", "b"]]
+    assert vectors[0] == vectors[2]
+
+
+def test_lru_evicts_least_recently_used():
+    inner = FakeEmbedder()
+    cache = CachedEmbedder(inner, max_entries=2)
+    cache.embed(["a"])
+    cache.embed(["b"])
+    cache.embed(["a"])  # "a" pasa a ser la más reciente
+    cache.embed(["c"])  # expulsa "b"
+
+    inner.calls.clear()
+    cache.embed(["a", "c"])
+    assert inner.calls == []
+    cache.embed(["b"])
+    assert inner.calls == [["b"]]
+    assert cache.stats()["entries"] == 2
+
+
+def test_sqlite_tier_survives_a_new_instance(tmp_path):
+    # La carpeta todavía no existe: se crea al abrir la caché.
+    disk_path = str(tmp_path / "cache" / "embeddings.sqlite")
+    first = CachedEmbedder(FakeEmbedder(), disk_path=disk_path)
+    (vector,) = first.embed(["persistente"])
+    first.close()
+
+    inner = FakeEmbedder()
+    second = CachedEmbedder(inner, disk_path=disk_path)
+    assert second.embed(["persistente"]) == [pytest.approx(vector)]
+    assert inner.calls == []
+    assert second.stats()["disk_hits"] == 1
+    second.close()
+
+
+def test_key_includes_the_model_name(tmp_path):
+    disk_path = str(tmp_path / "cache.sqlite")
+    CachedEmbedder(FakeEmbedder(), disk_path=disk_path).embed(["texto"])
+
+    other_model = FakeEmbedder()
+    other_model.config.model_name_or_path = "otro"
+    CachedEmbedder(other_model, disk_path=disk_path).embed(["texto"])
+    assert other_model.calls == [["texto"]]
+
+
+def test_aembed_shares_the_cache_with_embed():
+    inner = FakeEmbedder()
+    cache = CachedEmbedder(inner)
+    fetched = []
+
+    async def fetch(texts):
+        fetched.append(texts)
+        return inner.embed(texts)
+
+    asyncio.run(cache.aembed(["a", "b"], fetch))
+    inner.calls.clear()
+    cache.embed(["a", "b"])
+
+    assert fetched == [["a", "b"]]
+    assert inner.calls == []
@@ -0,0 +1,41 @@
+from memos_ext.filters import matches, normalize_filter
+
+
+PAYLOAD = {
+    "id": "m1",
+    "memory": "hecho",
+    "metadata": {
+        "session_id": "s1",
+        "source": "conversation",
+        "updated_at": "2025-07-10T12:00:00",
+        "seen_count": 3,
+    },
+}
+
+
+def test_normalize_filter_prefixes_metadata_keys():
+    assert normalize_filter(None) == {}
+    assert normalize_filter(
+        {"session_id": "s1", "metadata.source": "file", "id": "m1", "memory": "x"}
+    ) == {"metadata.session_id": "s1", "metadata.source": "file", "id": "m1", "memory": "x"}
+
+
+def test_matches_equality_lists_and_missing_keys():
+    assert matches(PAYLOAD, None)
+    assert matches(PAYLOAD, {"session_id": "s1", "id": "m1"})
+    assert not matches(PAYLOAD, {"session_id": "s2"})
+    assert matches(PAYLOAD, {"source": ["file", "conversation"]})
+    assert not matches(PAYLOAD, {"source": ["file"]})
+    assert not matches(PAYLOAD, {"user_id": "u1"})
+
+
+def test_matches_ranges_on_dates_and_numbers():
+    assert matches(PAYLOAD, {"updated_at": {"gte": "2025-07-01T00:00"}})
+    assert matches(PAYLOAD, {"updated_at": {"gt": "2025-07-01", "lt": "2025-08-01"}})
+    assert not matches(PAYLOAD, {"updated_at": {"lt": "2025-07-10T12:00:00"}})
+    assert matches(PAYLOAD, {"updated_at": {"lte": "2025-07-10T12:00:00"}})
+    assert matches(PAYLOAD, {"seen_count": {"gte": 3, "lt": 4}})
+    assert not matches(PAYLOAD, {"seen_count": {"gt": 3}})
+    # Sin valor, o con tipos que no se pueden comparar, el rango no se cumple.
+    assert not matches(PAYLOAD, {"user_id": {"gte": 1}})
+    assert not matches(PAYLOAD, {"session_id": {"gte": 1}})
@@ -0,0 +1,157 @@
+import os
+import uuid
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from memos.vec_dbs.item import VecDBItem
+
+from conftest import FakeEmbedder
+from memos_ext.lifecycle import LOW_VALUE_PATTERNS, MemoryArchive, MemoryLifecycleManager
+
+
+def _item(vector, memory: str = "hecho", **metadata) -> VecDBItem:
+    """Punto como los de `general_text`: el payload es el `TextualMemoryItem` completo."""
+    memory_id = str(uuid.uuid4())
+    return VecDBItem(
+        id=memory_id,
+        vector=list(vector),
+        payload={"id": memory_id, "memory": memory, "metadata": {"user_id": "u1", **metadata}},
+    )
+
+
+def test_archive_search_matches_brute_force_across_segments(tmp_path):
+    rng = np.random.default_rng(5)
+    archive = MemoryArchive(str(tmp_path))
+    items = [_item(rng.normal(size=8), session_id=("a", "b")[i % 2]) for i in range(60)]
+    for start in range(0, 60, 20):
+        archive.append(items[start : start + 20])
+    assert len(archive) == 60
+
+    query = rng.normal(size=8)
+
+    def expected(candidates):
+        def cosine(item):
+            vector = np.asarray(item.vector)
+            return float(vector @ query / (np.linalg.norm(vector) * np.linalg.norm(query)))
+
+        return [item.id for item in sorted(candidates, key=cosine, reverse=True)[:5]]
+
+    hits = archive.search(query.tolist(), top_k=5)
+    assert [memory.id for _, memory in hits] == expected(items)
+    assert [score for score, _ in hits] == sorted((score for score, _ in hits), reverse=True)
+
+    hits = archive.search(query.tolist(), top_k=5, filter={"session_id": "b"})
+    assert [memory.id for _, memory in hits] == expected(
+        [item for item in items if item.payload["metadata"]["session_id"] == "b"]
+    )
+
+
+def test_archive_compact_folds_segments(tmp_path):
+    rng = np.random.default_rng(9)
+    archive = MemoryArchive(str(tmp_path))
+    for _ in range(3):
+        archive.append([_item(rng.normal(size=4)) for _ in range(4)])
+    query = rng.normal(size=4).tolist()
+    before = [memory.id for _, memory in archive.search(query, top_k=12)]
+
+    assert archive.compact() == 3
+    assert archive.compact() == 0
+    assert len(archive) == 12
+    assert [memory.id for _, memory in archive.search(query, top_k=12)] == before
+    assert sorted(os.listdir(tmp_path)) == [
+        "000004.payloads.jsonl",
+        "000004.vectors.npy",
+        "archive_manifest.json",
+    ]
+
+
+def _cube(numpy_db):
+    return SimpleNamespace(text_mem=SimpleNamespace(vector_db=numpy_db(4), embedder=FakeEmbedder()))
+
+
+def _old(hours: int = 2) -> str:
+    return (datetime.now() - timedelta(hours=hours)).isoformat()
+
+
+def test_low_value_patterns_are_configurable(tmp_path, numpy_db):
+    cube = _cube(numpy_db)
+    canned = _item(
+        [1, 0, 0, 0], "Recuerdo que hablamos de algo relacionado. ¿Es correcto?", updated_at=_old()
+    )
+    noted = _item([0, 1, 0, 0], "Entendido.", updated_at=_old())
+    fact = _item([0, 0, 1, 0], "Me llamo Ana y vivo en Madrid", updated_at=_old())
+    cube.text_mem.vector_db.add([canned, noted, fact])
+
+    default = MemoryLifecycleManager(cube, str(tmp_path / "default"))
+    assert default.run_once()["archived"] == 1
+    assert cube.text_mem.vector_db.get_by_id(noted.id) is None
+
+    custom = MemoryLifecycleManager(
+        cube,
+        str(tmp_path / "custom"),
+        low_value_patterns=(*LOW_VALUE_PATTERNS, r"recuerdo que hablamos de algo relacionado\..*"),
+    )
+    assert custom.run_once()["archived"] == 1
+    assert [item.id for item in cube.text_mem.vector_db.get_all()] == [fact.id]
+
+
+class _RefreshOnSecondAcquire:
+    """Candado que, al tomarse por segunda vez (tras la lectura), refresca una memoria."""
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self.acquired = 0
+
+    def __enter__(self):
+        self.acquired += 1
+        if self.acquired == 2:
+            self.refresh()
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_memories_refreshed_after_the_scan_are_not_archived(tmp_path, numpy_db):
+    cube = _cube(numpy_db)
+    vector_db = cube.text_mem.vector_db
+    refreshed = _item([1, 0, 0, 0], "ok", updated_at=_old())
+    stale = _item([0, 1, 0, 0], "gracias", updated_at=_old())
+    vector_db.add([refreshed, stale])
+
+    def dedup_refresh():
+        payload = vector_db.get_by_id(refreshed.id).payload
+        metadata = {**payload["metadata"], "updated_at": datetime.now().isoformat()}
+        vector_db.update(refreshed.id, {"id": refreshed.id, "payload": {"metadata": metadata}})
+
+    manager = MemoryLifecycleManager(cube, str(tmp_path), lock=_RefreshOnSecondAcquire(dedup_refresh))
+    assert manager.run_once()["archived"] == 1
+    assert [item.id for item in vector_db.get_all()] == [refreshed.id]
+    assert [memory.id for _, memory in manager.archive.search([0, 1, 0, 0], top_k=5)] == [stale.id]
+
+
+def test_max_hot_counts_only_archived_memories(tmp_path, numpy_db):
+    cube = _cube(numpy_db)
+    vector_db = cube.text_mem.vector_db
+    refreshed = _item([1, 0, 0, 0], "ok", updated_at=_old())
+    facts = [
+        _item([0, 1, 0, 0], "Vivo en Madrid", updated_at=_old(4)),
+        _item([0, 0, 1, 0], "Trabajo en Sevilla", updated_at=_old(3)),
+    ]
+    vector_db.add([refreshed, *facts])
+
+    def dedup_refresh():
+        payload = vector_db.get_by_id(refreshed.id).payload
+        metadata = {**payload["metadata"], "updated_at": datetime.now().isoformat()}
+        vector_db.update(refreshed.id, {"id": refreshed.id, "payload": {"metadata": metadata}})
+
+    manager = MemoryLifecycleManager(
+        cube, str(tmp_path), max_hot=2, lock=_RefreshOnSecondAcquire(dedup_refresh)
+    )
+    # La de poco valor cambió y se queda: el tope obliga a archivar el hecho más antiguo.
+    assert manager.run_once()["archived"] == 1
+    assert vector_db.count() == 2
+    assert vector_db.get_by_id(refreshed.id) is not None
+    assert vector_db.get_by_id(facts[0].id) is None
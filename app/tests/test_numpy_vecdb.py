@@ -0,0 +1,118 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from memos.vec_dbs.factory import VecDBFactory
+
+from memos_ext.numpy_vecdb import NumpyVecDB, NumpyVecDBConfig
+
+
+def _db(metric: str, dimension: int = 16, **extra) -> NumpyVecDB:
+    return NumpyVecDB(
+        NumpyVecDBConfig(
+            collection_name="test", vector_dimension=dimension, distance_metric=metric, **extra
+        )
+    )
+
+
+def _fill(db: NumpyVecDB, rng: np.random.Generator, n: int, dimension: int = 16) -> dict:
+    vectors = {}
+    items = []
+    for i in range(n):
+        memory_id = str(uuid.uuid4())
+        vectors[memory_id] = rng.normal(size=dimension).astype(np.float32)
+        payload = {"metadata": {"source": ("a", "b")[i % 2]}}
+        items.append({"id": memory_id, "vector": vectors[memory_id].tolist(), "payload": payload})
+    db.add(items)
+    return vectors
+
+
+def _brute_force(vectors: dict, query: np.ndarray, metric: str, top_k: int) -> list[str]:
+    def score(vector: np.ndarray) -> float:
+        if metric == "cosine":
+            return -float(vector @ query / (np.linalg.norm(vector) * np.linalg.norm(query)))
+        if metric == "dot":
+            return -float(vector @ query)
+        return float(np.linalg.norm(vector - query))
+
+    return sorted(vectors, key=lambda memory_id: score(vectors[memory_id]))[:top_k]
+
+
+@pytest.mark.parametrize("metric", ["cosine", "dot", "euclidean"])
+def test_search_matches_brute_force(metric):
+    rng = np.random.default_rng(7)
+    db = _db(metric)
+    vectors = _fill(db, rng, 300)
+
+    for _ in range(5):
+        query = rng.normal(size=16).astype(np.float32)
+        result = db.search(query.tolist(), top_k=10)
+        assert [item.id for item in result] == _brute_force(vectors, query, metric, 10)
+    assert len(db.search(query.tolist(), top_k=1000)) == 300
+
+
+def test_search_with_filter_and_delete():
+    rng = np.random.default_rng(11)
+    db = _db("cosine")
+    vectors = _fill(db, rng, 50)
+    source_a = {
+        memory_id: vector
+        for memory_id, vector in vectors.items()
+        if db.get_by_id(memory_id).payload["metadata"]["source"] == "a"
+    }
+
+    query = rng.normal(size=16).astype(np.float32)
+    result = db.search(query.tolist(), top_k=5, filter={"source": "a"})
+    assert [item.id for item in result] == _brute_force(source_a, query, "cosine", 5)
+    assert db.count({"metadata.source": "a"}) == 25
+
+    db.delete([result[0].id])
+    assert db.count() == 49
+    remaining = db.search(query.tolist(), top_k=5, filter={"source": "a"})
+    assert result[0].id not in [item.id for item in remaining]
+
+
+def test_promotion_writes_marker_and_reopens_in_qdrant(tmp_path):
+    pytest.importorskip("qdrant_client")
+    extra = {
+        "promote_threshold": 8,
+        "promote_to": {"path": str(tmp_path / "qdrant")},
+        "promotion_marker": str(tmp_path / "promoted.json"),
+    }
+    rng = np.random.default_rng(3)
+    db = _db("cosine", **extra)
+    vectors = _fill(db, rng, 5)
+    assert not db.promoted
+    assert not os.path.exists(extra["promotion_marker"])
+
+    vectors.update(_fill(db, rng, 5))
+    assert db.promoted
+    assert os.path.exists(extra["promotion_marker"])
+    assert db.count() == 10
+    query = rng.normal(size=16).astype(np.float32)
+    assert [item.id for item in db.search(query.tolist(), top_k=3)] == _brute_force(
+        vectors, query, "cosine", 3
+    )
+    getattr(db._promoted, "close", lambda: None)()
+    getattr(getattr(db._promoted, "client", None), "close", lambda: None)()
+
+    reopened = _db("cosine", **extra)
+    assert reopened.promoted
+    assert reopened.count() == 10
+
+
+def test_no_qdrant_connection_without_marker(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Qdrant should not be opened")
+
+    monkeypatch.setattr(VecDBFactory, "from_config", fail)
+    db = _db(
+        "cosine",
+        promote_threshold=100,
+        promote_to={"path": str(tmp_path / "qdrant")},
+        promotion_marker=str(tmp_path / "promoted.json"),
+    )
+    assert not db.promoted
+    assert db.count() == 0
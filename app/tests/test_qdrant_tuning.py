@@ -0,0 +1,35 @@
+import uuid
+
+import pytest
+
+
+def test_tuned_qdrant_in_server_mode(monkeypatch):
+    """En modo servidor (host/port) la colección y los índices se crean al construir."""
+    qdrant_client = pytest.importorskip("qdrant_client")
+    from memos_ext.qdrant_tuning import TunedQdrantVecDB, TunedQdrantVecDBConfig
+
+    real_client = qdrant_client.QdrantClient
+    monkeypatch.setattr(
+        qdrant_client, "QdrantClient", lambda *args, **kwargs: real_client(location=":memory:")
+    )
+    db = TunedQdrantVecDB(
+        TunedQdrantVecDBConfig(
+            collection_name="server",
+            vector_dimension=2,
+            distance_metric="cosine",
+            host="localhost",
+            port=6333,
+        )
+    )
+    assert db._shared_path is None
+
+    ids = [str(uuid.uuid4()) for _ in range(2)]
+    db.add(
+        [
+            {"id": ids[0], "vector": [1.0, 0.0], "payload": {"metadata": {"session_id": "s1"}}},
+            {"id": ids[1], "vector": [0.9, 0.1], "payload": {"metadata": {"session_id": "s2"}}},
+        ]
+    )
+    result = db.search([1.0, 0.0], top_k=2, filter={"session_id": "s2"})
+    assert [item.id for item in result] == [ids[1]]
+    db.close()
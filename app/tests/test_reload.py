@@ -0,0 +1,53 @@
+from memos.memories.activation.base import BaseActMemory
+
+
+class DictActMemory(BaseActMemory):
+    """Memoria de activación en un dict que, como `KVCacheMemory.load`, no se vacía al cargar."""
+
+    def __init__(self):
+        self.items: dict[str, str] = {}
+
+    def extract(self, text):
+        return text
+
+    def add(self, memories):
+        self.items.update((memory, memory) for memory in memories)
+
+    def get(self, memory_id):
+        return self.items.get(memory_id)
+
+    def get_by_ids(self, memory_ids):
+        return [self.items.get(memory_id) for memory_id in memory_ids]
+
+    def get_all(self):
+        return list(self.items.values())
+
+    def delete(self, memory_ids):
+        for memory_id in memory_ids:
+            self.items.pop(memory_id, None)
+
+    def delete_all(self):
+        self.items.clear()
+
+    def load(self, dir):
+        pass
+
+    def dump(self, dir):
+        pass
+
+
+def test_reload_cube_drops_stale_state(mos, tmp_path):
+    cube_id = mos.add_user("ana")
+    mem_cube = mos.mem_cubes[cube_id]
+    mem_cube.act_mem = DictActMemory()
+    mos.add_many([[{"role": "user", "content": "Vivo en Madrid"}]], user_id="ana")
+    mos.dump(str(tmp_path), user_id="ana", mem_cube_id=cube_id)
+
+    mos.add_many([[{"role": "user", "content": "Trabajo en Sevilla"}]], user_id="ana")
+    mem_cube.act_mem.add(["kv obsoleta"])
+
+    mos.reload_cube(cube_id, str(tmp_path), user_id="ana")
+    assert [item.payload["memory"] for item in mem_cube.text_mem.vector_db.get_all()] == [
+        "Vivo en Madrid"
+    ]
+    assert mem_cube.act_mem.get_all() == []
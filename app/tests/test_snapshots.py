@@ -0,0 +1,80 @@
+import os
+
+from memos.mem_cube.general import GeneralMemCube
+from memos.memories.textual.item import TextualMemoryItem
+
+from memos_ext.lazy_cube import LazyMemCube
+from memos_ext.snapshots import MANIFEST_FILENAME, CubeSnapshotter, _read_json, compact_snapshot
+
+
+def _add(mem_cube, *texts) -> list[str]:
+    items = [TextualMemoryItem(memory=text) for text in texts]
+    mem_cube.text_mem.add(items)
+    return [item.id for item in items]
+
+
+def _memories(mem_cube) -> list[str]:
+    return sorted(item.payload["memory"] for item in mem_cube.text_mem.vector_db.get_all())
+
+
+def _restored(cube_config, dir) -> GeneralMemCube:
+    mem_cube = GeneralMemCube(cube_config())
+    CubeSnapshotter(mem_cube, dir).restore()
+    return mem_cube
+
+
+def test_checkpoints_write_base_then_segments_with_changes_only(cube_config, tmp_path):
+    mem_cube = GeneralMemCube(cube_config())
+    snapshotter = CubeSnapshotter(mem_cube, str(tmp_path))
+    first_ids = _add(mem_cube, "uno", "dos")
+
+    assert snapshotter.checkpoint() == {"upserted": 2, "deleted": 0}
+    assert snapshotter.checkpoint() == {"upserted": 0, "deleted": 0}
+
+    _add(mem_cube, "tres")
+    mem_cube.text_mem.delete([first_ids[0]])
+    assert snapshotter.checkpoint() == {"upserted": 1, "deleted": 1}
+    assert _read_json(os.path.join(tmp_path, MANIFEST_FILENAME))["segments"] == ["000001"]
+
+
+def test_restore_replays_segments_in_order(cube_config, tmp_path):
+    mem_cube = GeneralMemCube(cube_config())
+    snapshotter = CubeSnapshotter(mem_cube, str(tmp_path))
+    (first_id,) = _add(mem_cube, "uno")
+    snapshotter.checkpoint()
+    _add(mem_cube, "dos")
+    snapshotter.checkpoint()
+    mem_cube.text_mem.delete([first_id])
+    _add(mem_cube, "tres")
+    snapshotter.checkpoint()
+
+    assert _memories(_restored(cube_config, str(tmp_path))) == ["dos", "tres"]
+
+
+def test_state_survives_a_new_snapshotter(cube_config, tmp_path):
+    mem_cube = GeneralMemCube(cube_config())
+    _add(mem_cube, "uno")
+    CubeSnapshotter(mem_cube, str(tmp_path)).checkpoint()
+    _add(mem_cube, "dos")
+    CubeSnapshotter(mem_cube, str(tmp_path)).checkpoint()
+
+    # Otro proceso: el estado se reconstruye desde base + segmentos.
+    assert CubeSnapshotter(mem_cube, str(tmp_path)).checkpoint() == {"upserted": 0, "deleted": 0}
+
+
+def test_compaction_folds_segments_and_stays_loadable(cube_config, tmp_path):
+    mem_cube = GeneralMemCube(cube_config())
+    snapshotter = CubeSnapshotter(mem_cube, str(tmp_path))
+    (first_id,) = _add(mem_cube, "uno")
+    snapshotter.checkpoint()
+    _add(mem_cube, "dos", "tres")
+    snapshotter.checkpoint()
+    mem_cube.text_mem.delete([first_id])
+    snapshotter.checkpoint()
+
+    assert compact_snapshot(str(tmp_path)) == 2
+    assert _read_json(os.path.join(tmp_path, MANIFEST_FILENAME))["segments"] == []
+    assert not os.path.exists(tmp_path / "segments")
+    assert _memories(_restored(cube_config, str(tmp_path))) == ["dos", "tres"]
+    assert _memories(LazyMemCube.init_from_dir(str(tmp_path))) == ["dos", "tres"]
+    assert compact_snapshot(str(tmp_path)) == 0
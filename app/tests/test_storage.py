@@ -0,0 +1,75 @@
+import os
+
+from memos.mem_cube.general import GeneralMemCube
+from memos.memories.textual.item import TextualMemoryItem
+
+from memos_ext.lazy_cube import LazyMemCube
+from memos_ext.storage import binary_paths, dump_mem_cube, load_mem_cube
+
+TEXTS = ["Me encanta jugar al fútbol", "Vivo en Madrid", "Trabajo de ingeniero"]
+
+
+def _filled_cube(cube_config) -> GeneralMemCube:
+    mem_cube = GeneralMemCube(cube_config())
+    mem_cube.text_mem.add([TextualMemoryItem(memory=text) for text in TEXTS])
+    return mem_cube
+
+
+def _memories(mem_cube) -> list[str]:
+    return sorted(item.payload["memory"] for item in mem_cube.text_mem.vector_db.get_all())
+
+
+def test_dump_writes_binary_files_only(cube_config, tmp_path):
+    dump_mem_cube(_filled_cube(cube_config), str(tmp_path))
+
+    vectors_path, payloads_path = binary_paths(str(tmp_path), "textual_memory.json")
+    assert os.path.exists(vectors_path) and os.path.exists(payloads_path)
+    assert not os.path.exists(tmp_path / "textual_memory.json")
+
+
+def test_load_round_trip_keeps_vectors_and_payloads(cube_config, tmp_path):
+    original = _filled_cube(cube_config)
+    dump_mem_cube(original, str(tmp_path), dtype="float16")
+
+    loaded = GeneralMemCube(cube_config())
+    load_mem_cube(loaded, str(tmp_path))
+
+    assert _memories(loaded) == sorted(TEXTS)
+    query = original.text_mem.embedder.embed(["Vivo en Madrid"])[0]
+    (hit,) = loaded.text_mem.vector_db.search(query, 1)
+    assert hit.payload["memory"] == "Vivo en Madrid"
+
+
+def test_lazy_cube_materializes_text_mem_from_binary_dump(cube_config, tmp_path):
+    dump_mem_cube(_filled_cube(cube_config), str(tmp_path))
+
+    lazy = LazyMemCube.init_from_dir(str(tmp_path))
+    assert lazy.loaded_types == []
+    assert _memories(lazy) == sorted(TEXTS)
+
+
+def test_dump_copies_pending_memories_without_building_them(cube_config, tmp_path):
+    config = cube_config()
+    config.act_mem = {
+        "backend": "kv_cache",
+        "config": {
+            "extractor_llm": {
+                "backend": "huggingface",
+                "config": {"model_name_or_path": "Qwen/Qwen3-1.7B"},
+            }
+        },
+    }
+    source = tmp_path / "source"
+    mem_cube = GeneralMemCube(cube_config())
+    mem_cube.text_mem.add([TextualMemoryItem(memory="hola")])
+    dump_mem_cube(mem_cube, str(source))
+    config.to_json_file(str(source / "config.json"))
+    (source / "activation_memory.safetensors").write_bytes(b"kv")
+
+    lazy = LazyMemCube.init_from_dir(str(source))
+    dump_mem_cube(lazy, str(tmp_path / "copy"))
+
+    # La memoria de activación (y su LLM) no se construyó: sus ficheros se copiaron.
+    assert lazy.loaded_types == ["text_mem"]
+    assert (tmp_path / "copy" / "activation_memory.safetensors").read_bytes() == b"kv"
+    assert _memories(LazyMemCube.init_from_dir(str(tmp_path / "copy"))) == ["hola"]
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from memos_ext.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def write_queue():
+    queue = WriteBehindQueue(maxsize=4)
+    yield queue
+    queue.close(timeout=5)
+
+
+def test_runs_writes_in_order_and_flush_waits_for_them(write_queue):
+    release = threading.Event()
+    done = []
+
+    write_queue.submit(release.wait, 5)
+    for value in range(3):
+        write_queue.submit(done.append, value)
+    assert write_queue.pending == 4
+    assert not write_queue.flush(timeout=0.05)
+
+    release.set()
+    assert write_queue.flush(timeout=5)
+    assert done == [0, 1, 2]
+    assert write_queue.pending == 0
+
+
+def test_future_carries_result_and_errors(write_queue):
+    ok = write_queue.submit(lambda: 42)
+    failed = write_queue.submit(lambda: 1 / 0)
+    after = write_queue.submit(lambda: "sigue")
+
+    assert ok.result(timeout=5) == 42
+    with pytest.raises(ZeroDivisionError):
+        failed.result(timeout=5)
+    # Un fallo no detiene el hilo de trabajo.
+    assert after.result(timeout=5) == "sigue"
+    assert write_queue.flush(timeout=5)
+
+
+def test_submit_blocks_when_the_queue_is_full():
+    queue = WriteBehindQueue(maxsize=1)
+    release = threading.Event()
+    started = threading.Event()
+    queue.submit(lambda: (started.set(), release.wait(5)))
+    started.wait(5)
+    queue.submit(lambda: None)  # ocupa la única plaza de la cola
+
+    submitted = threading.Event()
+    producer = threading.Thread(target=lambda: (queue.submit(lambda: None), submitted.set()))
+    producer.start()
+    assert not submitted.wait(0.1)
+
+    release.set()
+    assert submitted.wait(5)
+    producer.join(5)
+    queue.close(timeout=5)
+
+
+def test_close_drains_pending_writes_and_rejects_new_ones():
+    queue = WriteBehindQueue()
+    done = []
+    for value in range(5):
+        queue.submit(done.append, value)
+    queue.close(timeout=5)
+
+    assert done == [0, 1, 2, 3, 4]
+    with pytest.raises(RuntimeError):
+        queue.submit(done.append, 5)